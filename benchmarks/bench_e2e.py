@@ -0,0 +1,170 @@
+"""
+端到端基准: 本地模拟服务端 -> 轮询 -> EventFactory -> handle_event
+统计 每轮耗时、轮询到handle_event的延迟、events/s、每轮请求数、内存峰值
+运行: python -m benchmarks.bench_e2e --cycles 50 --post-rate 5 --latency 0.01
+对比: python -m benchmarks.bench_e2e --output new.json --compare old.json
+各阶段耗时: python -m benchmarks.bench_e2e --profile
+录制请求(给bench_replay用): python -m benchmarks.bench_e2e --record journal.jsonl.gz
+"""
+
+import json
+import time
+import socket
+import asyncio
+from pathlib import Path
+import argparse
+import statistics
+import tracemalloc
+
+import nonebot
+import uvicorn
+
+from .mock_server import MockState, create_app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(data: list[float], p: float) -> float:
+    if not data:
+        return 0.0
+    data = sorted(data)
+    return data[min(len(data) - 1, int(len(data) * p))]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    state = MockState(
+        post_rate=args.post_rate,
+        notice_rate=args.notice_rate,
+        latency=args.latency,
+        seed=args.seed,
+        auto_tick=False,
+    )
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(state), host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    root = f"http://127.0.0.1:{port}/"
+    nonebot.init(
+        driver="~fastapi+~httpx",
+        log_level="WARNING",
+        club255_url=root,
+        club255_upload_api=root + "upload",
+        club255_token="mock",
+        club255_listen=args.listen,
+        club255_run_now=True,
+        club255_profile=args.profile,
+        club255_profile_log_interval=0,
+        club255_record_path=args.record,
+    )
+    from nonebot_adapter_club255 import Bot, Adapter, journal
+    from nonebot_adapter_club255.factory import EventFactory
+    from nonebot_adapter_club255.profiler import profiler
+
+    latencies: list[float] = []
+    cycle_start = 0.0
+    events = 0
+    recording = False
+
+    class BenchBot(Bot):
+        async def handle_event(self, event):
+            nonlocal events
+            if recording:
+                events += 1
+                latencies.append(time.perf_counter() - cycle_start)
+            await super().handle_event(event)
+
+    driver = nonebot.get_driver()
+    driver.register_adapter(Adapter)
+    adapter = nonebot.get_adapter(Adapter)
+    login = await adapter._get_token(token="mock")
+    bot = BenchBot(
+        adapter=adapter, self_id=str(login["uid"]), header={"cookie": "token=mock;"}, config=adapter.club255_config
+    )
+
+    cycles: list[float] = []
+    requests: list[int] = []
+    # 第一轮只用来记录已有帖子
+    state.tick()
+    await EventFactory.main(bot, False)
+    recording = True
+    for _ in range(args.cycles):
+        state.tick()
+        before = sum(state.requests.values())
+        cycle_start = time.perf_counter()
+        await EventFactory.main(bot, True)
+        cycles.append(time.perf_counter() - cycle_start)
+        requests.append(sum(state.requests.values()) - before)
+
+    recording = False
+    if args.profile:
+        for feed, stages in profiler.summary().items():
+            print(f"{feed} p50/p90/p99(ms):")
+            for name, values in stages.items():
+                print(f"{name:>20}: " + " / ".join(f"{values[q] * 1000:.2f}" for q in sorted(values)))
+    tracemalloc.start()
+    for _ in range(args.memory_cycles):
+        state.tick()
+        await EventFactory.main(bot, True)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if journal.recorder is not None:
+        journal.recorder.close()
+    server.should_exit = True
+    await server_task
+
+    total = sum(cycles)
+    return {
+        "cycles": args.cycles,
+        "cycle_ms_p50": statistics.median(cycles) * 1000,
+        "cycle_ms_p95": _percentile(cycles, 0.95) * 1000,
+        "latency_ms_p50": _percentile(latencies, 0.5) * 1000,
+        "latency_ms_p95": _percentile(latencies, 0.95) * 1000,
+        "events": events,
+        "events_per_s": events / total if total else 0.0,
+        "requests_per_cycle": statistics.mean(requests),
+        "memory_peak_kb": peak / 1024,
+    }
+
+
+def compare(result: dict, baseline: dict) -> None:
+    print(f"{'metric':>20} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key, value in result.items():
+        old = baseline.get(key)
+        if not isinstance(old, int | float) or not old:
+            continue
+        print(f"{key:>20} {old:>12.2f} {value:>12.2f} {(value - old) / old * 100:>7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=30)
+    parser.add_argument("--memory-cycles", type=int, default=5)
+    parser.add_argument("--post-rate", type=int, default=5)
+    parser.add_argument("--notice-rate", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--listen", nargs="+", default=["post", "notice"])
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--record", type=Path)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    for key, value in result.items():
+        print(f"{key:>20}: {value:.2f}" if isinstance(value, float) else f"{key:>20}: {value}")
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+    if args.compare:
+        compare(result, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
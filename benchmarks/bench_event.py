@@ -0,0 +1,60 @@
+"""
+bean -> Event 构造速度(events/s)，两种方式交替运行，取每种的最好成绩
+NewPostEvent的耗时主要在解析帖子内容，from_bean和model_validate基本持平(0.9x~1.1x，在误差范围内)
+运行: python -m benchmarks.bench_event
+"""
+
+import time
+import random
+
+from pydantic import BaseModel
+
+from nonebot_adapter_club255.bean import BaseLike, PostInfo
+from nonebot_adapter_club255.event import Event, NewPostEvent, FloorLikeNoticeEvent
+
+from . import samples
+
+SELF_UID = 114514
+
+
+def build_validate(event: type[Event], data: BaseModel) -> Event:
+    # 旧的构造方式
+    return event.model_validate({**data.model_dump(), "self_uid": SELF_UID})
+
+
+def build_trusted(event: type[Event], data: BaseModel) -> Event:
+    return event.from_bean(data, self_uid=SELF_UID)
+
+
+ROUNDS = 5
+
+
+def bench(event: type[Event], beans: list, build, seconds: float = 0.3) -> float:
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        for bean in beans:
+            build(event, bean)
+        count += len(beans)
+    return count / elapsed
+
+
+def main():
+    rng = random.Random(0)
+    posts = [PostInfo.model_validate(samples.post(i, rng)) for i in range(200)]
+    likes = [BaseLike.model_validate(samples.like(i, rng)) for i in range(400)]
+    floor_likes = [i.to_floor_like() for i in likes if i.type == 2]
+
+    for name, event, beans in [
+        ("NewPostEvent", NewPostEvent, posts),
+        ("FloorLikeNoticeEvent", FloorLikeNoticeEvent, floor_likes),
+    ]:
+        old = new = 0.0
+        for _ in range(ROUNDS):
+            old = max(old, bench(event, beans, build_validate))
+            new = max(new, bench(event, beans, build_trusted))
+        print(f"{name:>22} | model_validate {old:>10.0f}/s | from_bean {new:>10.0f}/s | x{new / old:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+PostDetails.content(html) -> Message 解析耗时
+运行: python -m benchmarks.bench_html
+"""
+
+import time
+
+from nonebot_adapter_club255.message import Message, HtmlMessageParser
+
+_PARAGRAPHS = [
+    "<p>今天也是元气满满的一天<strong><em>冲冲冲</em></strong></p>",
+    '<p><img src="https://2550505.com/emotion/1/哈.png" alt="哈" title="哈" class="emoticon-img" '
+    'referrerpolicy="no-referrer" data-emotion-name="哈" contenteditable="false" draggable="true">'
+    '<img class="ProseMirror-separator" alt=""><br class="ProseMirror-trailingBreak"></p>',
+    '<p><a class="editor-hash-tag" href="/tag/1" data-id="1" data-label="hanser">#hanser</a>&nbsp;好听</p>',
+    '<p><img src="https://pic.example.com/a.jpg" class="upload-img" referrerpolicy="no-referrer"></p>',
+    '<p><img src="https://i0.hdslb.com/cover.jpg" class="upload-img" data-bv="BV1xx411c7mD" '
+    'referrerpolicy="no-referrer"></p><p><a target="_blank" rel="noopener noreferrer nofollow" '
+    'class="editor-link editor-link" href="https://www.bilibili.com/video/BV1xx411c7mD/">视频标题</a></p>',
+]
+
+# 站内常见的帖子长度: 短帖/普通帖/长帖/超长帖(单位:字节)
+SIZES = {"short": 1_000, "common": 10_000, "long": 200_000, "huge": 2_000_000}
+
+
+def make_content(size: int) -> str:
+    parts = []
+    total = 0
+    index = 0
+    while total < size:
+        part = _PARAGRAPHS[index % len(_PARAGRAPHS)]
+        parts.append(part)
+        total += len(part.encode())
+        index += 1
+    return "".join(parts)
+
+
+def bench(content: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        Message.from_html(content)
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_stream(content: str, chunk: int = 4096) -> float:
+    start = time.perf_counter()
+    parser = HtmlMessageParser()
+    for i in range(0, len(content), chunk):
+        parser.feed(content[i : i + chunk])
+    parser.get_message()
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'size':>8} {'bytes':>10} {'ms/op':>10} {'MB/s':>8} {'stream ms':>10}")
+    for name, size in SIZES.items():
+        content = make_content(size)
+        nbytes = len(content.encode())
+        repeat = max(1, 2_000_000 // nbytes)
+        cost = bench(content, repeat)
+        stream = bench_stream(content)
+        print(f"{name:>8} {nbytes:>10} {cost * 1000:>10.3f} {nbytes / cost / 1e6:>8.2f} {stream * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+一天的点赞/回复通知占用的内存: bean / event / compact
+运行: python -m benchmarks.bench_memory
+"""
+
+import gc
+import random
+import tracemalloc
+from collections.abc import Callable
+
+from nonebot_adapter_club255.bean import BaseLike, BaseReply
+from nonebot_adapter_club255.event import PostReplyEvent, FloorReplyEvent, PostLikeNoticeEvent, FloorLikeNoticeEvent
+from nonebot_adapter_club255.compact import compact_like, compact_reply
+
+from . import samples
+
+# 一天的通知数量
+LIKES = 20_000
+REPLIES = 5_000
+
+
+def measure(build: Callable[[], list]) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, len(data)
+
+
+def main():
+    rng = random.Random(0)
+    like_raw = [samples.like(i, rng) for i in range(LIKES)]
+    reply_raw = [samples.reply(i, rng) for i in range(REPLIES)]
+
+    def beans():
+        return [BaseLike.model_validate(i) for i in like_raw] + [BaseReply.model_validate(i) for i in reply_raw]
+
+    def events():
+        result = []
+        for i in beans():
+            if isinstance(i, BaseLike):
+                result.append(
+                    FloorLikeNoticeEvent.from_bean(i.to_floor_like(), self_uid=1)
+                    if i.type == 2
+                    else PostLikeNoticeEvent.from_bean(i.to_post_like(), self_uid=1)
+                )
+            else:
+                result.append(
+                    FloorReplyEvent.from_bean(i.to_floor_reply(), self_uid=1)
+                    if i.type == 2
+                    else PostReplyEvent.from_bean(i.to_post_reply(), self_uid=1)
+                )
+        return result
+
+    def compact():
+        return [compact_like(i) for i in beans() if isinstance(i, BaseLike)] + [
+            compact_reply(i) for i in beans() if isinstance(i, BaseReply)
+        ]
+
+    print(f"{'kind':>8} {'items':>8} {'MB':>8} {'bytes/item':>11}")
+    for name, build in [("bean", beans), ("event", events), ("compact", compact)]:
+        size, count = measure(build)
+        print(f"{name:>8} {count:>8} {size / 1e6:>8.2f} {size / count:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
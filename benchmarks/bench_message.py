@@ -0,0 +1,185 @@
+"""
+message.py 的微基准: Message._construct / Message.join_url / Message.xml / TextMsg.xml / FaceMsg / TagMsg
+语料: 表情多、长文本多段落、图片视频多、标签多
+输出每个用例的 ops/s 和每次操作分配的内存峰值(tracemalloc)
+运行: python -m benchmarks.bench_message
+更新基准: python -m benchmarks.bench_message --update
+检查回归: python -m benchmarks.bench_message --check
+基准文件和机器有关，换机器后先 --update
+"""
+
+import sys
+import json
+import time
+import random
+from pathlib import Path
+import argparse
+import tracemalloc
+from collections.abc import Callable
+
+from nonebot_adapter_club255.data import TagEnum, FaceEnum
+from nonebot_adapter_club255.message import TagMsg, FaceMsg, Message, TextMsg, VideoMsg
+
+BASELINE = Path(__file__).with_name("baseline_message.json")
+
+_TEXTS = ["今天也是元气满满的一天", "hanser天下第一", "有人一起去演唱会吗", "打卡", "新人报到，请多指教"]
+_FACES = [f"[{i.value.name}]" for i in FaceEnum]
+_TAGS = [f"#{i.value.name} " for i in TagEnum]
+
+
+def _emoji(rng: random.Random) -> str:
+    return "".join(rng.choice(_FACES) + (rng.choice(_TEXTS) if rng.random() < 0.2 else "") for _ in range(60))
+
+
+def _long(rng: random.Random) -> str:
+    return "\n".join(
+        "".join(rng.choice(_TEXTS) for _ in range(rng.randint(5, 15))) + rng.choice(_FACES) for _ in range(40)
+    )
+
+
+def _media(rng: random.Random) -> dict:
+    parts = [rng.choice(_TEXTS) for _ in range(10)] + ["[图片]"] * 9 + ["[视频]"] * 3
+    rng.shuffle(parts)
+    return {
+        "content": "\n".join(parts),
+        "pictures": [f"https://pic.example.com/{i}.jpg" for i in range(9)],
+        "videos": [f"BV1xx411c7m{i}" for i in range(3)],
+    }
+
+
+def _tag(rng: random.Random) -> str:
+    return "".join(rng.choice(_TAGS) + rng.choice(_TEXTS) for _ in range(30))
+
+
+def corpus() -> dict[str, dict]:
+    """
+    固定种子，每次运行语料都一样
+    :return: {名字: 帖子数据(content/pictures/videos)}
+    """
+    rng = random.Random(0)
+    return {
+        "emoji": {"content": _emoji(rng)},
+        "long": {"content": _long(rng)},
+        "media": _media(rng),
+        "tag": {"content": _tag(rng)},
+    }
+
+
+def _joined(data: dict) -> str:
+    data = dict(data)
+    Message.join_url(data)
+    return data["content"]
+
+
+def _uploaded(content: str) -> Message:
+    # xml()要求视频已经获取过标题
+    msg = Message(content)
+    for seg in msg:
+        if isinstance(seg, VideoMsg):
+            seg.data["title"] = "视频标题"
+            seg.data["cover"] = "https://i0.hdslb.com/cover.jpg"
+    return msg
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    result: dict[str, Callable[[], object]] = {}
+    for name, data in corpus().items():
+        content = _joined(data)
+        msg = _uploaded(content)
+        result[f"construct.{name}"] = lambda content=content: Message(content)
+        result[f"join_url.{name}"] = lambda data=data: Message.join_url(dict(data))
+        result[f"xml.{name}"] = lambda msg=msg: msg.xml()
+    text = TextMsg("\n".join(_TEXTS * 20), strong=True)
+    result["text_xml"] = text.xml
+    faces = list(FaceEnum)
+    first, last = faces[0].value.name, faces[-1].value.name
+    result["face.first"] = lambda: FaceMsg(first)
+    result["face.last"] = lambda: FaceMsg(last)
+    result["face.unknown"] = lambda: FaceMsg("不存在", strict=False)
+    tag = list(TagEnum)[-1].value.name
+    result["tag.known"] = lambda: TagMsg(tag)
+    result["tag.unknown"] = lambda: TagMsg("不存在", strict=False)
+    return result
+
+
+def ops_per_second(func: Callable[[], object], seconds: float, rounds: int = 5) -> float:
+    # 取几轮中最快的一轮，减少其他进程带来的抖动
+    best = 0.0
+    for _ in range(rounds):
+        count = 0
+        batch = 1
+        start = time.perf_counter()
+        while (elapsed := time.perf_counter() - start) < seconds / rounds:
+            for _ in range(batch):
+                func()
+            count += batch
+            batch = min(batch * 2, 1024)
+        best = max(best, count / elapsed)
+    return best
+
+
+def bytes_per_op(func: Callable[[], object], repeat: int = 20) -> float:
+    func()
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        return sorted(peaks)[len(peaks) // 2]
+    finally:
+        tracemalloc.stop()
+
+
+def run(seconds: float) -> dict[str, dict[str, float]]:
+    return {
+        name: {"ops_per_s": ops_per_second(func, seconds), "bytes_per_op": bytes_per_op(func)}
+        for name, func in cases().items()
+    }
+
+
+def check(result: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    ops/s下降或bytes/op上升超过tolerance算回归
+    """
+    ok = True
+    print(f"{'case':>20} {'ops/s':>10} {'bytes/op':>10}")
+    for name, values in result.items():
+        if (old := baseline.get(name)) is None:
+            continue
+        speed = (values["ops_per_s"] - old["ops_per_s"]) / old["ops_per_s"]
+        memory = (values["bytes_per_op"] - old["bytes_per_op"]) / old["bytes_per_op"] if old["bytes_per_op"] else 0.0
+        flag = ""
+        if speed < -tolerance or memory > tolerance:
+            ok = False
+            flag = " <- 回归"
+        print(f"{name:>20} {speed * 100:>9.1f}% {memory * 100:>9.1f}%{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--update", action="store_true", help="把结果写入基准文件")
+    parser.add_argument("--check", action="store_true", help="和基准文件比较，有回归时返回1")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    args = parser.parse_args()
+
+    result = run(args.seconds)
+    print(f"{'case':>20} {'ops/s':>12} {'bytes/op':>10}")
+    for name, values in result.items():
+        print(f"{name:>20} {values['ops_per_s']:>12.0f} {values['bytes_per_op']:>10.0f}")
+
+    if args.update:
+        args.baseline.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n")
+    if args.check:
+        print()
+        if not check(result, json.loads(args.baseline.read_text()), args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
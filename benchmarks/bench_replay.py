@@ -0,0 +1,77 @@
+"""
+回放录制的请求，不访问网络，只测 json -> 校验 -> 消息解析 -> 构造事件 -> 分发
+录制: python -m benchmarks.bench_e2e --record journal.jsonl.gz
+运行: python -m benchmarks.bench_replay journal.jsonl.gz --repeat 5
+"""
+
+import time
+import asyncio
+from pathlib import Path
+import argparse
+
+import nonebot
+
+
+async def run(args: argparse.Namespace) -> None:
+    nonebot.init(
+        driver="~httpx",
+        log_level="WARNING",
+        club255_listen=args.listen,
+        club255_profile=True,
+        club255_profile_log_interval=0,
+    )
+    from nonebot_adapter_club255 import Adapter
+    from nonebot_adapter_club255.replay import Journal, ReplayBot, replay
+    from nonebot_adapter_club255.factory import _EventFactory
+    from nonebot_adapter_club255.profiler import profiler
+
+    nonebot.get_driver().register_adapter(Adapter)
+    adapter = nonebot.get_adapter(Adapter)
+    records = Journal.load(args.journal).records
+
+    events = 0
+
+    class BenchBot(ReplayBot):
+        async def handle_event(self, event):
+            nonlocal events
+            events += 1
+            await super().handle_event(event)
+
+    elapsed = 0.0
+    cycles = 0
+    for _ in range(args.repeat):
+        journal = Journal(records)
+        bot = BenchBot(
+            journal=journal,
+            adapter=adapter,
+            self_id=journal.bot_id or "0",
+            header={},
+            config=adapter.club255_config,
+        )
+        factory = _EventFactory()
+        factory.data = {}
+        start = time.perf_counter()
+        cycles += await replay(bot, args.speed, factory=factory, allow_first=False)
+        elapsed += time.perf_counter() - start
+
+    print(f"{'requests':>20}: {len(records) * args.repeat}")
+    print(f"{'cycles':>20}: {cycles}")
+    print(f"{'events':>20}: {events}")
+    print(f"{'events_per_s':>20}: {events / elapsed if elapsed else 0.0:.2f}")
+    for feed, stages in profiler.summary().items():
+        print(f"{feed} p50/p90/p99(ms):")
+        for name, values in stages.items():
+            print(f"{name:>20}: " + " / ".join(f"{values[q] * 1000:.2f}" for q in sorted(values)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("journal", type=Path)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=0.0)
+    parser.add_argument("--listen", nargs="+", default=["post", "notice"])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+本地模拟的club255服务端，实现Client用到的接口，用于离线测试和基准测试
+每次请求post/list时按post_rate生成新帖(或由调用者手动tick)，不依赖时钟，结果可以复现
+运行: python -m benchmarks.mock_server --port 8255 --post-rate 5 --latency 0.05
+"""
+
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+from fastapi import FastAPI, Request
+
+from . import samples
+
+
+class MockState:
+    def __init__(
+        self,
+        *,
+        post_rate: int = 5,
+        notice_rate: int = 2,
+        chat_rate: int = 0,
+        latency: float = 0.0,
+        seed: int = 0,
+        auto_tick: bool = True,
+    ):
+        self.post_rate = post_rate
+        self.auto_tick = auto_tick
+        self.notice_rate = notice_rate
+        self.chat_rate = chat_rate
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.next_pid = 1
+        self.posts: list[dict] = []
+        self.likes: list[dict] = []
+        self.replies: list[dict] = []
+        self.unread_likes = 0
+        self.unread_replies = 0
+        self.live_status = 2
+        self.keyframe = 0
+        # 对方uid -> 私信，未读数
+        self.chats: dict[int, list[dict]] = {}
+        self.unread_chats: Counter[int] = Counter()
+        self.next_mid = 1
+        # 每个接口的请求次数
+        self.requests: Counter[str] = Counter()
+        # pid -> 生成时间(perf_counter)
+        self.created: dict[int, float] = {}
+
+    def tick(self) -> None:
+        for _ in range(self.post_rate):
+            pid = self.next_pid
+            self.next_pid += 1
+            self.posts.insert(0, samples.post(pid, self.rng))
+            self.created[pid] = time.perf_counter()
+        del self.posts[200:]
+        for _ in range(self.notice_rate):
+            index = len(self.likes) + len(self.replies)
+            self.likes.insert(0, samples.like(index, self.rng))
+            self.replies.insert(0, samples.reply(index, self.rng))
+            self.unread_likes += 1
+            self.unread_replies += 1
+        del self.likes[200:]
+        del self.replies[200:]
+        for _ in range(self.chat_rate):
+            uid = self.rng.randint(1, 5)
+            self.chats.setdefault(uid, []).append(samples.chat_message(self.next_mid, uid, self.rng))
+            self.next_mid += 1
+            self.unread_chats[uid] += 1
+
+
+def create_app(state: MockState | None = None) -> FastAPI:
+    state = state or MockState()
+    app = FastAPI()
+    app.state.mock = state
+
+    @app.middleware("http")
+    async def _latency(request: Request, call_next):
+        path = request.url.path.strip("/")
+        state.requests[path.split("/detail/")[0] if "/detail/" in path else path] += 1
+        if state.latency:
+            await asyncio.sleep(state.latency)
+        return await call_next(request)
+
+    def _page(items: list, page: int, page_size: int) -> list:
+        start = max(page - 1, 0) * page_size
+        return items[start : start + page_size]
+
+    @app.get("/user/info")
+    async def user_info():
+        return {"code": 0, "info": {"uid": 114514}}
+
+    @app.post("/auth/login")
+    async def login():
+        return {"code": 0, "token": "mock", "uid": 114514, "msg": None}
+
+    @app.get("/auth/upload")
+    async def upload_key():
+        return {"code": 0, "id": 1, "sign": "mock", "ts": int(time.time())}
+
+    @app.post("/upload")
+    async def upload():
+        return {"err": 0, "id": str(state.rng.random()), "url": f"https://pic.example.com/{state.rng.random()}.png"}
+
+    @app.get("/post/list")
+    async def post_list(page: int = 1, pageSize: int = 20, order: int = 1, filter: int = 0):
+        if page == 1 and state.auto_tick:
+            state.tick()
+        posts = state.posts if filter == 0 else state.posts[::7]
+        return {"code": 0, "result": _page(posts, page, pageSize)}
+
+    @app.get("/post/user/list")
+    async def post_user_list(page: int = 1, pageSize: int = 20, self_uid: int = 0):
+        posts = [i for i in state.posts if i["author"]["uid"] == self_uid]
+        return {"code": 0, "list": _page(posts, page, pageSize)}
+
+    @app.get("/post/detail/{pid}")
+    async def post_detail(pid: int):
+        return {"code": 0, "info": samples.post_details(pid)}
+
+    @app.get("/notice/count")
+    async def notice_count():
+        count = {"at": 0, "chats": sum(state.unread_chats.values()), "likes": state.unread_likes, "message": 0}
+        count["notice"] = 0
+        return {"code": 0, "count": {**count, "replies": state.unread_replies}}
+
+    @app.get("/notice/like/list")
+    async def like_list(page: int = 1, pageSize: int = 20):
+        state.unread_likes = 0
+        return {"code": 0, "list": _page(state.likes, page, pageSize)}
+
+    @app.get("/notice/reply/list")
+    async def reply_list(page: int = 1, pageSize: int = 20):
+        state.unread_replies = 0
+        return {"code": 0, "list": _page(state.replies, page, pageSize)}
+
+    @app.get("/notice/system")
+    async def system_notice(page: int = 1, pageSize: int = 20):
+        return {"code": 0, "list": [samples.system_message(i) for i in range(pageSize)]}
+
+    @app.get("/notice/site")
+    async def site_notice(page: int = 0, pageSize: int = 20):
+        return {"code": 0, "list": [samples.follow_notice(i) for i in range(pageSize)]}
+
+    @app.get("/chat/list")
+    async def chat_list():
+        chats = [
+            {
+                "isTop": False,
+                "lastMessage": messages[-1]["content"],
+                "time": messages[-1]["time"],
+                "unread": state.unread_chats[uid],
+                "user": samples.user(uid - 1),
+            }
+            for uid, messages in state.chats.items()
+        ]
+        return {"code": 0, "list": chats}
+
+    @app.get("/chat/chat-newest")
+    async def chat_newest(self_uid: int = 0, id: int = 0):
+        state.unread_chats[self_uid] = 0
+        return {"code": 0, "list": [i for i in state.chats.get(self_uid, []) if i["id"] > id]}
+
+    @app.get("/forward/getRoomInfo")
+    async def room_info():
+        data = {"keyframe": f"https://i0.hdslb.com/keyframe{state.keyframe}.jpg", "live_status": state.live_status}
+        return {"code": 0, "data": {**data, "user_cover": "https://i0.hdslb.com/cover.jpg"}}
+
+    @app.get("/forward/get-video-info")
+    async def video_info(bv: str = ""):
+        return {"code": 0, "cover": f"https://i0.hdslb.com/{bv}.jpg", "title": f"视频{bv}"}
+
+    @app.post("/post/hansering")
+    async def send_post():
+        return {"post_id": state.next_pid, "code": 0, "exp": 0, "msg": "ok"}
+
+    @app.post("/reply/{pid}")
+    async def send_reply(pid: int):
+        return {"id": 1, "code": 0, "exp": 0, "msg": "ok"}
+
+    @app.post("/reply/floor/{fid}")
+    async def send_floor_reply(fid: int):
+        return {"id": None, "code": 0, "exp": 0, "msg": "ok"}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8255)
+    parser.add_argument("--post-rate", type=int, default=5, help="每次拉取帖子列表时新增的帖子数")
+    parser.add_argument("--notice-rate", type=int, default=2, help="每次拉取帖子列表时新增的点赞/回复数")
+    parser.add_argument("--chat-rate", type=int, default=0, help="每次拉取帖子列表时新增的私信数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟 单位:秒")
+    args = parser.parse_args()
+    state = MockState(
+        post_rate=args.post_rate, notice_rate=args.notice_rate, chat_rate=args.chat_rate, latency=args.latency
+    )
+    uvicorn.run(create_app(state), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+基准测试共用的模拟数据，字段和站点接口返回的一致
+"""
+
+import random
+from datetime import datetime, timedelta
+
+_START = datetime(2024, 1, 1)
+_TEXTS = ["今天也是元气满满的一天", "hanser天下第一", "有人一起去演唱会吗", "打卡", "新人报到，请多指教"]
+_FACES = ["[哈]", "[awsl]", "[吃瓜]", "[贴贴]", "[冲冲冲！]"]
+
+
+def user(uid: int) -> dict:
+    return {
+        "auth": 0,
+        "authentication": "",
+        "exp": uid * 7 % 5000,
+        "avatar": f"https://2550505.com/avatar/{uid % 500}.jpg",
+        "nickname": f"毛怪{uid % 500}",
+        "uid": uid % 500 + 1,
+    }
+
+
+def content(rng: random.Random, videos: int = 0, pictures: int = 0) -> str:
+    parts = [rng.choice(_TEXTS) + rng.choice(_FACES) for _ in range(rng.randint(1, 6))]
+    parts.extend("[视频]" for _ in range(videos))
+    parts.extend("[图片]" for _ in range(pictures))
+    rng.shuffle(parts)
+    if rng.random() < 0.3:
+        parts.append("#hanser ")
+    return "\n".join(parts)
+
+
+def post(pid: int, rng: random.Random | None = None) -> dict:
+    rng = rng or random.Random(pid)
+    pictures = rng.randint(0, 3)
+    videos = rng.randint(0, 1)
+    time = (_START + timedelta(minutes=pid)).isoformat()
+    return {
+        "id": pid,
+        "title": f"帖子{pid}",
+        "content": content(rng, videos, pictures),
+        "post_time": time,
+        "labels": [{"labelId": 1, "labelName": "日常", "color": "rgb(250,143,34)"}],
+        "auth": 0,
+        "authentication": "",
+        "author": user(rng.randint(1, 10_000)),
+        "hanserLike": False,
+        "hanserReply": False,
+        "last_reply_time": time,
+        "last_reply_user": 1,
+        "likes": rng.randint(0, 100),
+        "replies": rng.randint(0, 50),
+        "readings": rng.randint(0, 5000),
+        "type": rng.choice([0, 0, 0, 1, 2, 3]),
+        "role": 0,
+        "exp": 0,
+        "tags": [{"tagId": 1, "tagName": "hanser"}],
+        "videos": [f"BV1xx411c7m{i}" for i in range(videos)],
+        "liked": False,
+        "pictures": [f"https://pic.example.com/{pid}/{i}.jpg" for i in range(pictures)],
+        "primaryPictures": [],
+    }
+
+
+def floor(fid: int, rng: random.Random) -> dict:
+    return {"content": content(rng), "floor": fid % 100 + 1, "floorId": fid}
+
+
+def like(index: int, rng: random.Random | None = None) -> dict:
+    rng = rng or random.Random(index)
+    data = {
+        "postId": rng.randint(1, 100_000),
+        "time": (_START + timedelta(seconds=index)).isoformat(),
+        "type": rng.choice([1, 2]),
+        "user": user(rng.randint(1, 10_000)),
+    }
+    if data["type"] == 2:
+        data["floor"] = floor(index, rng)
+    else:
+        data["post"] = {"id": data["postId"], "title": f"帖子{data['postId']}"}
+    return data
+
+
+def reply(index: int, rng: random.Random | None = None) -> dict:
+    rng = rng or random.Random(index)
+    data = like(index, rng)
+    data["content"] = content(rng)
+    return data
+
+
+def post_details(pid: int, rng: random.Random | None = None) -> dict:
+    data = post(pid, rng)
+    data["content"] = "".join(f"<p>{i}</p>" for i in data["content"].split("\n"))
+    data["author"] = {**data["author"], "focusHe": False, "role": 0, "status": 0}
+    data.update({"valued": False, "top": False, "status": 0, "showLocation": 0, "favorite": False})
+    data.update({"isp": "", "location": ""})
+    return data
+
+
+def system_message(index: int) -> dict:
+    return {"content": f"系统消息{index}", "time": (_START + timedelta(seconds=index)).isoformat()}
+
+
+def follow_notice(index: int, rng: random.Random | None = None) -> dict:
+    rng = rng or random.Random(index)
+    time = (_START + timedelta(seconds=index)).isoformat()
+    return {"sort": index, "status": 0, "time": time, **user(rng.randint(1, 10_000))}
+
+
+def chat_message(mid: int, uid: int, rng: random.Random) -> dict:
+    time = (_START + timedelta(seconds=mid)).isoformat()
+    return {"id": mid, "content": rng.choice(_TEXTS) + rng.choice(_FACES), "time": time, "uid": uid}
@@ -1,7 +1,10 @@
 from . import event as event
+from . import hooks as hooks
 from . import types as types
 from . import utils as utils
+from . import router as router
 from . import message as message
+from . import profiler as profiler
 from . import exception as exception
 from .bot import Bot as Bot
 from .adapter import Adapter as Adapter
@@ -1,17 +1,27 @@
 import json
+import time
 from uuid import uuid1
 from typing import Any
 import asyncio
 from urllib.parse import urljoin
+from collections.abc import Callable
 
 from nonebot import Driver, logger, get_plugin_config
-from nonebot.drivers import Request, Response
+from nonebot.drivers import URL, Request, Response, ASGIMixin, HTTPServerSetup
 from nonebot.adapters import Adapter as BaseAdapter
 from nonebot.internal.driver import ForwardDriver
 
+from . import hooks, store, journal, message
 from .bot import Bot, UnLoginBot
+from .bean import _USER_POOL
+from .live import live_watcher
 from .config import Config
+from .router import router
 from .factory import EventFactory
+from .metrics import metrics, normalize_api
+from .prefetch import prefetcher
+from .profiler import stage, profiler
+from .diagnostics import size_of, diagnostics
 
 
 class Adapter(BaseAdapter):
@@ -33,12 +43,46 @@ class Adapter(BaseAdapter):
     async def _call_api(self, bot: Bot, api: str, **data: Any) -> Response:
         method = data.get("method") if data.get("method") else "GET"
         if method == "GET":
-            return await self.request(Request(method, urljoin(self.ROOT, api), params=data, headers=bot.header))
+            request = Request(method, urljoin(self.ROOT, api), params=data, headers=bot.header)
         elif method == "POST":
-            return await self.request(Request(method, urljoin(self.ROOT, api), json=data, headers=bot.header))
+            request = Request(method, urljoin(self.ROOT, api), json=data, headers=bot.header)
         else:
             raise ValueError(f"未知method:{method}")
 
+        name = normalize_api(api)
+        call = None
+        if hooks.enabled():
+            call = hooks.ApiCall(bot=bot, api=api, endpoint=name, method=method, data=data)
+            call.request_size = len(json.dumps(data, ensure_ascii=False).encode()) if method == "POST" else 0
+            await hooks.run_before_request(call)
+            request.headers.update(call.headers)
+
+        metrics.api_requests.inc(name, method)
+        start = time.perf_counter()
+        try:
+            with stage("network"):
+                resp = await self.request(request)
+        except Exception as e:
+            metrics.api_errors.inc(name, method)
+            if call is not None:
+                call.end = time.perf_counter()
+                call.error = e
+                await hooks.run_on_error(call)
+            raise
+        finally:
+            metrics.api_latency.observe(name, method, value=time.perf_counter() - start)
+        if resp.status_code >= 400:
+            metrics.api_errors.inc(name, method)
+        if call is not None:
+            call.end = time.perf_counter()
+            call.status_code = resp.status_code
+            call.response_size = len(resp.content or b"")
+            await hooks.run_after_response(call)
+        return resp
+
+    async def _metrics_handler(self, request: Request) -> Response:
+        return Response(200, headers={"Content-Type": "text/plain; version=0.0.4"}, content=metrics.render())
+
     async def _check_token(self, token: str) -> tuple[bool, dict | None]:
         resp = await self.request(Request("GET", urljoin(self.ROOT, "user/info"), cookies={"token": token}))
         if resp.status_code != 200:
@@ -92,11 +136,19 @@ class Adapter(BaseAdapter):
             return " | ".join(reason)
 
     async def _keep_get_event(self, bot: Bot):
+        # 只有第一次获取受club255_run_now影响
+        allow_first = self.club255_config.club255_run_now
         try:
-            await EventFactory.main(bot, self.club255_config.club255_run_now)
-        except Exception as e:
-            logger.error(f"{self.get_name()}:{bot.self_id} -> 处理事件失败:{e}")
-            logger.exception(e)
+            while True:
+                try:
+                    await EventFactory.main(bot, allow_first)
+                except Exception as e:
+                    logger.error(f"{self.get_name()}:{bot.self_id} -> 处理事件失败:{e}")
+                    logger.exception(e)
+                allow_first = True
+                await self.sleep()
+        finally:
+            self.bot_disconnect(bot)
 
     def _create_unlogin_bot(self) -> UnLoginBot:
         bot = UnLoginBot(
@@ -155,13 +207,49 @@ class Adapter(BaseAdapter):
 
         if bot:
             self.bot_connect(bot)
-            try:
-                self.tasks.append(asyncio.create_task(self._keep_get_event(bot)))
-            finally:
-                if bot:
-                    self.bot_disconnect(bot)
+            if "on_live" in EventFactory.listen and live_watcher.interval > 0:
+                live_task = live_watcher.run(bot, self.club255_config.club255_run_now)
+                self.tasks.append(asyncio.create_task(live_task))
+            self.tasks.append(asyncio.create_task(self._keep_get_event(bot)))
+
+        if self.club255_config.club255_diagnostics:
+            self._setup_diagnostics()
+            self.tasks.append(asyncio.create_task(diagnostics.run(self.club255_config.club255_diagnostics_interval)))
+
+    def _client_size(self, attr: str, getter: Callable[[Any], int] = len) -> int:
+        return sum(
+            getter(client) for bot in self.bots.values() if (client := getattr(bot.client, attr, None)) is not None
+        )
+
+    def _send_queue_size(self) -> int:
+        return sum(len(bot.send_queue) for bot in self.bots.values() if getattr(bot, "send_queue", None) is not None)
+
+    def _setup_diagnostics(self) -> None:
+        diagnostics.top = self.club255_config.club255_diagnostics_top
+        diagnostics.register("EventFactory.data", lambda: size_of(EventFactory.data))
+        diagnostics.register("Adapter.tasks", lambda: len(self.tasks))
+        diagnostics.register("video_cache", lambda: self._client_size("video_cache"))
+        diagnostics.register("video_pending", lambda: self._client_size("_video_pending"))
+        diagnostics.register("upload_cache", lambda: self._client_size("upload_cache", lambda i: len(i.memory)))
+        diagnostics.register("router", lambda: len(router))
+        diagnostics.register("shared_users", lambda: len(_USER_POOL))
+        diagnostics.register("prefetch.cache", lambda: len(prefetcher.cache))
+        diagnostics.register("prefetch.in_flight", lambda: prefetcher.in_flight)
+        diagnostics.register("send_queue", self._send_queue_size)
+        diagnostics.register("chat_cursors", lambda: len(EventFactory.data.get("chat", {})))
+        if store.post_store is not None:
+            diagnostics.register("post_store", lambda: len(store.post_store or ()))
 
     async def _stop_forward(self) -> None:
+        for bot in self.bots.values():
+            if isinstance(bot, Bot):
+                if bot.send_queue is not None:
+                    await bot.send_queue.close()
+                bot.client.upload_cache.close()
+        if journal.recorder is not None:
+            journal.recorder.close()
+        if store.post_store is not None:
+            store.post_store.close()
         for task in self.tasks:
             if not task.done():
                 task.cancel()
@@ -175,5 +263,37 @@ class Adapter(BaseAdapter):
         else:
             logger.error(f"{self.get_name()} 需要ForwardDriver!")
 
+        message.base_url = self.ROOT
+
+        if path := self.club255_config.club255_store_path:
+            store.post_store = store.PostStore(
+                path,
+                max_posts=self.club255_config.club255_store_max_posts,
+                retention=self.club255_config.club255_store_retention,
+            )
+
+        if path := self.club255_config.club255_record_path:
+            journal.recorder = journal.Recorder(path)
+
+        live_watcher.setup(self.club255_config.club255_live_interval, self.club255_config.club255_live_debounce)
+
+        prefetcher.setup(
+            self.club255_config.club255_prefetch_details,
+            self.club255_config.club255_prefetch_cache_size,
+            self.club255_config.club255_prefetch_concurrency,
+        )
+
+        profiler.setup(
+            self.club255_config.club255_profile,
+            self.club255_config.club255_profile_window,
+            self.club255_config.club255_profile_log_interval,
+        )
+
+        if path := self.club255_config.club255_metrics_path:
+            if isinstance(self.driver, ASGIMixin):
+                self.setup_http_server(HTTPServerSetup(URL(path), "GET", "club255_metrics", self._metrics_handler))
+            else:
+                logger.warning(f"{self.get_name()} 导出metrics需要ASGI驱动器")
+
 
 __all__ = ["Adapter"]
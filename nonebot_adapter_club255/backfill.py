@@ -0,0 +1,269 @@
+import json
+import time
+from typing import Any, Protocol
+import asyncio
+from pathlib import Path
+import sqlite3
+
+import httpx
+from nonebot import logger
+from pydantic import BaseModel
+from nonebot.utils import run_sync
+from nonebot.exception import NetworkError
+
+from .bot import Bot, BaseBot
+from .types import UID
+
+
+class Sink(Protocol):
+    def write(self, posts: list[dict]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class JsonlSink:
+    """
+    每个帖子一行，中断后续跑时同一页可能会重复写入，按postId去重即可
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open("a", encoding="utf-8")
+
+    def write(self, posts: list[dict]) -> None:
+        self._file.writelines(json.dumps(i, ensure_ascii=False) + "\n" for i in posts)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SqliteSink:
+    """
+    posts(postId, post, details)，重复的postId会覆盖
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Backfill在线程里写入
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS posts (postId INTEGER PRIMARY KEY, post TEXT NOT NULL, details TEXT)"
+        )
+        self.db.commit()
+
+    def write(self, posts: list[dict]) -> None:
+        self.db.executemany(
+            "INSERT OR REPLACE INTO posts VALUES (?, ?, ?)",
+            [
+                (
+                    i["post"]["postId"],
+                    json.dumps(i["post"], ensure_ascii=False),
+                    json.dumps(i["details"], ensure_ascii=False) if i.get("details") is not None else None,
+                )
+                for i in posts
+            ],
+        )
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class RateLimiter:
+    """
+    限制每秒的请求数，所有worker共用
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+
+
+class Checkpoint:
+    """
+    记录已完成的页: next_page之前的页都完成了，done是next_page之后已完成的页
+    worker数量有限，done最多只有worker个
+    failed是重试后仍然没拿到详情的帖子，它们写入时details为None
+    """
+
+    def __init__(self, path: Path | None, start: int = 1):
+        self.path = path
+        self.next_page = start
+        self.done: set[int] = set()
+        self.failed: set[int] = set()
+        self.finished = False
+        if path is not None and path.exists():
+            data = json.loads(path.read_text())
+            self.next_page = data["next_page"]
+            self.done = set(data["done"])
+            self.failed = set(data.get("failed", ()))
+            self.finished = data.get("finished", False)
+
+    def complete(self, page: int) -> None:
+        self.done.add(page)
+        while self.next_page in self.done:
+            self.done.remove(self.next_page)
+            self.next_page += 1
+        self.save()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "next_page": self.next_page,
+                    "done": sorted(self.done),
+                    "failed": sorted(self.failed),
+                    "finished": self.finished,
+                }
+            )
+        )
+        tmp.replace(self.path)
+
+
+# 只重试网络错误，其他错误(参数错误、Bot不支持的接口等)重试也不会成功
+_RETRY_ERRORS = (OSError, asyncio.TimeoutError, httpx.TransportError, NetworkError)
+
+
+class Backfill:
+    def __init__(
+        self,
+        bot: BaseBot,
+        sink: Sink,
+        *,
+        checkpoint: Path | None = None,
+        uid: UID | None = None,
+        page_size: int = 20,
+        workers: int = 4,
+        rate: float = 2.0,
+        details: bool = False,
+        max_pages: int | None = None,
+        retries: int = 3,
+    ):
+        """
+        按页抓取历史帖子，写入sink
+        :param bot: 未登录时只能抓简略的帖子，也不能获取详情
+        :param sink: JsonlSink/SqliteSink
+        :param checkpoint: 进度文件，中断后再次运行会从这里继续
+        :param uid: 只抓该用户的帖子(post/user/list)，需要登录的Bot，None为全站(post/list)
+        :param workers: 同时处理的页数
+        :param rate: 每秒最多请求数，包括获取详情，0为不限制
+        :param details: 是否为每个帖子获取详情，失败的postId记录在进度文件的failed里
+        :param max_pages: 最多抓取的页数
+        :param retries: 单个请求网络错误时的重试次数
+        :raise ValueError: 未登录的Bot指定了uid
+        """
+        if uid is not None and not isinstance(bot, Bot):
+            raise ValueError("未登录的Bot无法按用户抓取帖子(post/user/list)")
+        self.bot = bot
+        self.sink = sink
+        self.checkpoint = Checkpoint(checkpoint)
+        self.uid = uid
+        self.page_size = page_size
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.details = details and isinstance(bot, Bot)
+        self.retries = retries
+        self.count = 0
+        self._page = self.checkpoint.next_page
+        self._stop_page = None if max_pages is None else self._page + max_pages
+        # 第一个不满一页的页码，之后的页不需要再请求
+        self._last_page: int | None = None
+        # sink不是线程安全的，同时只有一个写入
+        self._write_lock = asyncio.Lock()
+
+    async def _call(self, func, *args: Any, **kwargs: Any) -> Any:
+        for i in range(self.retries + 1):
+            await self.limiter.wait()
+            try:
+                return await func(*args, **kwargs)
+            except _RETRY_ERRORS as e:
+                if i == self.retries:
+                    raise
+                logger.warning(f"Club255 backfill 请求失败，{2**i}秒后重试: {e!r}")
+                await asyncio.sleep(2**i)
+
+    async def _fetch_page(self, page: int) -> list[BaseModel]:
+        # 直接用client，Bot上的方法会按club255_receive_me过滤，页的长度就不准了
+        client = self.bot.client
+        if self.uid is not None:
+            return await self._call(client.get_post_by_user, self.uid, page=page, page_size=self.page_size)
+        if isinstance(self.bot, Bot):
+            return await self._call(client.get_post_list, page=page, page_size=self.page_size)
+        return await self._call(client.get_post_list_brief, page=page, page_size=self.page_size)
+
+    async def _fetch_details(self, post: BaseModel) -> dict | None:
+        try:
+            details = await self._call(self.bot.get_post_details, post.postId)
+        except Exception as e:
+            logger.warning(f"Club255 backfill 获取帖子<{post.postId}>详情失败: {e!r}")
+            self.checkpoint.failed.add(post.postId)
+            return None
+        self.checkpoint.failed.discard(post.postId)
+        return details.model_dump(mode="json")
+
+    def _next_page(self) -> int | None:
+        while self._page in self.checkpoint.done:
+            self._page += 1
+        page = self._page
+        if self._last_page is not None and page > self._last_page:
+            return None
+        if self._stop_page is not None and page >= self._stop_page:
+            return None
+        self._page += 1
+        return page
+
+    async def _worker(self) -> None:
+        while (page := self._next_page()) is not None:
+            posts = await self._fetch_page(page)
+            if len(posts) < self.page_size:
+                self._last_page = page if self._last_page is None else min(self._last_page, page)
+            details = (
+                await asyncio.gather(*[self._fetch_details(i) for i in posts]) if self.details else [None] * len(posts)
+            )
+            async with self._write_lock:
+                await run_sync(self.sink.write)(
+                    [{"post": post.model_dump(mode="json"), "details": d} for post, d in zip(posts, details)]
+                )
+            self.count += len(posts)
+            self.checkpoint.complete(page)
+            logger.debug(f"Club255 backfill 第{page}页完成，共{self.count}个帖子")
+
+    async def run(self) -> int:
+        """
+        :return: 本次写入的帖子数
+        """
+        if self.checkpoint.finished:
+            logger.info("Club255 backfill 已经完成，删除进度文件可以重新开始")
+            return 0
+        start = self.checkpoint.next_page
+        tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        if self._last_page is not None:
+            self.checkpoint.finished = True
+            self.checkpoint.save()
+        logger.info(f"Club255 backfill 第{start}~{self.checkpoint.next_page - 1}页完成，共{self.count}个帖子")
+        if self.checkpoint.failed:
+            logger.warning(f"Club255 backfill {len(self.checkpoint.failed)}个帖子没有拿到详情，见进度文件的failed")
+        return self.count
+
+
+__all__ = ["Backfill", "JsonlSink", "SqliteSink", "Checkpoint", "RateLimiter"]
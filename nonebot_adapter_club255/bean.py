@@ -1,8 +1,11 @@
-from typing import Optional
+import sys
+from typing import Any, Optional
+from weakref import WeakValueDictionary
 from datetime import date, datetime
 
-from pydantic import Field, BaseModel, model_validator
+from pydantic import Field, BaseModel, ConfigDict, model_validator
 
+from .compact import CompactLike, CompactReply, compact_like, compact_reply
 from .message import Message
 
 
@@ -167,6 +170,13 @@ class RawUserWithContribution(RawUser):
 
 
 class BaseUser(RawUser):
+    """
+    点赞/回复列表中每一项都带有用户信息，相同的用户信息会共用同一个实例
+    共用的实例是frozen的，修改属性会报错，需要时用model_copy(update=...)
+    """
+
+    model_config = ConfigDict(frozen=True)
+
     auth: int
     authentication: str
     exp: int
@@ -174,8 +184,38 @@ class BaseUser(RawUser):
     nickname: str
     uid: int
 
+    def shared(self) -> "BaseUser":
+        """
+        返回相同用户信息共用的BaseUser实例，User/PostUser等子类会转换为BaseUser
+        """
+        if type(self) is BaseUser:
+            return self
+        return BaseUser.model_validate(self.model_dump(include=set(BaseUser.model_fields)))
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _intern(cls, data: Any, handler):
+        if cls is not BaseUser or not isinstance(data, dict):
+            return handler(data)
+        # 不修改调用方传入的dict
+        data = {**data}
+        for i in ("avatar", "nickname", "authentication"):
+            if isinstance(data.get(i), str):
+                data[i] = sys.intern(data[i])
+        key = tuple(data.get(i) for i in ("uid", "nickname", "avatar", "exp", "auth", "authentication"))
+        if (user := _USER_POOL.get(key)) is None:
+            user = _USER_POOL[key] = handler(data)
+        return user
+
+
+# 只保存弱引用，没有bean/event/compact记录引用的用户会自动移除
+_USER_POOL: "WeakValueDictionary[tuple, BaseUser]" = WeakValueDictionary()
+
 
 class User(BaseUser):
+    # 不会共用实例，保持可修改
+    model_config = ConfigDict(frozen=False)
+
     auth: int
     authentication: str
     exp: int
@@ -204,6 +244,24 @@ class ChatList(BaseModel):
     user: BaseUser
 
 
+class ChatMessage(BaseModel):
+    """
+    api:chat/chat-newest
+    返回的格式没有完整验证过，只声明用得到的字段，其他字段保留在model_extra中
+    属性:
+        id: 消息id，私信的游标
+        content: 内容
+        uid: 发送者，没有返回时为None
+    """
+
+    model_config = ConfigDict(extra="allow")
+
+    id: int
+    content: str
+    time: datetime | None = None
+    uid: int | None = None
+
+
 class BaseFloor(BaseModel):
     content: str
     message: Message
@@ -239,22 +297,32 @@ class BasePost(RawPost):
     post_time: datetime
 
 
+def _to_sub_model(model: BaseModel, type_: type[BaseModel]):
+    # 保留额外字段(post/floor等)，已经校验过的字段不会重复校验
+    return type_.model_validate({**model.__dict__, **(model.model_extra or {})})
+
+
 class BaseLike(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     postId: int
     time: datetime
     # 1:帖子点赞 or 2楼层点赞
     type: int
     user: BaseUser
 
+    def to_compact(self) -> CompactLike:
+        return compact_like(self)
+
     def to_floor_like(self) -> Optional["FloorLike"]:
         if self.type != 2:
             return None
-        return FloorLike.model_validate(self)
+        return _to_sub_model(self, FloorLike)
 
     def to_post_like(self) -> Optional["PostLike"]:
         if self.type != 1:
             return None
-        return PostLike.model_validate(self)
+        return _to_sub_model(self, PostLike)
 
 
 class FloorLike(BaseLike):
@@ -276,19 +344,21 @@ class PostLike(BaseLike):
 
 
 class BaseNotice(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     sort: int
     status: int
     time: datetime
 
     def to_system_notice(self) -> Optional["SystemNotice"]:
-        if self.get("type") is None:
+        if (self.model_extra or {}).get("type") is None:
             return None
-        return SystemNotice.model_validate(self)
+        return _to_sub_model(self, SystemNotice)
 
     def to_follow_notice(self) -> Optional["FollowNotice"]:
-        if self.get("self_uid") is None:
+        if (self.model_extra or {}).get("uid") is None:
             return None
-        return FollowNotice.model_validate(self)
+        return _to_sub_model(self, FollowNotice)
 
 
 class SystemNotice(BaseNotice):
@@ -311,6 +381,8 @@ class FollowNotice(BaseNotice):
 
 
 class BaseReply(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     content: str
     message: Message
     postId: int
@@ -326,15 +398,18 @@ class BaseReply(BaseModel):
         values["message"] = values["content"]
         return values
 
+    def to_compact(self) -> CompactReply:
+        return compact_reply(self)
+
     def to_post_reply(self) -> Optional["PostReply"]:
         if self.type != 1:
             return None
-        return PostReply.model_validate(self)
+        return _to_sub_model(self, PostReply)
 
     def to_floor_reply(self) -> Optional["FloorReply"]:
         if self.type != 2:
             return None
-        return FloorReply.model_validate(self)
+        return _to_sub_model(self, FloorReply)
 
 
 class PostReply(BaseReply):
@@ -387,6 +462,9 @@ class PostInfo(BasePost):
 
 
 class PostUser(BaseUser):
+    # 不会共用实例，保持可修改
+    model_config = ConfigDict(frozen=False)
+
     auth: int
     authentication: str
     avatar: str
@@ -427,6 +505,12 @@ class PostDetails(PostInfo):
     isp: str
     location: str
 
+    def get_message(self) -> Message:
+        """
+        把html格式的content解析为Message
+        """
+        return Message.from_html(self.content)
+
 
 class UserPostInfo(RawPost):
     """
@@ -490,6 +574,7 @@ __all__ = [
     "User",
     "PostUser",
     "ChatList",
+    "ChatMessage",
     "BaseFloor",
     "RawPost",
     "PostInfo",
@@ -1,14 +1,18 @@
 import json
-from typing import Any, Union
-from collections.abc import Callable
+import time
+from typing import Any, Union, NoReturn
+import asyncio
+from collections.abc import Callable, Awaitable
 
 from nonebot import logger
 from pydantic import TypeAdapter
+from nonebot.utils import run_sync
 from nonebot.message import handle_event
 from nonebot.adapters import Bot as RawBot
 from nonebot.internal.driver import Response
 from nonebot.internal.adapter import Adapter
 
+from . import hooks, store, journal
 from .bean import (
     BaseLike,
     BasePost,
@@ -17,15 +21,19 @@ from .bean import (
     BaseReply,
     LoginInfo,
     PostResult,
+    PostDetails,
     ReplyResult,
     UploadResult,
     UserPostInfo,
 )
-from .event import Event, PostEvent, ReplyEvent, FloorReplyEvent
+from .event import Event, PostEvent, ReplyEvent, FloorReplyEvent, ChatMessageEvent
 from .types import FID, PID, UID, T
 from .client import Client, LoginClient
 from .config import Config
+from .sender import PRIORITY, SendQueue, log_failure
 from .message import Message, ImageMsg, MessageSegment
+from .metrics import metrics, normalize_api
+from .profiler import stage
 from .exception import ActionFailed, SendNotImplemented
 
 
@@ -36,7 +44,14 @@ class BaseBot(RawBot):
         return getattr(self.client, name)
 
     async def handle_event(self, event: Event):
-        await handle_event(self, event)
+        name = event.__class__.__name__
+        metrics.events.inc(name)
+        start = time.perf_counter()
+        try:
+            with stage("dispatch"):
+                await handle_event(self, event)
+        finally:
+            metrics.handle_time.observe(name, value=time.perf_counter() - start)
 
     def get_self_id(self) -> int:
         return int(self.self_id)
@@ -49,25 +64,46 @@ class BaseBot(RawBot):
     ) -> Any:
         if isinstance(self, UnLoginBot):
             raise SendNotImplemented("未登录的Bot无法发送消息")
+        # 只转发发送队列的参数priority/wait
+        options = {k: kwargs[k] for k in ("priority", "wait") if k in kwargs}
         if isinstance(event, PostEvent):
-            return await self.send_post_reply(message=message, pid=event.post.postId, author=event.post.id)
+            return await self.send_post_reply(message=message, pid=event.post.postId, author=event.post.id, **options)
         elif isinstance(event, ReplyEvent):
             if isinstance(event, FloorReplyEvent):
-                return await self.send_floor_reply(message=message, pid=event.postId, fid=event.floor.floorId)
+                return await self.send_floor_reply(message=message, pid=event.postId, fid=event.floor.floorId, **options)
             else:
-                return await self.send_post_reply(message=message, pid=event.postId, author=event.user.uid)
+                return await self.send_post_reply(message=message, pid=event.postId, author=event.user.uid, **options)
+        elif isinstance(event, ChatMessageEvent):
+            return await self.send_chat_message(message=message, uid=event.user.uid)
         else:
             raise SendNotImplemented(f"{event.__class__}({event.get_event_name()}) -> 未实现该Event的send")
 
     async def call_api(self, api: str, **data: Any) -> Any:
-        if data.get("raw") and data.get("raw") is True:
-            return await super().call_api(api, **data)
         resp: Response = await super().call_api(api, **data)
-        data: bytes = resp.content
+        if journal.recorder is not None:
+            journal.recorder.write(self.self_id, api, data, resp)
+        if data.get("raw") and data.get("raw") is True:
+            return resp
+        content: bytes = resp.content
         try:
-            return json.loads(data)
+            with stage("json"):
+                return json.loads(content)
         except Exception as e:
             logger.error(f"调用api<{api}>失败,code:{resp.status_code}")
+            if hooks.enabled():
+                call = hooks.ApiCall(
+                    bot=self,
+                    api=api,
+                    endpoint=normalize_api(api),
+                    method=data.get("method") or "GET",
+                    data=data,
+                    stage="decode",
+                    response_size=len(content or b""),
+                    status_code=resp.status_code,
+                    error=e,
+                )
+                call.end = call.start
+                await hooks.run_on_error(call)
             raise e
 
     async def call_api_get(self, api: str, **data: Any) -> Any:
@@ -87,9 +123,10 @@ class BaseBot(RawBot):
         res = await self.call_api_post(api, **data)
         if strict and res.get("code", 0) != 0:
             raise ActionFailed(f"API调用失败: {res.get('msg', '未知错误')}")
-        return TypeAdapter(type_).validate_python(
-            (res[data_from] if isinstance(data_from, str) else data_from(res)) if data_from else res
-        )
+        with stage("validate"):
+            return TypeAdapter(type_).validate_python(
+                (res[data_from] if isinstance(data_from, str) else data_from(res)) if data_from else res
+            )
 
     async def api_get_to_type(
         self,
@@ -102,9 +139,10 @@ class BaseBot(RawBot):
         res = await self.call_api_get(api, **data)
         if strict and res.get("code", 0) != 0:
             raise ActionFailed(f"API调用失败: {res.get('msg', '未知错误')}")
-        return TypeAdapter(type_).validate_python(
-            (res[data_from] if isinstance(data_from, str) else data_from(res)) if data_from else res,
-        )
+        with stage("validate"):
+            return TypeAdapter(type_).validate_python(
+                (res[data_from] if isinstance(data_from, str) else data_from(res)) if data_from else res,
+            )
 
     def __init__(self, *, adapter: "Adapter", self_id: str, header: dict, config: Config):
         super().__init__(adapter, self_id)
@@ -115,6 +153,7 @@ class BaseBot(RawBot):
             self.api_post_to_type,
             self.call_api,
             self.adapter.request,
+            config,
         )
 
     @property
@@ -206,6 +245,12 @@ class Bot(BaseBot):
             self.api_post_to_type,
             self.call_api,
             self.adapter.request,
+            config,
+        )
+        self.send_queue = (
+            SendQueue(self, config.club255_send_interval, config.club255_media_concurrency)
+            if config.club255_send_queue
+            else None
         )
 
     async def get_self_data(self) -> UserData:
@@ -221,32 +266,96 @@ class Bot(BaseBot):
     async def dispose_msg(self, *, message: str | Message | MessageSegment) -> Message:
         return await self.client.dispose_msg(url=self.config.club255_upload_api, self_uid=self.self_id, message=message)
 
-    async def send_post(self, title: str, message: str | Message | MessageSegment) -> PostResult:
-        return await self.client.send_post(
-            title=title,
-            url=self.config.club255_upload_api,
-            self_uid=self.self_id,
-            message=message,
+    async def _send(
+        self,
+        message: str | Message | MessageSegment,
+        send: Callable[[Message], Awaitable[T]],
+        priority: int,
+        wait: bool,
+    ) -> T | asyncio.Future[T]:
+        """
+        开启club255_send_queue时进入发送队列
+        :param wait: False时不等待发送，直接返回结果的future
+        """
+        if self.send_queue is not None:
+            future = self.send_queue.submit(message, send, priority, wait)
+        elif wait:
+            return await send(message)
+        else:
+            future = asyncio.ensure_future(send(message))
+            future.add_done_callback(lambda f: log_failure(self.self_id, f))
+        return await future if wait else future
+
+    async def send_post(
+        self,
+        title: str,
+        message: str | Message | MessageSegment,
+        *,
+        priority: int = PRIORITY,
+        wait: bool = True,
+    ) -> PostResult | asyncio.Future[PostResult]:
+        return await self._send(
+            message,
+            lambda m: self.client.send_post(
+                title=title,
+                url=self.config.club255_upload_api,
+                self_uid=self.self_id,
+                message=m,
+            ),
+            priority,
+            wait,
         )
 
-    async def send_post_reply(self, *, author: UID, message: str | Message | MessageSegment, pid: PID) -> ReplyResult:
-        return await self.client.send_post_reply(
-            upload_url=self.config.club255_upload_api,
-            self_uid=self.self_id,
-            pid=pid,
-            message=message,
-            author=author,
+    async def send_post_reply(
+        self,
+        *,
+        author: UID,
+        message: str | Message | MessageSegment,
+        pid: PID,
+        priority: int = PRIORITY,
+        wait: bool = True,
+    ) -> ReplyResult | asyncio.Future[ReplyResult]:
+        return await self._send(
+            message,
+            lambda m: self.client.send_post_reply(
+                upload_url=self.config.club255_upload_api,
+                self_uid=self.self_id,
+                pid=pid,
+                message=m,
+                author=author,
+            ),
+            priority,
+            wait,
         )
 
-    async def send_floor_reply(self, *, message: str | Message | MessageSegment, pid: PID, fid: FID) -> ReplyResult:
-        return await self.client.send_floor_reply(
-            upload_url=self.config.club255_upload_api,
-            self_uid=self.self_id,
-            pid=pid,
-            fid=fid,
-            message=message,
+    async def send_floor_reply(
+        self,
+        *,
+        message: str | Message | MessageSegment,
+        pid: PID,
+        fid: FID,
+        priority: int = PRIORITY,
+        wait: bool = True,
+    ) -> ReplyResult | asyncio.Future[ReplyResult]:
+        return await self._send(
+            message,
+            lambda m: self.client.send_floor_reply(
+                upload_url=self.config.club255_upload_api,
+                self_uid=self.self_id,
+                pid=pid,
+                fid=fid,
+                message=m,
+            ),
+            priority,
+            wait,
         )
 
+    async def send_chat_message(self, *, uid: UID, message: str | Message | MessageSegment) -> NoReturn:
+        """
+        私信的发送接口还没有确认，暂不支持
+        """
+        raise SendNotImplemented("私信的发送接口还没有确认，暂不支持发送私信")
+
     async def get_post_list(self, *, page: int = 1, _order: int = 1, _filter: int = 0, page_size=0) -> list[PostInfo]:
         datas = await self.client.get_post_list(
             page=page,
@@ -282,9 +391,18 @@ class Bot(BaseBot):
         :param uid: 用户id
         :return: List[PostInfo]
         """
-        return await self.client.get_post_by_user(
+        posts = await self.client.get_post_by_user(
             uid=uid, page=page, page_size=page_size or self.config.club255_page_size
         )
+        if store.post_store is not None:
+            await run_sync(store.post_store.add_posts)(posts, uid=int(uid))
+        return posts
+
+    async def get_post_details(self, pid: PID) -> PostDetails:
+        details = await self.client.get_post_details(pid)
+        if store.post_store is not None:
+            await run_sync(store.post_store.add_details)(details)
+        return details
 
     async def get_reply_list(self, *, page: int = 1, pageSize: int = 0) -> list[BaseReply]:
         return await self.client.get_reply_list(page=page, pageSize=pageSize or self.config.club255_page_size)
@@ -1,5 +1,6 @@
-from typing import Any
-from collections.abc import Callable
+from typing import Any, Literal, NoReturn, overload
+import asyncio
+from collections.abc import Callable, Iterable, AsyncIterator
 
 from pydantic import HttpUrl
 from nonebot.adapters import Bot as RawBot
@@ -25,6 +26,7 @@ from .bean import (
     VideoInfo,
     BaseNotice,
     PostResult,
+    ChatMessage,
     NoticeCount,
     PostDetails,
     ReplyResult,
@@ -38,7 +40,9 @@ from .bean import (
 from .event import Event
 from .types import FID, MID, PID, UID, T
 from .config import Config
+from .sender import SendQueue
 from .message import Message, ImageMsg, MessageSegment
+from .pagination import Stop
 
 class BaseBot(RawBot):
     async def handle_event(self, event: Event): ...
@@ -59,7 +63,26 @@ class BaseBot(RawBot):
 
     async def get_week_rank(self, page: int = 1, pageSize: int = 10) -> list[RawUserWithContribution]: ...
     async def get_month_rank(self, page: int = 1, pageSize: int = 10) -> list[RawUserWithContribution]: ...
-    async def get_video_info(self, bv: str) -> VideoInfo: ...
+    def iter_week_rank(
+        self, *, pageSize: int = 10, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[RawUserWithContribution]: ...
+    def iter_month_rank(
+        self, *, pageSize: int = 10, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[RawUserWithContribution]: ...
+    async def get_video_info(self, bv: str) -> VideoInfo:
+        """
+        获取b站视频的标题和封面，结果会缓存，同一个bv同时只会请求一次
+        :raise ActionFailed: 无效的bv
+        """
+        ...
+
+    async def resolve_videos(self, bvs: Iterable[str]) -> dict[str, VideoInfo | None]:
+        """
+        批量获取视频信息，可以提前调用来预热缓存
+        :return: {bv: VideoInfo}，无效的bv为None
+        """
+        ...
+
     async def get_live_info(self) -> LiveInfo:
         """
         获取hanser直播间信息
@@ -70,6 +93,23 @@ class BaseBot(RawBot):
     async def get_post_list_brief(
         self, *, page: int = 1, _order: int = 1, _filter: int = 0, page_size=0
     ) -> list[BasePost]: ...
+    def iter_post_list_brief(
+        self,
+        *,
+        _order: int = 1,
+        _filter: int = 0,
+        page_size=20,
+        start: int = 1,
+        until: Stop | None = None,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[BasePost]:
+        """
+        逐个遍历帖子，跨页时会提前请求下一页
+        :param until: 停止条件，例如until_post_id(pid)/until_time(time)
+        :param max_pages: 最多请求的页数
+        """
+        ...
+
     async def get_post_list_brief_by_time(self, *, page: int = 1, page_size=0) -> list[BasePost]: ...
     async def get_post_list_brief_by_reply(self, *, page: int = 1, page_size=0) -> list[BasePost]: ...
     async def get_nice_post_list_brief_by_time(self, *, page: int = 1, page_size=0) -> list[BasePost]: ...
@@ -120,22 +160,121 @@ class Bot(BaseBot):
     async def get_self_data(self) -> UserData: ...
     async def upload_image(self, *, img_msg: ImageMsg) -> UploadResult: ...
     async def dispose_msg(self, *, message: str | Message | MessageSegment) -> Message: ...
-    async def send_post(self, title: str, message: str | Message | MessageSegment) -> PostResult: ...
+    send_queue: SendQueue | None
+    @overload
+    async def send_post(
+        self,
+        title: str,
+        message: str | Message | MessageSegment,
+        *,
+        priority: int = ...,
+        wait: Literal[True] = True,
+    ) -> PostResult:
+        """
+        wait=False时不等待发送，直接返回发送结果的future，下同
+        开启club255_send_queue时进入发送队列
+        :param priority: 数字越小越先发送，默认为sender.PRIORITY
+        """
+        ...
+
+    @overload
+    async def send_post(
+        self,
+        title: str,
+        message: str | Message | MessageSegment,
+        *,
+        priority: int = ...,
+        wait: Literal[False],
+    ) -> asyncio.Future[PostResult]: ...
+    @overload
+    async def send_post_reply(
+        self,
+        *,
+        author: UID,
+        message: str | Message | MessageSegment,
+        pid: PID,
+        priority: int = ...,
+        wait: Literal[True] = True,
+    ) -> ReplyResult: ...
+    @overload
     async def send_post_reply(
-        self, *, author: UID, message: str | Message | MessageSegment, pid: PID
+        self,
+        *,
+        author: UID,
+        message: str | Message | MessageSegment,
+        pid: PID,
+        priority: int = ...,
+        wait: Literal[False],
+    ) -> asyncio.Future[ReplyResult]: ...
+    @overload
+    async def send_floor_reply(
+        self,
+        *,
+        message: str | Message | MessageSegment,
+        pid: PID,
+        fid: FID,
+        priority: int = ...,
+        wait: Literal[True] = True,
     ) -> ReplyResult: ...
-    async def send_floor_reply(self, *, message: str | Message | MessageSegment, pid: PID, fid: FID) -> ReplyResult: ...
+    @overload
+    async def send_floor_reply(
+        self,
+        *,
+        message: str | Message | MessageSegment,
+        pid: PID,
+        fid: FID,
+        priority: int = ...,
+        wait: Literal[False],
+    ) -> asyncio.Future[ReplyResult]: ...
+    async def send_chat_message(self, *, uid: UID, message: str | Message | MessageSegment) -> NoReturn:
+        """
+        私信的发送接口还没有确认，暂不支持，会抛出SendNotImplemented
+        """
+        ...
+
     async def get_post_list(
         self, *, page: int = 1, _order: int = 1, _filter: int = 0, page_size=0
     ) -> list[PostInfo]: ...
+    def iter_post_list(
+        self,
+        *,
+        _order: int = 1,
+        _filter: int = 0,
+        page_size=20,
+        start: int = 1,
+        until: Stop | None = None,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[PostInfo]:
+        """
+        逐个遍历帖子，跨页时会提前请求下一页
+        :param until: 停止条件，例如until_post_id(pid)/until_time(time)
+        :param max_pages: 最多请求的页数
+        """
+        ...
+
     async def get_post_list_by_time(self, *, page: int = 1, page_size=0) -> list[PostInfo]: ...
     async def get_post_list_by_reply(self, *, page: int = 1, page_size=0) -> list[PostInfo]: ...
     async def get_nice_post_list_by_time(self, *, page: int = 1, page_size=0) -> list[PostInfo]: ...
     async def get_nice_post_list_by_replay(self, *, page: int = 1, page_size=0) -> list[PostInfo]: ...
     def get_token(self) -> str: ...
     async def get_post_by_user(self, uid: UID, *, page: int = 1, page_size=0) -> list[UserPostInfo]: ...
+    def iter_post_by_user(
+        self,
+        uid: UID,
+        *,
+        page_size=20,
+        start: int = 1,
+        until: Stop | None = None,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[UserPostInfo]: ...
     async def get_reply_list(self, *, page: int = 1, pageSize: int = 0) -> list[BaseReply]: ...
+    def iter_reply_list(
+        self, *, pageSize: int = 20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[BaseReply]: ...
     async def get_like_list(self, *, page: int = 1, pageSize: int = 0) -> list[BaseLike]: ...
+    def iter_like_list(
+        self, *, pageSize: int = 20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[BaseLike]: ...
     async def get_upload_key(self) -> UploadKey: ...
     async def like_post(self, pid: PID, uid: UID) -> LikeInfo:
         """
@@ -157,6 +296,12 @@ class Bot(BaseBot):
     async def sign_now(self) -> SignInfo: ...
     async def get_chat_list(self) -> list[ChatList]: ...
     async def get_chat_newest(self, uid: UID, mid: MID) -> dict: ...
+    async def get_chat_messages(self, uid: UID, mid: MID = 0) -> list[ChatMessage]:
+        """
+        和某个用户的私信中id比mid新的消息
+        """
+        ...
+
     async def get_self_info(self) -> User: ...
     async def get_user_info(self, uid: UID) -> User: ...
     async def get_newest_post_id(self) -> int: ...
@@ -168,7 +313,18 @@ class Bot(BaseBot):
     async def get_next_level(self) -> Level: ...
     async def get_notice_count(self) -> NoticeCount: ...
     async def get_system_notice_message(self, page: int = 1, pageSize=20) -> list[SystemNoticeMessage]: ...
+    def iter_system_notice_message(
+        self, *, pageSize=20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[SystemNoticeMessage]: ...
     async def get_site_notice(self, page: int = 0, pageSize=20) -> list[BaseNotice]: ...
+    def iter_site_notice(
+        self, *, pageSize=20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[BaseNotice]:
+        """
+        站内通知的页码从0开始
+        """
+        ...
+
     async def get_post_details(self, pid: PID) -> PostDetails: ...
     async def follow_user(self, uid: UID) -> FollowResult:
         """
@@ -0,0 +1,140 @@
+import time
+from typing import Generic, TypeVar
+from pathlib import Path
+import sqlite3
+from collections import OrderedDict
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    内存LRU缓存，maxsize<=0时不缓存
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key: K, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        return self._data.pop(key, default)
+
+    def values(self) -> list[V]:
+        return list(self._data.values())
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    带过期时间的LRU缓存，value可以是None(用于缓存无效结果)
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._data: LRUCache[K, tuple[float, V]] = LRUCache(maxsize)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        if item[0] < time.monotonic():
+            self._data.pop(key)
+            return default
+        return item[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        self._data.set(key, (time.monotonic() + (self.ttl if ttl is None else ttl), value))
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class UploadCache:
+    """
+    图片上传缓存: 图片内容的sha256 -> 图床url
+    内存LRU + 可选的sqlite持久化
+    写入sqlite后最多COMMIT_INTERVAL秒提交一次，不在每次上传后都落盘
+    """
+
+    COMMIT_INTERVAL = 5.0
+
+    def __init__(self, maxsize: int, path: Path | None = None):
+        self.memory: LRUCache[str, str] = LRUCache(maxsize)
+        self.path = path
+        self._db: sqlite3.Connection | None = None
+        self._last_commit = time.monotonic()
+
+    @property
+    def db(self) -> sqlite3.Connection | None:
+        if self.path is None:
+            return None
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS upload (hash TEXT PRIMARY KEY, url TEXT NOT NULL, time INTEGER)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, digest: str) -> str | None:
+        if url := self.memory.get(digest):
+            return url
+        if self.db is None:
+            return None
+        row = self.db.execute("SELECT url FROM upload WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        self.memory.set(digest, row[0])
+        return row[0]
+
+    def set(self, digest: str, url: str) -> None:
+        self.memory.set(digest, url)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO upload VALUES (?, ?, ?)", (digest, url, int(time.time())))
+            if time.monotonic() - self._last_commit >= self.COMMIT_INTERVAL:
+                self.commit()
+
+    def commit(self) -> None:
+        if self._db is not None:
+            self._db.commit()
+        self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+
+__all__ = ["LRUCache", "TTLCache", "UploadCache"]
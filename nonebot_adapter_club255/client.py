@@ -1,10 +1,12 @@
 import json
 import time
 from typing import Any, Protocol
+import asyncio
 from datetime import datetime
-from collections.abc import Callable, Awaitable
+from collections.abc import Callable, Iterable, Awaitable, AsyncIterator
 
 from pydantic import HttpUrl
+from nonebot.utils import run_sync
 from nonebot.internal.driver import Request, Response
 
 from .bean import (
@@ -25,6 +27,7 @@ from .bean import (
     VideoInfo,
     BaseNotice,
     PostResult,
+    ChatMessage,
     NoticeCount,
     PostDetails,
     ReplyResult,
@@ -35,9 +38,13 @@ from .bean import (
     SystemNoticeMessage,
     RawUserWithContribution,
 )
+from .cache import TTLCache, UploadCache
+from .image import process_image
 from .types import FID, MID, PID, UID, T
+from .config import Config
 from .message import Message, TextMsg, ImageMsg, VideoMsg, MessageSegment
-from .exception import ActionFailed
+from .exception import ActionFailed, MediaResolveFailed
+from .pagination import Stop, iter_pages
 
 
 class API(Protocol):
@@ -62,11 +69,17 @@ class Client:
         api_post: API,
         call_api: CallAPI,
         request: Callable[[Request], Awaitable[Response]],
+        config: Config | None = None,
     ):
         self.call_api = call_api
         self.get = api_get
         self.post = api_post
         self.request = request
+        self.config = config or Config()
+        self.video_cache: TTLCache[str, VideoInfo | None] = TTLCache(
+            self.config.club255_video_cache_size, self.config.club255_video_cache_ttl
+        )
+        self._video_pending: dict[str, asyncio.Future[VideoInfo]] = {}
 
     async def get_live_info(self) -> LiveInfo:
         """
@@ -102,8 +115,69 @@ class Client:
             list[RawUserWithContribution],
         )
 
+    def iter_week_rank(
+        self, *, pageSize: int = 10, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[RawUserWithContribution]:
+        return iter_pages(
+            lambda page: self.get_week_rank(page, pageSize), page_size=pageSize, until=until, max_pages=max_pages
+        )
+
+    def iter_month_rank(
+        self, *, pageSize: int = 10, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[RawUserWithContribution]:
+        return iter_pages(
+            lambda page: self.get_month_rank(page, pageSize), page_size=pageSize, until=until, max_pages=max_pages
+        )
+
     async def get_video_info(self, bv: str) -> VideoInfo:
-        return await self.get(f"forward/get-video-info?bv={bv}", VideoInfo)
+        """
+        获取b站视频的标题和封面，结果会缓存，同一个bv同时只会请求一次
+        :raise ActionFailed: 无效的bv
+        """
+        info = self.video_cache.get(bv, ...)  # type: ignore
+        if info is None:
+            raise ActionFailed(f"无效的视频:{bv}")
+        if info is not ...:
+            return info
+        if pending := self._video_pending.get(bv):
+            return await asyncio.shield(pending)
+
+        future = self._video_pending[bv] = asyncio.get_running_loop().create_future()
+        try:
+            info = await self.get(f"forward/get-video-info?bv={bv}", VideoInfo)
+        except ActionFailed as e:
+            self.video_cache.set(bv, None, self.config.club255_video_negative_ttl)
+            future.set_exception(e)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.video_cache.set(bv, info)
+            future.set_result(info)
+            return info
+        finally:
+            del self._video_pending[bv]
+            # 没有其他人等待时避免 "exception was never retrieved"
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    async def resolve_videos(self, bvs: Iterable[str]) -> dict[str, VideoInfo | None]:
+        """
+        批量获取视频信息，可以提前调用来预热缓存
+        :return: {bv: VideoInfo}，无效的bv为None
+        """
+        bvs = list(dict.fromkeys(bvs))
+        semaphore = asyncio.Semaphore(max(self.config.club255_media_concurrency, 1))
+
+        async def _get(bv: str) -> VideoInfo | None:
+            async with semaphore:
+                try:
+                    return await self.get_video_info(bv)
+                except ActionFailed:
+                    return None
+
+        return dict(zip(bvs, await asyncio.gather(*[_get(bv) for bv in bvs])))
 
     async def get_post_list_brief(
         self, *, page: int = 1, _order: int = 1, _filter: int = 0, page_size=20
@@ -125,6 +199,29 @@ class Client:
     async def get_post_list_brief_by_time(self, *, page: int = 1, page_size=20) -> list[BasePost]:
         return await self.get_post_list_brief(page=page, _order=1, _filter=0, page_size=page_size)
 
+    def iter_post_list_brief(
+        self,
+        *,
+        _order: int = 1,
+        _filter: int = 0,
+        page_size=20,
+        start: int = 1,
+        until: Stop | None = None,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[BasePost]:
+        """
+        逐个遍历帖子，跨页时会提前请求下一页
+        :param until: 停止条件，例如until_post_id(pid)/until_time(time)
+        :param max_pages: 最多请求的页数
+        """
+        return iter_pages(
+            lambda page: self.get_post_list_brief(page=page, _order=_order, _filter=_filter, page_size=page_size),
+            page_size=page_size,
+            start=start,
+            until=until,
+            max_pages=max_pages,
+        )
+
     async def get_post_list_brief_by_reply(self, *, page: int = 1, page_size=20) -> list[BasePost]:
         return await self.get_post_list_brief(page=page, _order=0, _filter=0, page_size=page_size)
 
@@ -136,6 +233,10 @@ class Client:
 
 
 class LoginClient(Client):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.upload_cache = UploadCache(self.config.club255_upload_cache_size, self.config.club255_upload_cache_path)
+
     async def get_post_list(self, *, page: int = 1, _order: int = 1, _filter: int = 0, page_size=20) -> list[PostInfo]:
         """
         获取帖子列表
@@ -154,6 +255,29 @@ class LoginClient(Client):
     async def get_post_list_by_time(self, *, page: int = 1, page_size=20) -> list[PostInfo]:
         return await self.get_post_list(page=page, _order=1, _filter=0, page_size=page_size)
 
+    def iter_post_list(
+        self,
+        *,
+        _order: int = 1,
+        _filter: int = 0,
+        page_size=20,
+        start: int = 1,
+        until: Stop | None = None,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[PostInfo]:
+        """
+        逐个遍历帖子，跨页时会提前请求下一页
+        :param until: 停止条件，例如until_post_id(pid)/until_time(time)
+        :param max_pages: 最多请求的页数
+        """
+        return iter_pages(
+            lambda page: self.get_post_list(page=page, _order=_order, _filter=_filter, page_size=page_size),
+            page_size=page_size,
+            start=start,
+            until=until,
+            max_pages=max_pages,
+        )
+
     async def get_post_list_by_reply(self, *, page: int = 1, page_size=20) -> list[PostInfo]:
         return await self.get_post_list(page=page, _order=0, _filter=0, page_size=page_size)
 
@@ -169,45 +293,101 @@ class LoginClient(Client):
     async def upload_image(self, *, url: HttpUrl, self_uid: UID, img_msg: ImageMsg) -> UploadResult:
         if img_msg.url:
             return UploadResult.model_validate({"err": 0, "id": "", "url": img_msg.url})
+        # 没有处理参数时prepare_image不会计算hash，大图的sha256也放到线程里
+        digest = img_msg.data.get("digest") or await run_sync(img_msg.digest)()
+        if cached := self.upload_cache.get(digest):
+            return UploadResult.model_validate({"err": 0, "id": "", "url": cached})
         key: UploadKey = await self.get_upload_key()
 
         file_name = f"{self_uid}.{int(time.time() * 1000)}.{key.sign}.{img_msg.type_}"
 
-        data = {
-            "data": {
-                "id": key.id,
-                "ts": key.ts,
-                "sign": key.sign,
-                "filename": file_name,
-                "categories": datetime.now().strftime("%Y%m"),
-            },
-            "files": {"file": (file_name, img_msg.file)},
-        }
-
-        req = Request("POST", url, **data)
-        res = await self.request(req)
+        with img_msg.open_file() as file:
+            data = {
+                "data": {
+                    "id": key.id,
+                    "ts": key.ts,
+                    "sign": key.sign,
+                    "filename": file_name,
+                    "categories": datetime.now().strftime("%Y%m"),
+                },
+                "files": {"file": (file_name, file)},
+            }
+
+            req = Request("POST", url, **data)
+            res = await self.request(req)
         result = json.loads(res.content)
 
         try:
-            return UploadResult.model_validate(result)
+            upload_result = UploadResult.model_validate(result)
         except Exception as e:
             raise ActionFailed(f"图片上传失败:{str(img_msg)} -> {result.get('msg', '未知错误')},{e}")
+        self.upload_cache.set(digest, upload_result.url)
+        return upload_result
 
-    async def dispose_msg(self, url: HttpUrl, self_uid: UID, message: str | Message | MessageSegment) -> Message:
+    async def prepare_image(self, self_uid: UID, img_msg: ImageMsg) -> None:
+        """
+        上传前在线程中缩放/压缩/加水印
+        缓存的key是原图+处理参数，命中缓存时不做处理
+        """
+        watermark = self.config.club255_watermark_text.format(uid=self_uid) if img_msg.watermark else None
+        options = (self.config.club255_image_max_size, self.config.club255_image_quality, watermark)
+        if not any(options) or img_msg.data.get("prepared"):
+            return
+        digest = await run_sync(img_msg.digest)()
+        img_msg.data["digest"] = f"{digest}:{options}"
+        img_msg.data["prepared"] = True
+        if self.upload_cache.get(img_msg.data["digest"]):
+            return
+        result = await run_sync(process_image)(
+            img_msg,
+            max_size=self.config.club255_image_max_size,
+            quality=self.config.club255_image_quality,
+            watermark=watermark,
+            font=self.config.club255_watermark_font,
+        )
+        if result is not None:
+            img_msg.data.update({"file": result[0], "path": None, "type": result[1]})
+
+    async def _resolve_media(self, url: HttpUrl, self_uid: UID, m: MessageSegment) -> None:
+        if isinstance(m, VideoMsg):
+            _ = await self.get_video_info(m.bv)
+            m.data["title"] = _.title
+            m.data["cover"] = _.cover
+        elif isinstance(m, ImageMsg):
+            await self.prepare_image(self_uid, m)
+            m.data["url"] = (await self.upload_image(self_uid=self_uid, url=url, img_msg=m)).url
+
+    async def dispose_msg(
+        self,
+        url: HttpUrl,
+        self_uid: UID,
+        message: str | Message | MessageSegment,
+        concurrency: int | None = None,
+    ) -> Message:
+        """
+        并发上传图片、获取视频信息，不改变消息段顺序
+        :param concurrency: 同时处理的数量，默认club255_media_concurrency
+        :raise MediaResolveFailed: 包含所有失败的消息段
+        """
         if isinstance(message, str):
             # 避免解析文本中的[]
             return Message(TextMsg(message))
-        else:
-            if isinstance(message, MessageSegment):
-                message = Message(message)
-            for m in message:
-                if isinstance(m, VideoMsg) and not m.check():
-                    _ = await self.get_video_info(m.bv)
-                    m.data["title"] = _.title
-                    m.data["cover"] = _.cover
-                    continue
-                elif isinstance(m, ImageMsg) and not m.check():
-                    m.data["file"] = await self.upload_image(self_uid=self_uid, url=url, img_msg=m)
+        if isinstance(message, MessageSegment):
+            message = Message(message)
+        pending = [(index, m) for index, m in enumerate(message) if isinstance(m, VideoMsg | ImageMsg) and not m.check()]
+        if not pending:
+            return message
+
+        semaphore = asyncio.Semaphore(max(concurrency or self.config.club255_media_concurrency, 1))
+
+        async def _resolve(m: MessageSegment) -> None:
+            async with semaphore:
+                await self._resolve_media(url, self_uid, m)
+
+        results = await asyncio.gather(*[_resolve(m) for _, m in pending], return_exceptions=True)
+        failures = [(index, m, e) for (index, m), e in zip(pending, results) if isinstance(e, BaseException)]
+        if failures:
+            raise MediaResolveFailed(failures)
         return message
 
     async def send_post(
@@ -292,6 +472,14 @@ class LoginClient(Client):
     async def get_chat_newest(self, uid: UID, mid: MID) -> dict:
         return await self.call_api(f"chat/chat-newest?self_uid={uid}&id={mid}", method="GET")
 
+    async def get_chat_messages(self, uid: UID, mid: MID = 0) -> list[ChatMessage]:
+        """
+        和某个用户的私信中id比mid新的消息，返回格式没有完整验证过
+        :param uid: 对方的uid
+        :param mid: 游标，上一次拿到的最新消息id
+        """
+        return await self.get(f"chat/chat-newest?self_uid={uid}&id={mid}", list[ChatMessage], data_from="list")
+
     async def get_self_info(self) -> User:
         # return await self.get_user_info(self.self_id)
         return await self.get("user/info", User, data_from="info")
@@ -327,6 +515,16 @@ class LoginClient(Client):
             data_from="list",
         )
 
+    def iter_reply_list(
+        self, *, pageSize: int = 20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[BaseReply]:
+        return iter_pages(
+            lambda page: self.get_reply_list(page=page, pageSize=pageSize),
+            page_size=pageSize,
+            until=until,
+            max_pages=max_pages,
+        )
+
     async def get_like_list(self, *, page: int = 1, pageSize: int = 20) -> list[BaseLike]:
         """
         点赞列表
@@ -340,6 +538,16 @@ class LoginClient(Client):
             data_from="list",
         )
 
+    def iter_like_list(
+        self, *, pageSize: int = 20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[BaseLike]:
+        return iter_pages(
+            lambda page: self.get_like_list(page=page, pageSize=pageSize),
+            page_size=pageSize,
+            until=until,
+            max_pages=max_pages,
+        )
+
     async def get_self_level(self) -> Level:
         return await self.get("level/info", Level, data_from="levelInfo")
 
@@ -356,6 +564,16 @@ class LoginClient(Client):
             data_from="list",
         )
 
+    def iter_system_notice_message(
+        self, *, pageSize=20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[SystemNoticeMessage]:
+        return iter_pages(
+            lambda page: self.get_system_notice_message(page, pageSize),
+            page_size=pageSize,
+            until=until,
+            max_pages=max_pages,
+        )
+
     async def get_site_notice(self, page: int = 0, pageSize=20) -> list[BaseNotice]:
         return await self.get(
             f"notice/site?page={page}&pageSize={pageSize}",
@@ -363,6 +581,20 @@ class LoginClient(Client):
             data_from="list",
         )
 
+    def iter_site_notice(
+        self, *, pageSize=20, until: Stop | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[BaseNotice]:
+        """
+        站内通知的页码从0开始
+        """
+        return iter_pages(
+            lambda page: self.get_site_notice(page, pageSize),
+            page_size=pageSize,
+            start=0,
+            until=until,
+            max_pages=max_pages,
+        )
+
     async def get_post_details(self, pid: PID) -> PostDetails:
         return await self.get(f"post/detail/{pid}", PostDetails, data_from="info")
 
@@ -409,6 +641,28 @@ class LoginClient(Client):
             data_from="list",
         )
 
+    def iter_post_by_user(
+        self,
+        uid: UID,
+        *,
+        page_size=20,
+        start: int = 1,
+        until: Stop | None = None,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[UserPostInfo]:
+        """
+        逐个遍历用户的帖子，跨页时会提前请求下一页
+        :param until: 停止条件，例如until_post_id(pid)/until_time(time)
+        :param max_pages: 最多请求的页数
+        """
+        return iter_pages(
+            lambda page: self.get_post_by_user(uid, page=page, page_size=page_size),
+            page_size=page_size,
+            start=start,
+            until=until,
+            max_pages=max_pages,
+        )
+
     async def set_floor_top(self, pid: PID, fid: FID) -> None:
         """
         这个api不会返回信息
@@ -0,0 +1,100 @@
+import sys
+from typing import TYPE_CHECKING, Any
+from datetime import datetime
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from .bean import BaseUser
+
+
+@dataclass(slots=True, frozen=True)
+class CompactLike:
+    """
+    点赞通知的精简记录，适合在插件里大量缓存
+    相同的用户信息共用同一个frozen的BaseUser
+    """
+
+    postId: int
+    time: datetime
+    # 1:帖子点赞 or 2楼层点赞
+    type: int
+    user: "BaseUser"
+    # 帖子点赞时是帖子标题
+    title: str | None = None
+    # 楼层点赞时是楼层id
+    floorId: int | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class CompactReply:
+    """
+    回复通知的精简记录，content是原始的content字符串
+    """
+
+    postId: int
+    time: datetime
+    # 1:帖子回复 or 2楼层回复
+    type: int
+    user: "BaseUser"
+    content: str
+    title: str | None = None
+    floorId: int | None = None
+
+
+def _get(data: Any, name: str) -> Any:
+    # bean中没有定义的字段在model_extra里
+    if (value := getattr(data, name, None)) is not None:
+        return value
+    if isinstance(data, BaseModel):
+        return (data.model_extra or {}).get(name)
+    return None
+
+
+def _attr(data: Any, name: str) -> Any:
+    if data is None:
+        return None
+    if isinstance(data, dict):
+        return data.get(name)
+    return getattr(data, name, None)
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if isinstance(value, str) else None
+
+
+def compact_like(data: Any) -> CompactLike:
+    """
+    BaseLike/FloorLike/PostLike 或 LikeNoticeEvent -> CompactLike
+    """
+    post = _get(data, "post")
+    floor = _get(data, "floor")
+    return CompactLike(
+        postId=data.postId,
+        time=data.time,
+        type=data.type,
+        user=data.user.shared(),
+        title=_intern(_attr(post, "title")),
+        floorId=_attr(floor, "floorId"),
+    )
+
+
+def compact_reply(data: Any) -> CompactReply:
+    """
+    BaseReply/FloorReply/PostReply 或 ReplyEvent -> CompactReply
+    """
+    post = _get(data, "post")
+    floor = _get(data, "floor")
+    return CompactReply(
+        postId=data.postId,
+        time=data.time,
+        type=data.type,
+        user=data.user.shared(),
+        content=data.content,
+        title=_intern(_attr(post, "title")),
+        floorId=_attr(floor, "floorId"),
+    )
+
+
+__all__ = ["CompactLike", "CompactReply", "compact_like", "compact_reply"]
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from pydantic import Field, HttpUrl, BaseModel
 
 from .types import AccessEventName
@@ -20,10 +22,66 @@ class Config(BaseModel):
     club255_receive_me: bool = Field(default=False)
     # 请求时间间隔 单位:秒
     club255_interval: int = Field(default=60)
+    # 直播间单独的请求间隔 单位:秒，0为跟其他事件一起按club255_interval获取
+    club255_live_interval: int = Field(default=10)
+    # 连续多少次获取到相同的直播状态才算开播/下播，防止接口状态抖动时重复触发
+    club255_live_debounce: int = Field(default=2)
     # 每次请求的贴子数
     club255_page_size: int = Field(default=20)
     # 是否一运行就处理 True:立即处理获取到的帖子 False:从第二次获取开始处理
     club255_run_now: bool = Field(default=False)
+    # 发送消息时同时上传图片/获取视频信息的数量
+    club255_media_concurrency: int = Field(default=4)
+    # 发送消息/回复/帖子时先进入发送队列，按优先级依次发送，媒体在排队时就开始处理
+    club255_send_queue: bool = Field(default=False)
+    # 发送队列中同一账号两次发送的最小间隔 单位:秒
+    club255_send_interval: float = Field(default=2.0)
+    # 图片上传缓存数量(按图片内容)，0为不缓存
+    club255_upload_cache_size: int = Field(default=256)
+    # 图片上传缓存的持久化路径(sqlite)，None为只缓存在内存
+    club255_upload_cache_path: Path | None = Field(default=None)
+    # 上传前把图片最长边缩小到该值，None为不缩放
+    club255_image_max_size: int | None = Field(default=None)
+    # 上传前重新压缩图片的质量(jpeg/webp)，None为不压缩
+    club255_image_quality: int | None = Field(default=None)
+    # ImageMsg(watermark=True)时添加的水印，{uid}为自己的uid
+    club255_watermark_text: str = Field(default="ihan.club@{uid}")
+    # 水印字体(ttf)，不设置时用PIL自带的小号点阵字体，无法显示中文
+    club255_watermark_font: Path | None = Field(default=None)
+    # 视频信息(标题/封面)缓存数量和时间 单位:秒
+    club255_video_cache_size: int = Field(default=512)
+    club255_video_cache_ttl: int = Field(default=3600)
+    # 无效bv的缓存时间 单位:秒
+    club255_video_negative_ttl: int = Field(default=300)
+    # prometheus格式metrics的路径(需要ASGI驱动器)，例如"/club255/metrics"，None为不导出
+    club255_metrics_path: str | None = Field(default=None)
+    # 定时输出内存快照对比和各缓存/队列的大小，持续增长时警告
+    club255_diagnostics: bool = Field(default=False)
+    # 内存检查间隔 单位:秒
+    club255_diagnostics_interval: int = Field(default=600)
+    # 每次输出增长最多的分配位置数量
+    club255_diagnostics_top: int = Field(default=10)
+    # 发现新帖时立即获取帖子详情，handler中await event.details时不用再等待
+    club255_prefetch_details: bool = Field(default=False)
+    # 缓存的帖子详情数量
+    club255_prefetch_cache_size: int = Field(default=128)
+    # 同时获取帖子详情的数量
+    club255_prefetch_concurrency: int = Field(default=4)
+    # 本地帖子库(sqlite)的路径，获取到的帖子/详情会写入，插件可以通过store.post_store查询，None为不启用
+    club255_store_path: Path | None = Field(default=None)
+    # 帖子库最多保存的帖子数，0为不限制
+    club255_store_max_posts: int = Field(default=100000)
+    # 帖子库保存的天数，0为不限制
+    club255_store_retention: int = Field(default=90)
+    # 把每次请求和原始返回录制到该文件(gzip压缩的jsonl)，可以用replay.replay离线回放，None为不录制
+    # auth/*接口(登录等)的请求和返回、cookie/authorization字段会脱敏后再写入
+    club255_record_path: Path | None = Field(default=None)
+    # 记录每次轮询中网络/json/校验/消息解析/构造事件/分发各阶段的耗时
+    club255_profile: bool = Field(default=False)
+    # 计算分位数用的最近轮询次数
+    club255_profile_window: int = Field(default=100)
+    # 输出耗时汇总日志的间隔 单位:秒，0为不输出
+    club255_profile_log_interval: int = Field(default=600)
 
 
 __all__ = ["Config"]
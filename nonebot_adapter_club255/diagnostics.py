@@ -0,0 +1,122 @@
+from typing import Any
+import asyncio
+from collections import deque
+import tracemalloc
+from collections.abc import Callable
+
+from nonebot import logger
+from nonebot.utils import run_sync
+
+
+def size_of(value: Any) -> int:
+    """
+    容器的大小，dict会把值里的容器也加上(比如EventFactory.data["post"]是个set)
+    """
+    if isinstance(value, dict):
+        return len(value) + sum(len(i) for i in value.values() if hasattr(i, "__len__") and not isinstance(i, str))
+    if hasattr(value, "__len__"):
+        return len(value)
+    return 0
+
+
+class Diagnostics:
+    """
+    定时用tracemalloc对比内存快照，输出增长最多的分配位置
+    同时记录注册的结构(EventFactory.data、缓存、Adapter.tasks等)的大小，一直在增长时发出警告
+    """
+
+    def __init__(self, top: int = 10, history: int = 6, frames: int = 1):
+        self.top = top
+        self.frames = frames
+        # 连续history次采样都没有变小且整体变大，就认为在持续增长
+        self.history = history
+        self.sizes: dict[str, Callable[[], int]] = {}
+        self.samples: dict[str, deque[int]] = {}
+        self._first: tracemalloc.Snapshot | None = None
+        self._last: tracemalloc.Snapshot | None = None
+
+    def register(self, name: str, getter: Callable[[], int]) -> None:
+        """
+        注册需要监控大小的结构
+        :param name: 名字
+        :param getter: 返回当前大小
+        """
+        self.sizes[name] = getter
+
+    def unregister(self, name: str) -> None:
+        self.sizes.pop(name, None)
+        self.samples.pop(name, None)
+
+    def measure(self) -> dict[str, int]:
+        result = {}
+        for name, getter in self.sizes.items():
+            try:
+                result[name] = getter()
+            except Exception as e:
+                logger.opt(exception=e).debug(f"Club255 获取<{name}>大小失败")
+                continue
+            if (samples := self.samples.get(name)) is None:
+                samples = self.samples[name] = deque(maxlen=self.history)
+            samples.append(result[name])
+        return result
+
+    def growing(self) -> list[str]:
+        """
+        最近history次采样一直没有变小，并且整体变大的结构
+        """
+        return [
+            name
+            for name, samples in self.samples.items()
+            if len(samples) == self.history
+            and samples[-1] > samples[0]
+            and all(a <= b for a, b in zip(samples, list(samples)[1:]))
+        ]
+
+    def top_allocations(self) -> list[tracemalloc.StatisticDiff]:
+        """
+        和上一次快照相比增长最多的分配位置，第一次调用时和启动时的快照相比
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+        base = self._last or self._first
+        self._last = snapshot
+        if base is None:
+            self._first = snapshot
+            return []
+        return [i for i in snapshot.compare_to(base, "lineno") if i.size_diff > 0][: self.top]
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._first = self._last = None
+        self.top_allocations()
+
+    async def report(self) -> None:
+        sizes = self.measure()
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        logger.info(
+            f"Club255 内存 当前:{current / 1024 / 1024:.1f}MB 峰值:{peak / 1024 / 1024:.1f}MB | "
+            + " ".join(f"{name}={size}" for name, size in sizes.items())
+        )
+        # 快照和对比要遍历所有分配，放到线程里做
+        for stat in await run_sync(self.top_allocations)():
+            logger.info(f"Club255 内存增长 {stat.size_diff / 1024:+.1f}KB ({stat.count_diff:+d}) {stat.traceback}")
+        for name in self.growing():
+            logger.warning(f"Club255 <{name}> 最近{self.history}次检查一直在增长: {list(self.samples[name])}")
+
+    async def run(self, interval: float) -> None:
+        await run_sync(self.start)()
+        while True:
+            await asyncio.sleep(interval)
+            await self.report()
+
+
+diagnostics = Diagnostics()
+
+__all__ = ["Diagnostics", "diagnostics", "size_of"]
@@ -1,13 +1,17 @@
-from typing import Literal, Optional
+from typing import Any, Literal, Optional
 from datetime import datetime
 
 from nonebot import escape_tag
-from pydantic import Field, BaseModel, model_validator
+from pydantic import Field, BaseModel, PrivateAttr, model_validator
 from nonebot.adapters import Event as BaseEvent
+from nonebot.exception import NoLogException
+from typing_extensions import Self
 
-from .bean import RawPost, BaseUser, PostInfo, BaseFloor
-from .utils import truncate
+from .bean import RawPost, BaseUser, PostInfo, BaseFloor, ChatMessage
+from .utils import truncate, summarize, log_enabled
+from .compact import CompactLike, CompactReply, compact_like, compact_reply
 from .message import Message
+from .prefetch import DetailsHandle
 
 
 class Event(BaseEvent):
@@ -15,6 +19,8 @@ class Event(BaseEvent):
     self_uid: int
     post_type: str
 
+    _log_string: str | None = PrivateAttr(default=None)
+
     @model_validator(mode="before")
     @classmethod
     def _set_raw_data(cls, values: dict | BaseModel):
@@ -24,6 +30,33 @@ class Event(BaseEvent):
             values["time"] = datetime.now()
         return values
 
+    @classmethod
+    def from_bean(cls, data: BaseModel, **extra: Any) -> Self:
+        """
+        从已经校验过的bean直接构造event，不再model_dump/model_validate
+        bean中的嵌套模型直接复用，类型对不上时才退回model_validate
+        """
+        values = {**data.__dict__, **(data.model_extra or {}), **extra}
+        if values.get("time") is None:
+            values["time"] = datetime.now()
+        values = cls._trusted_values(values, data)
+        for name, field in cls.model_fields.items():
+            if name not in values:
+                if field.is_required():
+                    break
+                continue
+            annotation = field.annotation
+            if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+                if not isinstance(values[name], annotation):
+                    break
+        else:
+            return cls.model_construct(**values)
+        return cls.model_validate({**data.model_dump(), **extra})
+
+    @classmethod
+    def _trusted_values(cls, values: dict, data: BaseModel) -> dict:
+        return values
+
     def get_type(self) -> str:
         return self.post_type
 
@@ -31,7 +64,17 @@ class Event(BaseEvent):
         return self.post_type
 
     def get_event_description(self) -> str:
-        return escape_tag(str(self.dict()))
+        return ", ".join(f"{k}={truncate(v, 30, kill_words=True)}" for k, v in self.__dict__.items())
+
+    def get_log_string(self) -> str:
+        """
+        nonebot不输出SUCCESS日志时直接跳过，描述只生成一次
+        """
+        if not log_enabled("SUCCESS"):
+            raise NoLogException("Club255")
+        if self._log_string is None:
+            self._log_string = escape_tag(super().get_log_string())
+        return self._log_string
 
     def get_user_id(self) -> str:
         return str(self.self_uid)
@@ -46,6 +89,13 @@ class Event(BaseEvent):
         return False
 
 
+def _post_from_bean(values: dict, data: BaseModel) -> BaseModel:
+    # 和model_validate时一样，post.content是替换过[图片]/[视频]的
+    if getattr(data, "content", None) == values["content"]:
+        return data
+    return data.model_copy(update={"content": values["content"]})
+
+
 class NoticeEvent(Event):
     post_type: Literal["notice"] = "notice"
     notice_type: str
@@ -56,9 +106,20 @@ class MessageEvent(Event):
     content: str
     message: Message
 
+    _summary: str | None = PrivateAttr(default=None)
+
     def get_message(self) -> "Message":
         return self.message
 
+    @property
+    def summary(self) -> str:
+        """
+        消息的简短预览，只转换开头的消息段
+        """
+        if self._summary is None:
+            self._summary = summarize(self.message)
+        return self._summary
+
     @model_validator(mode="before")
     @classmethod
     def _set_message(cls, values: dict | BaseModel):
@@ -68,19 +129,48 @@ class MessageEvent(Event):
         values["message"] = values["content"]
         return values
 
+    @classmethod
+    def _trusted_values(cls, values: dict, data: BaseModel) -> dict:
+        if isinstance(values.get("message"), Message):
+            # bean里已经解析过了
+            values["message"] = Message(values["message"])
+        else:
+            Message.join_url(values)
+            values["message"] = Message(values["content"])
+        return super()._trusted_values(values, data)
 
-class OnLiveNoticeEvent(NoticeEvent):
-    notice_type: str = "on_live"
+
+class LiveNoticeEvent(NoticeEvent):
     # 直播消息
     keyframe: str
     # 直播状态: 1开播,2未开播
     live_status: int
     user_cover: str
 
+
+class OnLiveNoticeEvent(LiveNoticeEvent):
+    notice_type: str = "on_live"
+
     def get_event_description(self) -> str:
         return "hanser开播啦!"
 
 
+class OffLiveNoticeEvent(LiveNoticeEvent):
+    notice_type: str = "off_live"
+
+    def get_event_description(self) -> str:
+        return "hanser下播了"
+
+
+class LiveUpdateNoticeEvent(LiveNoticeEvent):
+    notice_type: str = "live_update"
+    # 变化的字段: keyframe/user_cover
+    changed: list[str]
+
+    def get_event_description(self) -> str:
+        return f"直播间更新 | {', '.join(self.changed)}"
+
+
 class AtNoticeEvent(NoticeEvent):
     notice_type: str = "at"
     # 没被@过，写不出来
@@ -137,6 +227,9 @@ class LikeNoticeEvent(NoticeEvent):
     def get_event_description(self) -> str:
         return f"{self.user.nickname}({self.user.uid}) 给你点赞了"
 
+    def to_compact(self) -> CompactLike:
+        return compact_like(self)
+
 
 class PostLikeNoticeEvent(LikeNoticeEvent):
     notice_type: str = "notice_like"
@@ -163,7 +256,7 @@ class FloorLikeNoticeEvent(LikeNoticeEvent):
     floor: BaseFloor
 
     def get_event_description(self) -> str:
-        return f"{self.user.nickname}({self.user.uid}) 给你的楼层点赞了({truncate(self.floor.message)})"
+        return f"{self.user.nickname}({self.user.uid}) 给你的楼层点赞了({summarize(self.floor.message)})"
 
 
 class ReplyEvent(MessageEvent):
@@ -176,7 +269,10 @@ class ReplyEvent(MessageEvent):
     user: BaseUser
 
     def get_event_description(self) -> str:
-        return f"{self.user.nickname}({self.user.uid}) 给你回复了({truncate(self.message)})"
+        return f"{self.user.nickname}({self.user.uid}) 给你回复了({self.summary})"
+
+    def to_compact(self) -> CompactReply:
+        return compact_reply(self)
 
     def to_post_reply_event(self) -> Optional["PostReplyEvent"]:
         if self.type != 1:
@@ -194,7 +290,7 @@ class PostReplyEvent(ReplyEvent):
     post: RawPost
 
     def get_event_description(self) -> str:
-        return f"{self.user.nickname}({self.user.uid}) " f"给你的帖子({self.post.title})回复了({truncate(self.message)})"
+        return f"{self.user.nickname}({self.user.uid}) 给你的帖子({self.post.title})回复了({self.summary})"
 
 
 class FloorReplyEvent(ReplyEvent):
@@ -202,30 +298,87 @@ class FloorReplyEvent(ReplyEvent):
     floor: BaseFloor
 
     def get_event_description(self) -> str:
-        return (
-            f"{self.user.nickname}({self.user.uid}) "
-            f"给你的回帖({truncate(self.floor.message)})回复了({truncate(self.message)})"
-        )
+        return f"{self.user.nickname}({self.user.uid}) 给你的回帖({summarize(self.floor.message)})回复了({self.summary})"
+
+
+class ChatMessageEvent(MessageEvent):
+    message_type: str = "chat"
+    chat: ChatMessage
+    # 私信的对方
+    user: BaseUser
+
+    @model_validator(mode="before")
+    @classmethod
+    def _set_chat(cls, values: dict):
+        if values.get("chat") is None:
+            values["chat"] = values
+        return values
+
+    @classmethod
+    def _trusted_values(cls, values: dict, data: BaseModel) -> dict:
+        values = super()._trusted_values(values, data)
+        values["chat"] = data
+        return values
+
+    def get_user_id(self) -> str:
+        return str(self.user.uid)
+
+    def get_session_id(self) -> str:
+        return f"chat_{self.user.uid}"
+
+    def is_tome(self) -> bool:
+        return True
+
+    def get_event_description(self) -> str:
+        return f"私信 | {self.user.nickname}({self.user.uid}) | {self.summary}"
 
 
 class BasePostEvent(MessageEvent):
     message_type: str = "base_post"
     post: RawPost
 
+    _details: Optional["DetailsHandle"] = PrivateAttr(default=None)
+
+    @property
+    def details(self) -> "DetailsHandle":
+        """
+        帖子详情，await event.details，开启club255_prefetch_details时已经在请求中
+        """
+        if self._details is None:
+            raise ValueError("未登录的Bot无法获取帖子详情")
+        return self._details
+
     @model_validator(mode="before")
     @classmethod
     def _set_post(cls, values: dict):
         values["post"] = values
         return values
 
+    @classmethod
+    def _trusted_values(cls, values: dict, data: BaseModel) -> dict:
+        values = super()._trusted_values(values, data)
+        values["post"] = _post_from_bean(values, data)
+        return values
+
     def get_event_description(self) -> str:
-        return f"帖子 | {self.post.title} | {truncate(self.message)}"
+        return f"帖子 | {self.post.title} | {self.summary}"
 
 
 class PostEvent(MessageEvent):
     message_type: str = "post"
     post: PostInfo
 
+    _details: Optional["DetailsHandle"] = PrivateAttr(default=None)
+
+    @property
+    def details(self) -> "DetailsHandle":
+        """
+        帖子详情，await event.details，开启club255_prefetch_details时已经在请求中
+        """
+        if self._details is None:
+            raise ValueError("未登录的Bot无法获取帖子详情")
+        return self._details
+
     @model_validator(mode="before")
     @classmethod
     def _set_post(cls, values: dict | BaseModel):
@@ -234,8 +387,14 @@ class PostEvent(MessageEvent):
         values["post"] = values
         return values
 
+    @classmethod
+    def _trusted_values(cls, values: dict, data: BaseModel) -> dict:
+        values = super()._trusted_values(values, data)
+        values["post"] = _post_from_bean(values, data)
+        return values
+
     def get_event_description(self) -> str:
-        return f"帖子 | {self.post.title} | {truncate(self.message)}"
+        return f"帖子 | {self.post.title} | {self.summary}"
 
 
 class NewPostEvent(PostEvent):
@@ -244,7 +403,7 @@ class NewPostEvent(PostEvent):
     post: PostInfo
 
     def get_event_description(self) -> str:
-        return f"新帖 | {self.post.title} | {truncate(self.message)}"
+        return f"新帖 | {self.post.title} | {self.summary}"
 
 
 class NewBasePostEvent(BasePostEvent):
@@ -253,7 +412,7 @@ class NewBasePostEvent(BasePostEvent):
     post: RawPost
 
     def get_event_description(self) -> str:
-        return f"新帖 | {self.post.title} | {truncate(self.message)}"
+        return f"新帖 | {self.post.title} | {self.summary}"
 
 
 class NewBaseNicePostEvent(PostEvent):
@@ -262,7 +421,7 @@ class NewBaseNicePostEvent(PostEvent):
     post: PostInfo
 
     def get_event_description(self) -> str:
-        return f"新精华帖 | {self.post.title} | {truncate(self.message)}"
+        return f"新精华帖 | {self.post.title} | {self.summary}"
 
 
 class NewNicePostEvent(BasePostEvent):
@@ -271,4 +430,4 @@ class NewNicePostEvent(BasePostEvent):
     post: RawPost
 
     def get_event_description(self) -> str:
-        return f"新精华帖 | {self.post.title} | {truncate(self.message)}"
+        return f"新精华帖 | {self.post.title} | {self.summary}"
@@ -1,3 +1,5 @@
+from typing import Any
+
 from nonebot.exception import ActionFailed as BaseActionFailed
 from nonebot.exception import NetworkError as BaseNetworkError
 from nonebot.exception import ApiNotAvailable as BaseApiNotAvailable
@@ -11,6 +13,23 @@ class ActionFailed(Club255Exception, BaseActionFailed):
     pass
 
 
+class MediaResolveFailed(ActionFailed):
+    """
+    发送前处理图片/视频失败
+    failures: [(消息段下标, 消息段, 异常)]
+    """
+
+    def __init__(self, failures: list[tuple[int, Any, BaseException]]):
+        self.failures = failures
+        super().__init__("处理媒体失败: " + ", ".join(f"[{index}]{seg} -> {e!r}" for index, seg, e in failures))
+
+
+class JournalExhausted(ActionFailed):
+    """
+    回放时录制的响应已经用完
+    """
+
+
 class NetworkError(Club255Exception, BaseNetworkError):
     pass
 
@@ -1,16 +1,26 @@
+import time
+from typing import Any
 import asyncio
+from datetime import datetime
 from collections.abc import Iterable
 
 from pydantic import BaseModel
+from nonebot.utils import run_sync
 
+from . import store
 from .bot import Bot, BaseBot, UnLoginBot
+from .live import live_watcher
 from .event import (
     Event,
+    PostEvent,
     NewPostEvent,
+    BasePostEvent,
+    PostReplyEvent,
+    FloorReplyEvent,
+    ChatMessageEvent,
     NewBasePostEvent,
     NewNicePostEvent,
     FollowNoticeEvent,
-    OnLiveNoticeEvent,
     SystemNoticeEvent,
     PostLikeNoticeEvent,
     FloorLikeNoticeEvent,
@@ -18,6 +28,18 @@ from .event import (
     SystemNoticeMessageEvent,
 )
 from .types import AccessEventName
+from .metrics import metrics
+from .prefetch import DetailsHandle, prefetcher
+from .profiler import stage, profiler
+
+
+def _record_items(feed: str, new: list, total: int) -> None:
+    metrics.feed_items.inc(feed, "new", amount=len(new))
+    metrics.feed_items.inc(feed, "duplicate", amount=total - len(new))
+    for i in new:
+        if (post_time := getattr(i, "post_time", None)) is not None:
+            lag = (datetime.now(post_time.tzinfo) - post_time).total_seconds()
+            metrics.poll_lag.observe(feed, value=max(lag, 0.0))
 
 
 class _EventFactory:
@@ -26,9 +48,12 @@ class _EventFactory:
     data: dict = {}
 
     @classmethod
-    def build_event(cls, event: type[Event], data: BaseModel, bot: BaseBot) -> Event:
-        data = {**data.model_dump(), "self_uid": bot.get_self_id()}
-        return event.model_validate(data)
+    def build_event(cls, event: type[Event], data: BaseModel, bot: BaseBot, **extra: Any) -> Event:
+        with stage("build"):
+            result = event.from_bean(data, self_uid=bot.get_self_id(), **extra)
+        if isinstance(bot, Bot) and isinstance(result, (PostEvent, BasePostEvent)):
+            result._details = DetailsHandle(bot, result.post.postId)
+        return result
 
     def add_listen(self, events: AccessEventName | Iterable[AccessEventName]):
         if isinstance(events, Iterable):
@@ -42,21 +67,8 @@ class _EventFactory:
         else:
             self.listen.remove(events)
 
-    async def build_new_live_event(self, bot: BaseBot, allow_first: bool) -> tuple:
-        live_info = await bot.get_live_info()
-        if last_live_info := self.data.get("live_info"):
-            if live_info.live_status != last_live_info.live_status and live_info.live_status == 1:
-                self.data["live_info"] = live_info
-                return await asyncio.gather(
-                    *[bot.handle_event(e) for e in [self.build_event(OnLiveNoticeEvent, live_info, bot)]]
-                )
-        else:
-            self.data["live_info"] = live_info
-        if allow_first and live_info.live_status == 1:
-            return await asyncio.gather(
-                *[bot.handle_event(e) for e in [self.build_event(OnLiveNoticeEvent, live_info, bot)]]
-            )
-        return ()
+    async def build_new_live_event(self, bot: BaseBot, allow_first: bool) -> list:
+        return await live_watcher.check(bot, allow_first)
 
     async def build_new_notice_event(self, bot: Bot, allow_first: bool) -> list:
         events = []
@@ -76,26 +88,70 @@ class _EventFactory:
             post_like_list = [i.to_post_like() for i in like_list if i.to_post_like()]
             events.extend([self.build_event(FloorLikeNoticeEvent, i, bot) for i in floor_like_list])
             events.extend([self.build_event(PostLikeNoticeEvent, i, bot) for i in post_like_list])
+        if notices.chats > 0 and "chat" in self.listen:
+            events.extend(await self._build_chat_events(bot))
         if notices.replies > 0:
             reply_list = (await bot.get_reply_list())[: notices.replies]
             floor_reply_list = [i.to_floor_reply() for i in reply_list if i.to_floor_reply()]
             post_reply_list = [i.to_post_reply() for i in reply_list if i.to_post_reply()]
-            events.extend([self.build_event(FloorLikeNoticeEvent, i, bot) for i in floor_reply_list])
-            events.extend([self.build_event(PostLikeNoticeEvent, i, bot) for i in post_reply_list])
+            events.extend([self.build_event(FloorReplyEvent, i, bot) for i in floor_reply_list])
+            events.extend([self.build_event(PostReplyEvent, i, bot) for i in post_reply_list])
 
         if not self.data.get("notice"):
             self.data["notice"] = True
+        metrics.feed_items.inc("notice", "new", amount=len(events))
 
         return await asyncio.gather(*[bot.handle_event(e) for e in events]) if allow_first else []
 
+    async def _build_chat_events(self, bot: Bot) -> list[Event]:
+        """
+        只请求有未读消息的会话，每个会话记录拿到的最新消息id，下次从这里继续
+        第一次见到的会话(新的联系人/重启后)只取最新的unread条，不会把历史消息当成新消息
+        """
+        cursors: dict[int, int] = self.data.setdefault("chat", {})
+        chats = [i for i in await bot.get_chat_list() if i.unread > 0]
+        results = await asyncio.gather(*[bot.get_chat_messages(i.user.uid, cursors.get(i.user.uid, 0)) for i in chats])
+        events = []
+        for chat, messages in zip(chats, results):
+            if not messages:
+                continue
+            cursor = cursors.get(chat.user.uid)
+            messages = sorted((i for i in messages if cursor is None or i.id > cursor), key=lambda x: x.id)
+            if cursor is None:
+                messages = messages[-chat.unread :]
+            if not messages:
+                continue
+            cursors[chat.user.uid] = messages[-1].id
+            events.extend(
+                self.build_event(ChatMessageEvent, i, bot, user=chat.user)
+                for i in messages
+                if i.uid is None or i.uid != bot.get_self_id()
+            )
+        return events
+
+    async def build_new_chat_event(self, bot: Bot, allow_first: bool) -> list:
+        """
+        只监听私信时使用，同时监听notice时由build_new_notice_event处理，避免重复请求notice/count
+        """
+        notices = await bot.get_notice_count()
+        events = await self._build_chat_events(bot) if notices.chats > 0 else []
+        metrics.feed_items.inc("chat", "new", amount=len(events))
+        return await asyncio.gather(*[bot.handle_event(e) for e in events]) if allow_first else []
+
     async def build_new_nice_post_event(self, bot: BaseBot | Bot, allow_first: bool) -> tuple[Event]:
         if isinstance(bot, Bot):
             nice_post_list = await bot.get_nice_post_list_by_time()
         else:
             nice_post_list = await bot.get_nice_post_list_brief_by_time()
+        if store.post_store is not None:
+            await run_sync(store.post_store.add_posts)(nice_post_list)
         if exist_pid := self.data.get("nice_post"):
+            total = len(nice_post_list)
             nice_post_list = list(filter(lambda x: x.id not in exist_pid, nice_post_list))
+            _record_items("nice_post", nice_post_list, total)
             exist_pid.update([i.postId for i in nice_post_list])
+            if isinstance(bot, Bot):
+                prefetcher.prefetch(bot, [i.postId for i in nice_post_list])
             return await asyncio.gather(
                 *[
                     bot.handle_event(e)
@@ -134,9 +190,15 @@ class _EventFactory:
             post_list = await bot.get_post_list()
         else:
             post_list = await bot.get_post_list_brief()
+        if store.post_store is not None:
+            await run_sync(store.post_store.add_posts)(post_list)
         if exist_pid := self.data.get("post"):
+            total = len(post_list)
             post_list = list(filter(lambda x: x.id not in exist_pid, post_list))
+            _record_items("post", post_list, total)
             exist_pid.update([i.postId for i in post_list])
+            if isinstance(bot, Bot):
+                prefetcher.prefetch(bot, [i.postId for i in post_list])
             return await asyncio.gather(
                 *[
                     bot.handle_event(e)
@@ -170,18 +232,29 @@ class _EventFactory:
                 else []
             )
 
+    @staticmethod
+    async def _run_feed(feed: str, func, bot: BaseBot | Bot, allow_first: bool):
+        start = time.perf_counter()
+        try:
+            with profiler.cycle(feed):
+                return await func(bot, allow_first)
+        finally:
+            metrics.poll_duration.observe(feed, value=time.perf_counter() - start)
+
     async def main(self, bot: BaseBot | Bot, allow_first: bool):
         funcs = []
         for etype in self.listen:
-            if etype == "on_live":
-                funcs.append(self.build_new_live_event)
+            if etype == "on_live" and not live_watcher.running:
+                funcs.append((etype, self.build_new_live_event))
             elif etype == "notice" and isinstance(bot, Bot):
-                funcs.append(self.build_new_notice_event)
+                funcs.append((etype, self.build_new_notice_event))
+            elif etype == "chat" and isinstance(bot, Bot) and "notice" not in self.listen:
+                funcs.append((etype, self.build_new_chat_event))
             elif etype == "post":
-                funcs.append(self.build_new_post_event)
+                funcs.append((etype, self.build_new_post_event))
             elif etype == "nice_post":
-                funcs.append(self.build_new_nice_post_event)
-        await asyncio.gather(*[i(bot, allow_first) for i in funcs])  # type: ignore
+                funcs.append((etype, self.build_new_nice_post_event))
+        await asyncio.gather(*[self._run_feed(name, func, bot, allow_first) for name, func in funcs])
 
 
 EventFactory = _EventFactory()
@@ -0,0 +1,97 @@
+import time
+from typing import Any
+from dataclasses import field, dataclass
+from collections.abc import Callable, Awaitable
+
+from nonebot import logger
+
+
+@dataclass
+class ApiCall:
+    """
+    一次API请求的信息，before_request中可以修改headers来传递trace信息
+    trace可以存放任意数据，在同一次请求的各个钩子间共享
+    """
+
+    bot: Any
+    api: str
+    # 去掉参数和id的api，如post/detail/:id
+    endpoint: str
+    method: str
+    data: dict
+    # request: 发送请求 decode: 解析返回的json
+    stage: str = "request"
+    start: float = field(default_factory=time.perf_counter)
+    end: float | None = None
+    request_size: int = 0
+    response_size: int = 0
+    status_code: int | None = None
+    error: BaseException | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+    trace: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float | None:
+        return None if self.end is None else self.end - self.start
+
+
+Hook = Callable[[ApiCall], Awaitable[Any]]
+
+_before_request: list[Hook] = []
+_after_response: list[Hook] = []
+_on_error: list[Hook] = []
+
+
+def on_before_request(func: Hook) -> Hook:
+    _before_request.append(func)
+    return func
+
+
+def on_after_response(func: Hook) -> Hook:
+    _after_response.append(func)
+    return func
+
+
+def on_error(func: Hook) -> Hook:
+    _on_error.append(func)
+    return func
+
+
+def remove_hook(func: Hook) -> None:
+    for hooks in (_before_request, _after_response, _on_error):
+        while func in hooks:
+            hooks.remove(func)
+
+
+def enabled() -> bool:
+    return bool(_before_request or _after_response or _on_error)
+
+
+async def _run(hooks: list[Hook], call: ApiCall) -> None:
+    for hook in hooks:
+        try:
+            await hook(call)
+        except Exception as e:
+            logger.opt(exception=e).error(f"Club255 API钩子执行失败: {hook}")
+
+
+async def run_before_request(call: ApiCall) -> None:
+    await _run(_before_request, call)
+
+
+async def run_after_response(call: ApiCall) -> None:
+    await _run(_after_response, call)
+
+
+async def run_on_error(call: ApiCall) -> None:
+    await _run(_on_error, call)
+
+
+__all__ = [
+    "ApiCall",
+    "on_before_request",
+    "on_after_response",
+    "on_error",
+    "remove_hook",
+    "enabled",
+]
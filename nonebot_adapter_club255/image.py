@@ -0,0 +1,85 @@
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps, ImageDraw, ImageFont
+
+from .message import ImageMsg
+
+# 支持设置质量的格式
+_QUALITY_FORMATS = {"JPEG", "WEBP"}
+
+
+def _draw_watermark(img: Image.Image, text: str, font: Path | None) -> Image.Image:
+    mode = img.mode
+    base = img.convert("RGBA")
+    size = max(12, min(base.size) // 24)
+    try:
+        # 没有字体时用PIL自带的点阵字体，大小固定
+        _font = ImageFont.truetype(str(font), size) if font else ImageFont.load_default()
+    except OSError:
+        _font = ImageFont.load_default()
+    layer = Image.new("RGBA", base.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=_font)
+    margin = size // 2
+    xy = (base.width - (right - left) - margin, base.height - (bottom - top) - margin)
+    draw.text((xy[0] + 1, xy[1] + 1), text, font=_font, fill=(0, 0, 0, 96))
+    draw.text(xy, text, font=_font, fill=(255, 255, 255, 160))
+    base = Image.alpha_composite(base, layer)
+    return base if mode == "RGBA" else base.convert("RGB" if mode not in ("L", "LA") else mode)
+
+
+def process_image(
+    img_msg: ImageMsg,
+    *,
+    max_size: int | None = None,
+    quality: int | None = None,
+    watermark: str | None = None,
+    font: Path | None = None,
+) -> tuple[bytes, str] | None:
+    """
+    缩放/重新压缩/加水印，比较耗时，需要在线程里运行
+    :param max_size: 最长边超过该值时等比缩小
+    :param quality: jpeg/webp的压缩质量
+    :param watermark: 水印文字
+    :param font: 水印字体(ttf)，不设置时中文无法显示
+    :return: (图片, 格式)，不需要处理时返回None
+    """
+    with img_msg.open_file() as file:
+        raw = file if isinstance(file, bytes) else file.read()
+    img = Image.open(BytesIO(raw))
+    fmt = img.format or img_msg.type_.upper()
+    if fmt == "MPO":
+        # 手机拍的照片常是MPO，第一帧就是普通的jpeg
+        fmt = "JPEG"
+    elif getattr(img, "is_animated", False):
+        # 动图不处理
+        return None
+    img.load()
+    # 重新编码会丢掉EXIF，先按EXIF的方向旋转，否则手机拍的照片会是歪的
+    # 不需要重新编码时上传的是原图，EXIF还在
+    img = ImageOps.exif_transpose(img)
+
+    changed = False
+    if max_size and max(img.size) > max_size:
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+        changed = True
+    if watermark:
+        img = _draw_watermark(img, watermark, font)
+        changed = True
+    if not changed and not (quality and fmt in _QUALITY_FORMATS):
+        return None
+
+    out = BytesIO()
+    if quality and fmt in _QUALITY_FORMATS:
+        img.save(out, format=fmt, quality=quality, optimize=True)
+    else:
+        img.save(out, format=fmt, optimize=fmt in ("JPEG", "PNG"))
+    data = out.getvalue()
+    if not changed and len(data) >= len(raw):
+        # 重新压缩反而变大就用原图
+        return None
+    return data, fmt.lower()
+
+
+__all__ = ["process_image"]
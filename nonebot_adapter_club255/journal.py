@@ -0,0 +1,123 @@
+import gzip
+import json
+import time
+import base64
+from typing import IO, Any
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from nonebot.drivers import Response
+
+# 每隔多少秒把缓冲写入文件，gzip每行都flush的话压缩率会很差
+FLUSH_INTERVAL = 5.0
+# 这些接口的请求和返回带账号密码/token，录制时脱敏
+REDACT_APIS = ("auth/",)
+# 任何接口里这些字段都脱敏
+REDACT_KEYS = ("cookie", "authorization")
+REDACTED = "<redacted>"
+
+
+def params_of(data: dict) -> dict:
+    """
+    去掉call_api的控制参数，只保留实际的请求参数
+    """
+    return {k: v for k, v in data.items() if k not in ("method", "raw")}
+
+
+def _redact(value: Any) -> Any:
+    # 只保留结构和非字符串的值(比如code)，回放时还能判断成功与否
+    if isinstance(value, dict):
+        return {k: _redact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(i) for i in value]
+    if isinstance(value, str):
+        return REDACTED
+    return value
+
+
+def _redact_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: REDACTED if k.lower() in REDACT_KEYS else _redact_keys(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_keys(i) for i in value]
+    return value
+
+
+def redact(api: str, params: dict, body: str, encoding: str) -> tuple[dict, str, str]:
+    """
+    录制前脱敏: auth/*的请求参数和返回只保留结构，其他接口去掉cookie/authorization字段
+    """
+    if not api.lstrip("/").startswith(REDACT_APIS):
+        return _redact_keys(params), body, encoding
+    try:
+        body = json.dumps(_redact(json.loads(body)), ensure_ascii=False) if encoding == "utf-8" else REDACTED
+    except ValueError:
+        body = REDACTED
+    return _redact(params), body, "utf-8"
+
+
+class Recorder:
+    """
+    把每次请求和原始返回写入gzip压缩的jsonl
+    每行: {"time", "bot", "api", "method", "params", "status", "body", "encoding"}
+    记录先攒在内存里，每FLUSH_INTERVAL秒交给单独的线程写入，不阻塞事件循环
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._file: IO[str] | None = gzip.open(path, "at", encoding="utf-8")
+        self._last_flush = time.monotonic()
+        self._pending: list[str] = []
+        # 只有一个线程，批次按提交顺序写入
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="club255-journal")
+
+    def _write_lines(self, lines: list[str]) -> None:
+        if self._file is not None:
+            self._file.write("".join(lines))
+            self._file.flush()
+
+    def _submit(self) -> None:
+        lines, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if lines:
+            self._executor.submit(self._write_lines, lines)
+
+    def write(self, self_id: str, api: str, data: dict, resp: Response) -> None:
+        if self._file is None:
+            return
+        content = resp.content or b""
+        if isinstance(content, str):
+            content = content.encode()
+        try:
+            body, encoding = content.decode(), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode(), "base64"
+        params, body, encoding = redact(api, params_of(data), body, encoding)
+        record = {
+            "time": time.time(),
+            "bot": self_id,
+            "api": api,
+            "method": data.get("method") or "GET",
+            "params": params,
+            "status": resp.status_code,
+            "body": body,
+            "encoding": encoding,
+        }
+        self._pending.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self._submit()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._submit()
+            self._executor.shutdown(wait=True)
+            self._file.close()
+            self._file = None
+
+
+# 由Adapter根据club255_record_path设置
+recorder: Recorder | None = None
+
+
+__all__ = ["Recorder", "params_of", "redact", "recorder"]
@@ -0,0 +1,112 @@
+import time
+import asyncio
+
+from nonebot import logger
+
+from .bot import BaseBot
+from .bean import LiveInfo
+from .event import Event, LiveNoticeEvent, OnLiveNoticeEvent, OffLiveNoticeEvent, LiveUpdateNoticeEvent
+from .metrics import metrics
+from .profiler import stage, profiler
+
+# 开播时变化会触发LiveUpdateNoticeEvent的字段
+WATCH_FIELDS = ("keyframe", "user_cover")
+
+
+class LiveWatcher:
+    """
+    单独轮询直播间，开播/下播要连续debounce次拿到相同状态才确认
+    接口偶尔返回错的状态时不会重复触发开播/下播
+    """
+
+    def __init__(self, interval: int = 10, debounce: int = 2):
+        self.interval = interval
+        self.debounce = debounce
+        # 已确认的直播间状态
+        self.live_info: LiveInfo | None = None
+        # 待确认的状态和连续次数
+        self.pending: int | None = None
+        self.count = 0
+        self.running = False
+
+    def setup(self, interval: int, debounce: int) -> None:
+        self.interval = interval
+        self.debounce = max(debounce, 1)
+
+    def reset(self) -> None:
+        self.live_info = None
+        self.pending = None
+        self.count = 0
+
+    def update(self, live_info: LiveInfo, allow_first: bool) -> list[tuple[type[LiveNoticeEvent], list[str]]]:
+        """
+        根据新拿到的直播间信息更新状态
+        :return: 需要触发的事件类型和变化的字段
+        """
+        last = self.live_info
+        if last is None:
+            self.live_info = live_info
+            if allow_first and live_info.live_status == 1:
+                return [(OnLiveNoticeEvent, [])]
+            return []
+
+        if live_info.live_status != last.live_status:
+            if self.pending != live_info.live_status:
+                self.pending, self.count = live_info.live_status, 0
+            self.count += 1
+            if self.count < self.debounce:
+                return []
+            self.pending, self.count = None, 0
+            self.live_info = live_info
+            if live_info.live_status == 1:
+                return [(OnLiveNoticeEvent, [])]
+            if last.live_status == 1:
+                return [(OffLiveNoticeEvent, [])]
+            return []
+
+        # 状态没变，之前待确认的抖动作废
+        self.pending, self.count = None, 0
+        self.live_info = live_info
+        if live_info.live_status != 1:
+            return []
+        if changed := [i for i in WATCH_FIELDS if getattr(live_info, i) != getattr(last, i)]:
+            return [(LiveUpdateNoticeEvent, changed)]
+        return []
+
+    async def check(self, bot: BaseBot, allow_first: bool) -> list:
+        """
+        获取一次直播间信息，处理需要触发的事件
+        """
+        live_info = await bot.get_live_info()
+        events: list[Event] = []
+        for event, changed in self.update(live_info, allow_first):
+            extra = {"changed": changed} if event is LiveUpdateNoticeEvent else {}
+            with stage("build"):
+                events.append(event.from_bean(live_info, self_uid=bot.get_self_id(), **extra))
+        return await asyncio.gather(*[bot.handle_event(e) for e in events])
+
+    async def run(self, bot: BaseBot, allow_first: bool) -> None:
+        """
+        按interval一直轮询直播间，运行期间EventFactory.main不再获取直播间
+        """
+        self.running = True
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    with profiler.cycle("on_live"):
+                        await self.check(bot, allow_first)
+                except Exception as e:
+                    logger.error(f"Club255:{bot.self_id} -> 获取直播间失败:{e}")
+                    logger.exception(e)
+                finally:
+                    metrics.poll_duration.observe("on_live", value=time.perf_counter() - start)
+                allow_first = True
+                await asyncio.sleep(self.interval)
+        finally:
+            self.running = False
+
+
+live_watcher = LiveWatcher()
+
+__all__ = ["LiveWatcher", "live_watcher", "WATCH_FIELDS"]
@@ -1,9 +1,14 @@
 from io import BytesIO
 import re
 from copy import deepcopy
-from typing import Type
+import mmap
+from typing import IO, Type
+import hashlib
 from pathlib import Path
-from collections.abc import Iterable
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+from collections.abc import Iterable, Iterator
 from xml.dom.minidom import Text as XmlText
 from xml.etree.ElementTree import Element
 
@@ -14,7 +19,8 @@ from nonebot.adapters import MessageSegment as BaseMessageSegment
 from nonebot.internal.adapter.message import TM, TMS
 
 from .data import Tag, Face, TagEnum, FaceEnum
-from .utils import unescape, set_father_tag
+from .utils import unescape, set_father_tag, sniff_image_type
+from .profiler import stage
 from .exception import (
     NoTagException,
     NoFaceException,
@@ -22,6 +28,10 @@ from .exception import (
     VideoUnUploadException,
 )
 
+_MEDIA_PLACEHOLDER = re.compile(r"\[(视频|图片)]")
+# 解析html时相对地址的基准，由Adapter根据club255_url设置
+base_url = "https://ihan.club/"
+
 
 class _ImgUrlCheck(BaseModel):
     url: AnyUrl
@@ -191,10 +201,13 @@ class VideoMsg(MessageSegment):
 
 class ImageMsg(MessageSegment):
     """
-    目前没法添加水印，上水印是本地进行的
+    水印是上传前在本地添加的
+    本地文件只记录路径，上传时才读取
     """
 
     type = "image"
+    # 超过这个大小的本地文件上传时直接传文件对象，计算hash时用mmap
+    MMAP_THRESHOLD = 1024 * 1024
 
     def __repr__(self) -> str:
         return super(MessageSegment).__repr__()
@@ -210,7 +223,15 @@ class ImageMsg(MessageSegment):
 
     @property
     def file(self) -> bytes | None:
-        return self.data["file"]
+        if self.data["file"] is not None:
+            return self.data["file"]
+        if self.path is not None:
+            return self.path.read_bytes()
+        return None
+
+    @property
+    def path(self) -> Path | None:
+        return self.data.get("path")
 
     @property
     def url(self) -> str | None:
@@ -220,12 +241,46 @@ class ImageMsg(MessageSegment):
     def type_(self) -> str:
         return self.data["type"]
 
+    @property
+    def watermark(self) -> bool:
+        return self.data["watermark"]
+
     def check(self) -> bool:
         return bool(self.url)
 
+    @contextmanager
+    def open_file(self) -> Iterator[bytes | IO[bytes]]:
+        """
+        上传时使用，大文件直接给出文件对象，避免整个读入内存
+        """
+        if self.data["file"] is not None or self.path is None:
+            yield self.data["file"]
+            return
+        with self.path.open("rb") as f:
+            # 文件对象能让httpx拿到Content-Length，mmap不行
+            yield f.read() if self.path.stat().st_size < self.MMAP_THRESHOLD else f
+
+    def digest(self) -> str:
+        """
+        图片内容的sha256，用于上传缓存，大文件通过mmap映射计算
+        """
+        if self.data.get("digest") is None:
+            if self.data["file"] is not None or self.path is None:
+                digest = hashlib.sha256(self.data["file"])
+            else:
+                with self.path.open("rb") as f:
+                    if self.path.stat().st_size < self.MMAP_THRESHOLD:
+                        digest = hashlib.sha256(f.read())
+                    else:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            digest = hashlib.sha256(mm)  # type: ignore
+            self.data["digest"] = digest.hexdigest()
+        return self.data["digest"]
+
     def __init__(self, file: str | bytes | BytesIO | Path, watermark: bool = False):
         url = None
         type_ = None
+        path = None
         if isinstance(file, str):
             try:
                 _url = _ImgUrlCheck.model_validate({"url": file})
@@ -236,15 +291,33 @@ class ImageMsg(MessageSegment):
                 file = Path(file)
 
         if isinstance(file, Path):
-            img = Image.open(file)
-            file = BytesIO()
-            img.save(file, format=img.format)
-            type_ = img.format.lower()
-        if isinstance(file, BytesIO):
+            path = file
+            with path.open("rb") as f:
+                type_ = sniff_image_type(f.read(32))
+            file = None
+        elif isinstance(file, BytesIO):
             file = file.getvalue()
-        if type_ is None:
-            type_ = Image.open(file).format.lower()
-        super().__init__(self.type, {"file": file, "type": type_, "url": url, "watermark": watermark})
+        if isinstance(file, bytes) and type_ is None:
+            type_ = sniff_image_type(file[:32])
+        if type_ is None and url is None:
+            # 不认识的魔数才交给PIL，PIL只读文件头
+            type_ = Image.open(path or BytesIO(file)).format.lower()
+        super().__init__(
+            self.type,
+            {"file": file, "path": path, "type": type_, "url": url, "watermark": watermark},
+        )
+
+    @classmethod
+    def from_url(cls, url: str, watermark: bool = False) -> "ImageMsg":
+        """
+        只有url的图片，url无效时也不会当作本地路径(用于解析远程内容)
+        """
+        msg = cls.__new__(cls)
+        super(ImageMsg, msg).__init__(
+            cls.type,
+            {"file": None, "path": None, "type": urlparse(url).path.split(".")[-1], "url": url, "watermark": watermark},
+        )
+        return msg
 
     @classmethod
     def get_message_class(cls) -> Type["ImageMsg"]:
@@ -488,10 +561,30 @@ class Message(BaseMessage[MessageSegment]):
 
     @staticmethod
     def join_url(data: dict):
-        for i in data.get("videos", []):
-            data["content"] = data["content"].replace("[视频]", f"[视频:{i}]", 1)
-        for i in data.get("primaryPictures", []) or data.get("pictures", []):
-            data["content"] = data["content"].replace("[图片]", f"[图片:{i}]", 1)
+        """
+        按顺序把content中的[视频]/[图片]替换为[视频:bv]/[图片:url]，只扫描一遍
+        """
+        videos = iter(data.get("videos") or ())
+        pictures = iter(data.get("primaryPictures") or data.get("pictures") or ())
+
+        def _fill(match: re.Match) -> str:
+            type_ = match.group(1)
+            for i in videos if type_ == "视频" else pictures:
+                return f"[{type_}:{i}]"
+            return match.group(0)
+
+        if data.get("videos") or data.get("primaryPictures") or data.get("pictures"):
+            data["content"] = _MEDIA_PLACEHOLDER.sub(_fill, data["content"])
+
+    @classmethod
+    def from_html(cls, html: str, base: str | None = None) -> "Message":
+        """
+        解析编辑器生成的html(如PostDetails.content)为Message
+        :param base: 相对地址的基准，默认为club255_url
+        """
+        parser = HtmlMessageParser(base)
+        parser.feed(html)
+        return parser.get_message()
 
     def xml(self) -> str:
         msgs = []
@@ -567,14 +660,152 @@ class Message(BaseMessage[MessageSegment]):
                 else:
                     yield "face", i.group("type")
 
-        for type_, data in _split(msg):
-            if type_ == "text":
-                yield TextMsg(data)
-            elif type_ == "tag":
-                yield TagMsg(data, strict=False)
-            elif type_ == "face":
-                yield FaceMsg(data, strict=False)
-            elif type_ == "video":
-                yield VideoMsg(data)
+        with stage("construct"):
+            for type_, data in _split(msg):
+                if type_ == "text":
+                    yield TextMsg(data)
+                elif type_ == "tag":
+                    yield TagMsg(data, strict=False)
+                elif type_ == "face":
+                    yield FaceMsg(data, strict=False)
+                elif type_ == "video":
+                    yield VideoMsg(data)
+                else:
+                    yield ImageMsg(data)
+
+
+def _resolve_url(src: str, base: str) -> str | None:
+    # 相对地址按base补全，只接受http(s)，data:等其他地址忽略
+    if not src:
+        return None
+    url = urljoin(base, src)
+    return url if urlparse(url).scheme in ("http", "https") else None
+
+
+class HtmlMessageParser(HTMLParser):
+    """
+    增量解析编辑器生成的html，可以分多次feed，整体是线性时间
+    <p>/<br> -> 换行, <strong>/<em> -> TextMsg, emoticon-img -> FaceMsg,
+    editor-hash-tag -> TagMsg, upload-img -> ImageMsg/VideoMsg, editor-link -> LinkMsg
+    图片地址都按url处理，不会读取本地文件
+    """
+
+    def __init__(self, base: str | None = None) -> None:
+        """
+        :param base: 相对地址的基准，默认为club255_url
+        """
+        super().__init__(convert_charrefs=True)
+        self.base = base or base_url
+        self.message = Message()
+        # 相同样式的连续文本先缓存，最后一次性join
+        self._texts: list[str] = []
+        self._style: tuple[bool, bool] = (False, False)
+        self._strong = 0
+        self._em = 0
+        self._started = False
+        self._new_line = False
+        # 正在收集文本的<a>标签: (class, attrs, texts)
+        self._link: tuple[str, dict, list[str]] | None = None
+        # 视频块后面紧跟的editor-link是视频标题
+        self._video: VideoMsg | None = None
+
+    def _flush(self) -> None:
+        if self._texts:
+            strong, em = self._style
+            self.message.append(TextMsg("".join(self._texts), strong=strong, em=em))
+            self._texts = []
+
+    def _push_text(self, text: str) -> None:
+        style = (self._strong > 0, self._em > 0)
+        if style != self._style:
+            self._flush()
+            self._style = style
+        if self._new_line:
+            self._texts.append("\n")
+            self._new_line = False
+        self._texts.append(text)
+        self._started = True
+        self._video = None
+
+    def _push(self, seg: MessageSegment) -> None:
+        if self._new_line:
+            self._texts.append("\n")
+            self._new_line = False
+        self._flush()
+        self.message.append(seg)
+        self._started = True
+        self._video = seg if isinstance(seg, VideoMsg) else None
+
+    def _break(self) -> None:
+        if self._started:
+            self._new_line = True
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attr = {k: v or "" for k, v in attrs}
+        classes = attr.get("class", "").split()
+        if tag == "p":
+            self._break()
+        elif tag == "br":
+            if "ProseMirror-trailingBreak" not in classes:
+                self._break()
+        elif tag in ("strong", "b"):
+            self._strong += 1
+        elif tag in ("em", "i"):
+            self._em += 1
+        elif tag == "img":
+            src = _resolve_url(attr.get("src", ""), self.base)
+            if "emoticon-img" in classes:
+                name = attr.get("data-emotion-name") or attr.get("alt", "")
+                self._push(FaceMsg(name, url=src, strict=False))
+            elif "upload-img" in classes and attr.get("data-bv"):
+                self._push(VideoMsg(attr["data-bv"], cover=src))
+            elif "ProseMirror-separator" not in classes and src:
+                self._push(ImageMsg.from_url(src))
+        elif tag == "a":
+            if "editor-hash-tag" in classes:
+                self._link = ("tag", attr, [])
+            else:
+                self._link = ("link", attr, [])
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in ("strong", "b"):
+            self._strong = max(self._strong - 1, 0)
+        elif tag in ("em", "i"):
+            self._em = max(self._em - 1, 0)
+        elif tag == "a" and self._link is not None:
+            type_, attr, texts = self._link
+            self._link = None
+            text = "".join(texts)
+            if type_ == "tag":
+                name = attr.get("data-label") or text.lstrip("#")
+                if attr.get("data-id", "").isdigit():
+                    self._push(TagMsg(Tag(int(attr["data-id"]), name)))
+                else:
+                    self._push(TagMsg(name, strict=False))
+            elif self._video is not None:
+                self._video.data["title"] = text
+                if href := attr.get("href"):
+                    self._video.data["url"] = href
+                self._video = None
             else:
-                yield ImageMsg(data)
+                self._push(LinkMsg(text, attr.get("href", "")))
+
+    def handle_data(self, data: str) -> None:
+        data = data.replace("\xa0", " ")
+        if self._link is not None:
+            self._link[2].append(data)
+        elif data:
+            self._push_text(data)
+
+    def get_message(self) -> Message:
+        """
+        结束解析并返回Message
+        """
+        self.close()
+        self._flush()
+        if len(self.message) == 0:
+            self.message.append(TextMsg(""))
+        return self.message
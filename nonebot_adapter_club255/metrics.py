@@ -0,0 +1,139 @@
+import re
+from bisect import bisect_left
+from collections.abc import Iterable
+
+# 请求耗时/轮询耗时的分桶 单位:秒
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 新帖子从发布到被获取的延迟 单位:秒
+LAG_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+_NUMBER = re.compile(r"(?<=/)\d+(?=/|$)")
+
+
+def normalize_api(api: str) -> str:
+    """
+    post/detail/123?a=1 -> post/detail/:id，避免每个id都是一个标签
+    """
+    return _NUMBER.sub(":id", api.split("?", 1)[0].strip("/"))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(str(v))}"' for k, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type_ = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_}"]
+
+
+class Counter(_Metric):
+    type_ = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines.extend(f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in self.values.items())
+        return lines
+
+
+class Gauge(Counter):
+    type_ = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        # labels -> [每个桶的数量..., +Inf桶], 总和
+        self.counts: dict[tuple[str, ...], list[int]] = {}
+        self.sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        if (counts := self.counts.get(labels)) is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] = self.sums.get(labels, 0.0) + value
+
+    def count(self, *labels: str) -> int:
+        return sum(self.counts.get(labels, ()))
+
+    def sum(self, *labels: str) -> float:
+        return self.sums.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, counts in self.counts.items():
+            total = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                total += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {total}")
+        return lines
+
+
+class Metrics:
+    """
+    适配器的运行指标，metrics.render()导出为prometheus文本格式
+    """
+
+    def __init__(self):
+        self.api_requests = Counter("club255_api_requests_total", "API请求数", ("api", "method"))
+        self.api_errors = Counter("club255_api_errors_total", "API请求失败数", ("api", "method"))
+        self.api_latency = Histogram("club255_api_request_seconds", "API请求耗时", ("api", "method"))
+        self.poll_duration = Histogram("club255_poll_cycle_seconds", "每轮获取事件的耗时", ("feed",))
+        self.poll_lag = Histogram("club255_poll_lag_seconds", "新内容发布到被获取的延迟", ("feed",), LAG_BUCKETS)
+        self.feed_items = Counter("club255_feed_items_total", "获取到的内容数", ("feed", "kind"))
+        self.events = Counter("club255_events_total", "分发的事件数", ("event",))
+        self.handle_time = Histogram("club255_handle_event_seconds", "处理事件的耗时", ("event",))
+        self.send_queue = Gauge("club255_send_queue_size", "发送队列中等待的消息数", ("bot",))
+        self.send_wait = Histogram("club255_send_wait_seconds", "消息从提交到发送的等待时间", ("bot",))
+
+    def __iter__(self):
+        return iter(i for i in self.__dict__.values() if isinstance(i, _Metric))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self for line in metric.render()) + "\n"
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+metrics = Metrics()
+
+__all__ = ["Counter", "Gauge", "Histogram", "Metrics", "metrics", "normalize_api"]
@@ -0,0 +1,78 @@
+from typing import Any, TypeVar
+import asyncio
+from datetime import datetime
+from collections.abc import Callable, Awaitable, AsyncIterator
+
+Item = TypeVar("Item")
+
+Stop = Callable[[Any], bool]
+
+
+def until_post_id(pid: int) -> Stop:
+    """
+    遇到postId <= pid的项时停止，用于只扫描比pid新的帖子
+    """
+    return lambda item: item.postId <= pid
+
+
+def _aware(value: datetime) -> datetime:
+    # 没有时区的当作本地时间
+    return value if value.tzinfo is not None else value.astimezone()
+
+
+def until_time(time: datetime) -> Stop:
+    """
+    遇到时间早于time的项时停止，帖子用post_time，通知/点赞/回复用time
+    """
+    time = _aware(time)
+
+    def _stop(item: Any) -> bool:
+        return _aware(getattr(item, "post_time", None) or item.time) < time
+
+    return _stop
+
+
+async def iter_pages(
+    fetch: Callable[[int], Awaitable[list[Item]]],
+    *,
+    page_size: int,
+    start: int = 1,
+    until: Stop | None = None,
+    max_pages: int | None = None,
+    prefetch: bool = True,
+) -> AsyncIterator[Item]:
+    """
+    逐项遍历分页接口，处理当前页时已经在请求下一页
+    :param fetch: 获取某一页的函数
+    :param page_size: 每页数量，返回的数量小于它时认为是最后一页
+    :param start: 第一页的页码，站内通知从0开始
+    :param until: 返回True时停止(该项不会返回)
+    :param max_pages: 最多请求的页数
+    :param prefetch: 是否提前请求下一页
+    """
+    page = start
+    task: asyncio.Task[list[Item]] | None = asyncio.ensure_future(fetch(page))
+    try:
+        while task is not None:
+            items = await task
+            task = None
+            fetched = page - start + 1
+            if prefetch and len(items) >= page_size and (max_pages is None or fetched < max_pages):
+                task = asyncio.ensure_future(fetch(page + 1))
+            for item in items:
+                if until is not None and until(item):
+                    return
+                yield item
+            if len(items) < page_size or (max_pages is not None and fetched >= max_pages):
+                return
+            page += 1
+            if task is None:
+                task = asyncio.ensure_future(fetch(page))
+    finally:
+        # 提前停止时取消预取的下一页，并等它结束，异常不会没人处理
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+__all__ = ["iter_pages", "until_post_id", "until_time"]
@@ -24,6 +24,7 @@ def Target_User_Post(uid: UID) -> Permission:
     """
     只获取指定用户的帖子
     """
+    uid = int(uid)
 
     async def _(event: PostEvent):
         return event.post.author.uid == uid
@@ -31,6 +32,18 @@ def Target_User_Post(uid: UID) -> Permission:
     return Permission(_)
 
 
+def Post_Type(*types: int) -> Permission:
+    """
+    帖子类型在types中，一次检查代替多个POST_*相或
+    """
+    types_ = frozenset(types)
+
+    async def _(event: PostEvent):
+        return event.post.type in types_
+
+    return Permission(_)
+
+
 """生日帖"""
 POST_BIRTHDAY: Permission = Permission(_birthday_post)
 """新人帖"""
@@ -44,6 +57,7 @@ POST_HANSER: Permission = Target_User_Post(1)
 
 __all__ = [
     "Target_User_Post",
+    "Post_Type",
     "POST_BIRTHDAY",
     "POST_NEW_USER",
     "POST_LEVEL",
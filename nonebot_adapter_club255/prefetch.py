@@ -0,0 +1,85 @@
+from typing import TYPE_CHECKING, Any
+import asyncio
+from collections.abc import Generator
+
+from .bean import PostDetails
+from .cache import LRUCache
+from .types import PID
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+
+class DetailsPrefetcher:
+    """
+    新帖一出现就并发获取详情，handler里await时已经在请求中或者已经拿到了
+    结果按pid缓存，同一个帖子同时只会请求一次，失败的不会缓存
+    """
+
+    def __init__(self, maxsize: int = 128, concurrency: int = 4):
+        self.enabled = False
+        self.cache: LRUCache[int, asyncio.Future[PostDetails]] = LRUCache(maxsize)
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def setup(self, enabled: bool, maxsize: int, concurrency: int) -> None:
+        self.enabled = enabled
+        self.cache = LRUCache(maxsize)
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch(self, bot: "Bot", pid: int) -> PostDetails:
+        async with self.semaphore:
+            return await bot.get_post_details(pid)
+
+    def _done(self, pid: int, future: asyncio.Future) -> None:
+        # 取一次exception，没人await时也不会报"exception was never retrieved"
+        if future.cancelled() or future.exception() is not None:
+            if self.cache.get(pid) is future:
+                self.cache.pop(pid)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        还在请求中的帖子数
+        """
+        return sum(not i.done() for i in self.cache.values())
+
+    def fetch(self, bot: "Bot", pid: PID) -> asyncio.Future[PostDetails]:
+        """
+        获取帖子详情，已经在请求或者已经缓存时直接返回
+        """
+        pid = int(pid)
+        if (future := self.cache.get(pid)) is not None:
+            return future
+        future = asyncio.ensure_future(self._fetch(bot, pid))
+        future.add_done_callback(lambda f: self._done(pid, f))
+        self.cache.set(pid, future)
+        return future
+
+    def prefetch(self, bot: "Bot", pids: list[PID]) -> None:
+        """
+        开启club255_prefetch_details时才会提前请求
+        """
+        if self.enabled:
+            for pid in pids:
+                self.fetch(bot, pid)
+
+
+class DetailsHandle:
+    """
+    可以直接await的帖子详情，第一次await时才请求(开启预取时已经在请求中)
+    """
+
+    __slots__ = ("bot", "pid")
+
+    def __init__(self, bot: "Bot", pid: PID):
+        self.bot = bot
+        self.pid = pid
+
+    def __await__(self) -> Generator[Any, None, PostDetails]:
+        # 多个handler共用同一个请求，一个取消(比如wait_for超时)时不能取消其他的
+        return asyncio.shield(prefetcher.fetch(self.bot, self.pid)).__await__()
+
+
+prefetcher = DetailsPrefetcher()
+
+__all__ = ["DetailsPrefetcher", "DetailsHandle", "prefetcher"]
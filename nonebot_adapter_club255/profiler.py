@@ -0,0 +1,189 @@
+import time
+from types import TracebackType
+from collections import deque
+from contextvars import ContextVar
+
+from nonebot import logger
+
+# 拉取数据的各个阶段
+STAGES = ("network", "json", "validate", "construct", "build", "dispatch")
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class _Frame:
+    __slots__ = ("name", "start", "children", "parent")
+
+    def __init__(self, name: str, parent: "_Frame | None"):
+        self.name = name
+        self.start = time.perf_counter()
+        self.children = 0.0
+        self.parent = parent
+
+
+class _Cycle:
+    """
+    一次轮询中某个feed的耗时，同一个feed里gather出来的task共用一个_Cycle
+    """
+
+    __slots__ = ("feed", "start", "stages")
+
+    def __init__(self, feed: str):
+        self.feed = feed
+        self.start = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+
+_cycle: ContextVar[_Cycle | None] = ContextVar("club255_profile_cycle", default=None)
+_frame: ContextVar[_Frame | None] = ContextVar("club255_profile_frame", default=None)
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        return None
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    """
+    记录的是阶段的独占时间，嵌套的子阶段(比如validate里的construct)会从父阶段中扣掉
+    并发的子阶段会重叠计算，所以各阶段之和可能和整个周期的耗时对不上
+    """
+
+    __slots__ = ("cycle", "name", "frame")
+
+    def __init__(self, cycle: _Cycle, name: str):
+        self.cycle = cycle
+        self.name = name
+        self.frame: _Frame | None = None
+
+    def __enter__(self) -> None:
+        self.frame = _Frame(self.name, _frame.get())
+        _frame.set(self.frame)
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        frame = self.frame
+        elapsed = time.perf_counter() - frame.start
+        if frame.parent is not None:
+            frame.parent.children += elapsed
+        # 生成器里的stage可能在别的context中结束，所以不用token.reset
+        _frame.set(frame.parent)
+        stages = self.cycle.stages
+        stages[self.name] = stages.get(self.name, 0.0) + max(elapsed - frame.children, 0.0)
+
+
+def stage(name: str) -> _Stage | _NoopStage:
+    """
+    标记一个阶段，不在profile的周期内时什么都不做
+    :param name: 阶段名，见STAGES
+    """
+    cycle = _cycle.get()
+    if cycle is None:
+        return _NOOP
+    return _Stage(cycle, name)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+class Profiler:
+    def __init__(self, window: int = 100, log_interval: float = 600):
+        self.enabled = False
+        self.window = window
+        self.log_interval = log_interval
+        # feed -> stage -> 最近window次周期的耗时，"total"为整个周期
+        self.samples: dict[str, dict[str, deque[float]]] = {}
+        self._last_log = time.monotonic()
+
+    def setup(self, enabled: bool, window: int, log_interval: float) -> None:
+        self.enabled = enabled
+        self.window = window
+        self.log_interval = log_interval
+        self.samples.clear()
+
+    def cycle(self, feed: str) -> "_CycleScope":
+        """
+        在一次feed轮询外层使用，周期结束时把各阶段耗时记录下来
+        """
+        return _CycleScope(self, feed)
+
+    def _record(self, cycle: _Cycle, total: float) -> None:
+        feed = self.samples.setdefault(cycle.feed, {})
+        for name, value in (("total", total), *((i, cycle.stages.get(i, 0.0)) for i in STAGES)):
+            if (samples := feed.get(name)) is None:
+                samples = feed[name] = deque(maxlen=self.window)
+            samples.append(value)
+        if self.log_interval and time.monotonic() - self._last_log >= self.log_interval:
+            self._last_log = time.monotonic()
+            self.log_summary()
+
+    def percentiles(self, feed: str) -> dict[str, dict[float, float]]:
+        """
+        获取某个feed各阶段的耗时分位数
+        :return: {stage: {0.5: p50, 0.9: p90, 0.99: p99}} 单位:秒
+        """
+        return {
+            name: {q: _percentile(list(samples), q) for q in PERCENTILES}
+            for name, samples in self.samples.get(feed, {}).items()
+        }
+
+    def summary(self) -> dict[str, dict[str, dict[float, float]]]:
+        return {feed: self.percentiles(feed) for feed in self.samples}
+
+    def log_summary(self) -> None:
+        for feed, stages in self.summary().items():
+            parts = " ".join(
+                f"{name}={values[0.5] * 1000:.1f}/{values[0.9] * 1000:.1f}/{values[0.99] * 1000:.1f}"
+                for name, values in stages.items()
+            )
+            logger.info(f"Club255 profile <{feed}> p50/p90/p99(ms): {parts}")
+
+
+class _CycleScope:
+    __slots__ = ("profiler", "feed", "cycle")
+
+    def __init__(self, profiler: Profiler, feed: str):
+        self.profiler = profiler
+        self.feed = feed
+        self.cycle: _Cycle | None = None
+
+    def __enter__(self) -> None:
+        if self.profiler.enabled:
+            self.cycle = _Cycle(self.feed)
+            _cycle.set(self.cycle)
+            _frame.set(None)
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self.cycle is not None:
+            _cycle.set(None)
+            self.profiler._record(self.cycle, time.perf_counter() - self.cycle.start)
+
+
+profiler = Profiler()
+
+__all__ = ["STAGES", "Profiler", "profiler", "stage"]
@@ -0,0 +1,141 @@
+import gzip
+import json
+import base64
+from typing import Any
+import asyncio
+from pathlib import Path
+from collections import deque
+
+from nonebot import logger
+from nonebot.drivers import Response
+
+from .bot import Bot
+from .factory import EventFactory, _EventFactory
+from .journal import params_of
+from .metrics import normalize_api
+from .profiler import stage
+from .exception import JournalExhausted
+
+
+def _key(method: str, api: str, params: dict) -> str:
+    return f"{method} {api} {json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+class _Entry:
+    __slots__ = ("time", "status", "content", "used")
+
+    def __init__(self, record: dict):
+        self.time: float = record["time"]
+        self.status: int = record["status"]
+        body: str = record["body"]
+        self.content = base64.b64decode(body) if record.get("encoding") == "base64" else body.encode()
+        self.used = False
+
+
+class Journal:
+    """
+    读取录制的jsonl，按请求返回录制的响应
+    同一个请求(method+api+参数)按录制顺序依次返回，找不到完全一样的请求时退回到同一个接口的下一条记录
+    """
+
+    def __init__(self, records: list[dict]):
+        self.records = records
+        self.entries: deque[_Entry] = deque()
+        self._exact: dict[str, deque[_Entry]] = {}
+        self._endpoint: dict[str, deque[_Entry]] = {}
+        for record in records:
+            entry = _Entry(record)
+            self.entries.append(entry)
+            self._exact.setdefault(_key(record["method"], record["api"], record["params"]), deque()).append(entry)
+            self._endpoint.setdefault(f"{record['method']} {normalize_api(record['api'])}", deque()).append(entry)
+
+    @classmethod
+    def load(cls, path: Path) -> "Journal":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    @property
+    def bot_id(self) -> str | None:
+        return self.records[0]["bot"] if self.records else None
+
+    def remaining(self) -> int:
+        while self.entries and self.entries[0].used:
+            self.entries.popleft()
+        return sum(not i.used for i in self.entries)
+
+    def next_time(self) -> float | None:
+        self.remaining()
+        return self.entries[0].time if self.entries else None
+
+    @staticmethod
+    def _pop(queue: deque[_Entry] | None) -> _Entry | None:
+        while queue:
+            entry = queue.popleft()
+            if not entry.used:
+                entry.used = True
+                return entry
+        return None
+
+    def response(self, api: str, data: dict) -> Response:
+        method = data.get("method") or "GET"
+        entry = self._pop(self._exact.get(_key(method, api, params_of(data))))
+        if entry is None:
+            entry = self._pop(self._endpoint.get(f"{method} {normalize_api(api)}"))
+        if entry is None:
+            raise JournalExhausted(f"回放记录中没有<{method} {api}>的响应")
+        return Response(entry.status, content=entry.content)
+
+
+class ReplayBot(Bot):
+    """
+    不访问网络，所有请求都从Journal中取
+    """
+
+    def __init__(self, *, journal: Journal, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.journal = journal
+
+    async def call_api(self, api: str, **data: Any) -> Any:
+        resp = self.journal.response(api, data)
+        if data.get("raw") and data.get("raw") is True:
+            return resp
+        with stage("json"):
+            return json.loads(resp.content)
+
+
+async def replay(
+    bot: ReplayBot,
+    speed: float | None = None,
+    factory: _EventFactory = EventFactory,
+    allow_first: bool | None = None,
+) -> int:
+    """
+    用录制的响应驱动EventFactory，直到记录用完
+    :param bot: ReplayBot
+    :param speed: 回放倍速，None或0为不等待，尽快回放
+    :param factory: EventFactory
+    :param allow_first: 第一轮是否处理事件，None时使用club255_run_now
+    :return: 回放的轮数
+    """
+    journal = bot.journal
+    allow = bot.config.club255_run_now if allow_first is None else allow_first
+    cycles = 0
+    while journal.remaining():
+        before = journal.remaining()
+        cycle_time = journal.next_time()
+        try:
+            await factory.main(bot, allow)
+        except JournalExhausted as e:
+            logger.debug(f"Club255 回放结束: {e}")
+            break
+        cycles += 1
+        allow = True
+        if journal.remaining() == before:
+            logger.warning("Club255 回放记录和监听的事件对不上，没有消耗任何记录")
+            break
+        if speed and (next_time := journal.next_time()) is not None:
+            await asyncio.sleep(max(next_time - cycle_time, 0.0) / speed)
+    return cycles
+
+
+__all__ = ["Journal", "ReplayBot", "replay"]
@@ -0,0 +1,212 @@
+from heapq import merge
+from bisect import insort
+from itertools import count
+from dataclasses import field, dataclass
+from collections.abc import Callable, Iterable, Awaitable
+
+from nonebot import logger
+from nonebot.rule import Rule
+from nonebot.typing import T_State
+from nonebot.matcher import Matcher
+from nonebot.adapters import Bot as RawBot
+
+from .event import Event, PostEvent, BasePostEvent
+from .types import UID
+
+Handler = Callable[..., Awaitable[bool | None]]
+# 登录和未登录Bot的帖子事件
+POST_EVENTS = (PostEvent, BasePostEvent)
+# 规则检查时匹配到的路由，存在state里给处理函数用
+_ROUTES = "_club255_routes"
+
+
+@dataclass(slots=True)
+class Route:
+    handler: Handler
+    events: tuple[type[Event], ...]
+    # 0普通帖子, 1 等级贴, 2 新人贴, 3生日帖
+    post_types: frozenset[int] | None
+    uids: frozenset[int] | None
+    priority: int
+    block: bool
+    order: int = field(default=0)
+
+    def check(self, event: Event) -> bool:
+        post = getattr(event, "post", None)
+        if self.post_types is not None and getattr(post, "type", None) not in self.post_types:
+            return False
+        if self.uids is not None:
+            author = getattr(post, "author", None)
+            if getattr(author, "uid", None) not in self.uids:
+                return False
+        return True
+
+
+@dataclass(slots=True)
+class _Bucket:
+    """
+    注册时就按order排好序，分发时只需要合并
+    """
+
+    # 限定了作者的路由
+    by_uid: dict[int, list[Route]] = field(default_factory=dict)
+    # 只限定了帖子类型的路由
+    by_type: dict[int, list[Route]] = field(default_factory=dict)
+    # 没有限定的路由
+    rest: list[Route] = field(default_factory=list)
+
+    def add(self, route: Route) -> None:
+        if route.uids is not None:
+            for uid in route.uids:
+                insort(self.by_uid.setdefault(uid, []), route, key=_order)
+        elif route.post_types is not None:
+            for type_ in route.post_types:
+                insort(self.by_type.setdefault(type_, []), route, key=_order)
+        else:
+            insort(self.rest, route, key=_order)
+
+    def candidates(self, event: Event) -> Iterable[Route]:
+        post = getattr(event, "post", None)
+        author = getattr(post, "author", None)
+        by_uid = self.by_uid.get(getattr(author, "uid", None), ())
+        by_type = self.by_type.get(getattr(post, "type", None), ())
+        if not by_uid and not by_type:
+            return self.rest
+        return merge(by_uid, by_type, self.rest, key=_order)
+
+
+def _order(route: Route) -> int:
+    return route.order
+
+
+class _Level:
+    """
+    同一priority的路由，注册为一个相同priority的nonebot matcher
+    nonebot按priority依次检查，block对路由和普通matcher同样生效
+    """
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.routes: list[Route] = []
+        self.buckets: dict[type[Event], _Bucket] = {}
+        self.matcher = Matcher.new(rule=Rule(self._rule), priority=priority, handlers=[self._handle])
+
+    def add(self, route: Route) -> None:
+        self.routes.append(route)
+        for event_class, bucket in self.buckets.items():
+            if issubclass(event_class, route.events):
+                bucket.add(route)
+
+    def remove(self, handler: Handler) -> None:
+        self.routes = [i for i in self.routes if i.handler is not handler]
+        self.buckets.clear()
+
+    def bucket(self, event_class: type[Event]) -> _Bucket:
+        if (bucket := self.buckets.get(event_class)) is None:
+            bucket = _Bucket()
+            for route in self.routes:
+                if issubclass(event_class, route.events):
+                    bucket.add(route)
+            self.buckets[event_class] = bucket
+        return bucket
+
+    def match(self, event: Event) -> list[Route]:
+        return [i for i in self.bucket(event.__class__).candidates(event) if i.check(event)]
+
+    async def _rule(self, event: Event, state: T_State) -> bool:
+        if routes := self.match(event):
+            state[_ROUTES] = routes
+        return bool(routes)
+
+    async def _handle(self, bot: RawBot, event: Event, matcher: Matcher, state: T_State) -> None:
+        blocked = False
+        for route in state[_ROUTES]:
+            try:
+                result = await route.handler(bot, event)
+            except Exception as e:
+                logger.exception(f"Club255 路由处理失败: {route.handler}: {e}")
+                continue
+            blocked = blocked or route.block or result is True
+        if blocked:
+            matcher.stop_propagation()
+
+
+class Router:
+    """
+    按 event类型/帖子类型/作者uid 预先分桶的事件路由
+    相比给每个matcher写permission，事件到来时只会检查可能匹配的处理函数
+    每个priority注册一个nonebot matcher，和其他matcher一起按priority执行，block会阻止更低优先级的matcher
+    处理函数: async def handler(bot, event) -> bool | None，返回True时和block一样阻止后续处理
+
+    用法:
+        ```python
+        @router.on_post(post_type=3)
+        async def _(bot: Bot, event: PostEvent): ...
+        ```
+    """
+
+    def __init__(self):
+        self._levels: dict[int, _Level] = {}
+        self._order = count()
+
+    def __len__(self) -> int:
+        return sum(len(i.routes) for i in self._levels.values())
+
+    def add(
+        self,
+        handler: Handler,
+        *,
+        events: type[Event] | Iterable[type[Event]] = POST_EVENTS,
+        post_type: int | Iterable[int] | None = None,
+        uid: UID | Iterable[UID] | None = None,
+        priority: int = 1,
+        block: bool = False,
+    ) -> Route:
+        if post_type is not None:
+            post_type = frozenset([post_type] if isinstance(post_type, int) else post_type)
+        route = Route(
+            handler=handler,
+            events=(events,) if isinstance(events, type) else tuple(events),
+            post_types=post_type,
+            uids=None if uid is None else frozenset(int(i) for i in ([uid] if isinstance(uid, int | str) else uid)),
+            priority=priority,
+            block=block,
+            order=next(self._order),
+        )
+        if (level := self._levels.get(priority)) is None:
+            level = self._levels[priority] = _Level(priority)
+        level.add(route)
+        return route
+
+    def remove(self, handler: Handler) -> None:
+        for priority, level in list(self._levels.items()):
+            level.remove(handler)
+            if not level.routes:
+                level.matcher.destroy()
+                del self._levels[priority]
+
+    def on_post(
+        self,
+        *,
+        events: type[Event] | Iterable[type[Event]] = POST_EVENTS,
+        post_type: int | Iterable[int] | None = None,
+        uid: UID | Iterable[UID] | None = None,
+        priority: int = 1,
+        block: bool = False,
+    ) -> Callable[[Handler], Handler]:
+        def _(handler: Handler) -> Handler:
+            self.add(handler, events=events, post_type=post_type, uid=uid, priority=priority, block=block)
+            return handler
+
+        return _
+
+    def match(self, event: Event) -> list[Route]:
+        """
+        按priority排序的所有匹配的路由
+        """
+        return [route for priority in sorted(self._levels) for route in self._levels[priority].match(event)]
+
+
+router = Router()
+
+__all__ = ["Route", "Router", "router", "POST_EVENTS"]
@@ -0,0 +1,153 @@
+import time
+from typing import TYPE_CHECKING, Generic
+import asyncio
+import itertools
+from dataclasses import field, dataclass
+from collections.abc import Callable, Awaitable
+
+from nonebot import logger
+
+from .types import T
+from .message import Message, MessageSegment
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+# 默认优先级，数字越小越先发送
+PRIORITY = 0
+
+
+def _set_exception(future: asyncio.Future, e: BaseException) -> None:
+    if not future.done():
+        future.set_exception(e)
+
+
+def log_failure(self_id: str, future: asyncio.Future) -> None:
+    """
+    wait=False时没人await结果，失败的在这里输出
+    """
+    if not future.cancelled() and (e := future.exception()) is not None:
+        logger.error(f"Club255:{self_id} -> 发送失败:{e!r}")
+
+
+@dataclass(order=True)
+class SendJob(Generic[T]):
+    priority: int
+    seq: int
+    send: Callable[[Message], Awaitable[T]] = field(compare=False)
+    # 提前开始的媒体处理(上传图片/获取视频信息)
+    resolved: asyncio.Future[Message] = field(compare=False)
+    future: asyncio.Future[T] = field(compare=False)
+    created: float = field(compare=False, default_factory=time.perf_counter)
+
+
+class SendQueue:
+    """
+    一个账号的发送队列，按优先级和提交顺序发送，两次发送之间至少间隔interval秒
+    提交时就开始处理媒体，轮到发送时通常已经处理完了
+    """
+
+    def __init__(self, bot: "Bot", interval: float = 2.0, concurrency: int = 4):
+        self.bot = bot
+        self.interval = interval
+        self.queue: asyncio.PriorityQueue[SendJob] = asyncio.PriorityQueue()
+        # 同时处理媒体的消息数
+        self.semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self.counter = itertools.count()
+        self.last_send = 0.0
+        self.task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return self.queue.qsize()
+
+    async def _resolve(self, message: str | Message | MessageSegment) -> Message:
+        async with self.semaphore:
+            return await self.bot.dispose_msg(message=message)
+
+    def submit(
+        self,
+        message: str | Message | MessageSegment,
+        send: Callable[[Message], Awaitable[T]],
+        priority: int = PRIORITY,
+        wait: bool = True,
+    ) -> asyncio.Future[T]:
+        """
+        加入发送队列
+        :param send: 用处理好媒体的消息发送，返回值作为future的结果
+        :param priority: 数字越小越先发送
+        :param wait: 调用方是否会await结果，不会时发送失败由队列输出日志
+        :return: 发送结果的future
+        """
+        resolved = asyncio.ensure_future(self._resolve(message))
+        # 取一次exception，消息被取消时也不会报"exception was never retrieved"
+        resolved.add_done_callback(lambda f: f.cancelled() or f.exception())
+        job = SendJob(priority, next(self.counter), send, resolved, asyncio.get_running_loop().create_future())
+        if not wait:
+            job.future.add_done_callback(lambda f: log_failure(self.bot.self_id, f))
+        self.queue.put_nowait(job)
+        metrics.send_queue.set(self.bot.self_id, value=len(self))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._worker())
+        return job.future
+
+    async def _pace(self) -> None:
+        if (delay := self.last_send + self.interval - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    async def _run(self, job: SendJob) -> None:
+        try:
+            message = await job.resolved
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            # 媒体处理失败的不占发送间隔
+            _set_exception(job.future, e)
+            return
+        await self._pace()
+        if job.future.cancelled():
+            return
+        metrics.send_wait.observe(self.bot.self_id, value=time.perf_counter() - job.created)
+        try:
+            result = await job.send(message)
+            if not job.future.done():
+                job.future.set_result(result)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            _set_exception(job.future, e)
+        finally:
+            self.last_send = time.monotonic()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            metrics.send_queue.set(self.bot.self_id, value=len(self))
+            if job.future.cancelled():
+                job.resolved.cancel()
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                job.resolved.cancel()
+                job.future.cancel()
+                raise
+            except Exception as e:
+                logger.exception(e)
+
+    async def close(self) -> None:
+        """
+        停止发送，还没发出去的消息都会被取消
+        """
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        while not self.queue.empty():
+            job = self.queue.get_nowait()
+            job.resolved.cancel()
+            job.future.cancel()
+        metrics.send_queue.set(self.bot.self_id, value=0)
+
+
+__all__ = ["SendJob", "SendQueue", "PRIORITY", "log_failure"]
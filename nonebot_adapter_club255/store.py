@@ -0,0 +1,270 @@
+import re
+import time
+from pathlib import Path
+import sqlite3
+from datetime import datetime
+import threading
+from collections.abc import Iterable
+
+from pydantic import BaseModel
+
+from .bean import BasePost, PostInfo, PostDetails, UserPostInfo
+
+# 信息越完整rank越高，低rank的数据不会覆盖高rank的
+_KINDS: dict[str, tuple[int, type[BaseModel]]] = {
+    "BasePost": (0, BasePost),
+    "UserPostInfo": (1, UserPostInfo),
+    "PostInfo": (2, PostInfo),
+    "PostDetails": (3, PostDetails),
+}
+_MEDIA = re.compile(r"\[(?:图片|视频):[^\]]*]")
+# trigram分词至少需要3个字符，更短的关键词用LIKE
+_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS posts (
+    postId INTEGER PRIMARY KEY,
+    uid INTEGER,
+    type INTEGER,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    post_time REAL NOT NULL,
+    kind TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_uid ON posts (uid, post_time);
+CREATE INDEX IF NOT EXISTS posts_type ON posts (type, post_time);
+CREATE INDEX IF NOT EXISTS posts_time ON posts (post_time);
+CREATE TABLE IF NOT EXISTS post_tags (postId INTEGER NOT NULL, tagId INTEGER, tagName TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS post_tags_name ON post_tags (tagName, postId);
+CREATE INDEX IF NOT EXISTS post_tags_post ON post_tags (postId);
+CREATE TABLE IF NOT EXISTS post_labels (postId INTEGER NOT NULL, labelId INTEGER, labelName TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS post_labels_name ON post_labels (labelName, postId);
+CREATE INDEX IF NOT EXISTS post_labels_post ON post_labels (postId);
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    title, content, content='posts', content_rowid='postId'{", tokenize='trigram'" if _TRIGRAM else ""}
+);
+CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, title, content) VALUES (new.postId, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content) VALUES ('delete', old.postId, old.title, old.content);
+    DELETE FROM post_tags WHERE postId = old.postId;
+    DELETE FROM post_labels WHERE postId = old.postId;
+END;
+CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content) VALUES ('delete', old.postId, old.title, old.content);
+    INSERT INTO posts_fts (rowid, title, content) VALUES (new.postId, new.title, new.content);
+END;
+"""
+
+
+def _text(post: BaseModel) -> str:
+    if isinstance(post, PostDetails):
+        # 详情的content是html
+        return post.get_message().extract_plain_text()
+    return _MEDIA.sub("", post.content)
+
+
+def _timestamp(value: datetime | float) -> float:
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+class PostStore:
+    """
+    本地的帖子库(sqlite)，插件可以直接查询，不需要再请求post/list
+    按postId/作者/类型/标签/分区/时间建了索引，标题和内容有全文索引
+    adapter在线程里调用add_posts(nonebot.utils.run_sync)，读写都加了锁
+    """
+
+    def __init__(self, path: Path, *, max_posts: int = 100000, retention: int = 90):
+        """
+        :param path: 数据库路径
+        :param max_posts: 最多保存的帖子数，超过时删除最早的，0为不限制
+        :param retention: 保存的天数，0为不限制
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_posts = max_posts
+        self.retention = retention
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self.db.commit()
+        self._since_prune = 0
+        self._lock = threading.RLock()
+
+    def add_posts(self, posts: Iterable[BaseModel], uid: int | None = None) -> None:
+        """
+        写入帖子，已有的帖子会更新(低rank的不会覆盖高rank的)
+        :param posts: BasePost/UserPostInfo/PostInfo/PostDetails
+        :param uid: 作者，UserPostInfo没有作者信息时需要传
+        """
+        now = time.time()
+        rows = []
+        for post in posts:
+            kind = type(post).__name__
+            if kind not in _KINDS:
+                kind = next(k for k, (_, t) in reversed(_KINDS.items()) if isinstance(post, t))
+            author = getattr(post, "author", None)
+            rows.append(
+                (
+                    post.postId,
+                    author.uid if author is not None else uid,
+                    getattr(post, "type", None),
+                    post.title,
+                    _text(post),
+                    _timestamp(post.post_time),
+                    kind,
+                    _KINDS[kind][0],
+                    post.model_dump_json(),
+                    now,
+                    post,
+                )
+            )
+        if not rows:
+            return
+        with self._lock:
+            self._write(rows)
+            self._since_prune += len(rows)
+            if self._since_prune >= 100:
+                self.prune()
+
+    def _write(self, rows: list[tuple]) -> None:
+        with self.db:
+            for row in rows:
+                changed = self.db.execute(
+                    "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (postId) DO UPDATE SET "
+                    "uid = coalesce(excluded.uid, uid), type = coalesce(excluded.type, type), title = excluded.title, "
+                    "content = excluded.content, post_time = excluded.post_time, kind = excluded.kind, "
+                    "rank = excluded.rank, data = excluded.data, updated = excluded.updated "
+                    "WHERE excluded.rank >= posts.rank",
+                    row[:-1],
+                ).rowcount
+                if not changed:
+                    continue
+                post = row[-1]
+                self.db.execute("DELETE FROM post_tags WHERE postId = ?", (post.postId,))
+                self.db.execute("DELETE FROM post_labels WHERE postId = ?", (post.postId,))
+                self.db.executemany(
+                    "INSERT INTO post_tags VALUES (?, ?, ?)",
+                    [(post.postId, i.tagId, i.tagName) for i in getattr(post, "tags", ())],
+                )
+                self.db.executemany(
+                    "INSERT INTO post_labels VALUES (?, ?, ?)",
+                    [(post.postId, i.labelId, i.labelName) for i in post.labels],
+                )
+
+    def add_details(self, details: PostDetails) -> None:
+        self.add_posts([details])
+
+    def prune(self) -> int:
+        """
+        按retention和max_posts删除旧帖子
+        :return: 删除的数量
+        """
+        deleted = 0
+        with self._lock, self.db:
+            self._since_prune = 0
+            if self.retention:
+                deleted += self.db.execute(
+                    "DELETE FROM posts WHERE post_time < ?", (time.time() - self.retention * 86400,)
+                ).rowcount
+            if self.max_posts:
+                deleted += self.db.execute(
+                    "DELETE FROM posts WHERE postId IN "
+                    "(SELECT postId FROM posts ORDER BY post_time DESC LIMIT -1 OFFSET ?)",
+                    (self.max_posts,),
+                ).rowcount
+        return deleted
+
+    @staticmethod
+    def _load(kind: str, data: str) -> BaseModel:
+        return _KINDS[kind][1].model_validate_json(data)
+
+    def _fetch(self, sql: str, params: Iterable = ()) -> list[tuple]:
+        with self._lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def get(self, pid: int) -> BaseModel | None:
+        rows = self._fetch("SELECT kind, data FROM posts WHERE postId = ?", (pid,))
+        return self._load(*rows[0]) if rows else None
+
+    def get_details(self, pid: int) -> PostDetails | None:
+        rows = self._fetch("SELECT kind, data FROM posts WHERE postId = ? AND kind = 'PostDetails'", (pid,))
+        return self._load(*rows[0]) if rows else None  # type: ignore
+
+    def query(
+        self,
+        *,
+        uid: int | None = None,
+        type_: int | None = None,
+        tag: str | None = None,
+        label: str | None = None,
+        keyword: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> list[BaseModel]:
+        """
+        按条件查询帖子，按发布时间从新到旧
+        :param uid: 作者
+        :param type_: 帖子类型 0普通帖子, 1 等级贴, 2 新人贴, 3生日帖
+        :param tag: 标签名
+        :param label: 分区名
+        :param keyword: 标题或内容包含的关键词
+        :param since: 发布时间不早于
+        :param until: 发布时间早于
+        """
+        where = []
+        params: list = []
+        if uid is not None:
+            where.append("uid = ?")
+            params.append(int(uid))
+        if type_ is not None:
+            where.append("type = ?")
+            params.append(type_)
+        if tag is not None:
+            where.append("postId IN (SELECT postId FROM post_tags WHERE tagName = ?)")
+            params.append(tag)
+        if label is not None:
+            where.append("postId IN (SELECT postId FROM post_labels WHERE labelName = ?)")
+            params.append(label)
+        if keyword:
+            if _TRIGRAM and len(keyword) >= 3:
+                where.append("postId IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)")
+                params.append('"' + keyword.replace('"', '""') + '"')
+            else:
+                where.append("(title LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\')")
+                pattern = "%" + re.sub(r"([%_\\])", r"\\\1", keyword) + "%"
+                params.extend((pattern, pattern))
+        if since is not None:
+            where.append("post_time >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            where.append("post_time < ?")
+            params.append(_timestamp(until))
+        sql = "SELECT kind, data FROM posts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY post_time DESC LIMIT ? OFFSET ?"
+        params.extend((limit, offset))
+        return [self._load(*row) for row in self._fetch(sql, params)]
+
+    def search(self, keyword: str, limit: int = 20) -> list[BaseModel]:
+        return self.query(keyword=keyword, limit=limit)
+
+    def __len__(self) -> int:
+        return self._fetch("SELECT count(*) FROM posts")[0][0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+# 由Adapter根据club255_store_path设置
+post_store: PostStore | None = None
+
+__all__ = ["PostStore", "post_store"]
@@ -2,7 +2,7 @@ from typing import Literal, TypeVar
 
 from pydantic import BaseModel
 
-AccessEventName = Literal["on_live", "notice", "nice_post", "post"]
+AccessEventName = Literal["on_live", "notice", "nice_post", "post", "chat"]
 
 T = TypeVar("T")
 
@@ -1,6 +1,9 @@
 from typing import Any
+from collections.abc import Iterable
 from xml.dom.minidom import Element
 
+from nonebot import logger
+
 
 def escape(s: str) -> str:
     return s.replace(" ", "&nbsp;")
@@ -10,6 +13,30 @@ def unescape(s: str) -> str:
     return s.replace("&nbsp;", " ")
 
 
+# (偏移, 魔数, 格式)
+_IMAGE_MAGIC = (
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"\xff\xd8\xff", "jpeg"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (8, b"WEBP", "webp"),
+    (0, b"BM", "bmp"),
+    (0, b"II*\x00", "tiff"),
+    (0, b"MM\x00*", "tiff"),
+    (4, b"ftypavif", "avif"),
+)
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """
+    通过文件头的魔数判断图片格式，不解码图片
+    """
+    for offset, magic, type_ in _IMAGE_MAGIC:
+        if head[offset : offset + len(magic)] == magic:
+            return type_
+    return None
+
+
 def set_father(child: Any, father: Element) -> Element:
     father.appendChild(child)
     return father
@@ -43,3 +70,35 @@ def truncate(s: Any, length: int = 100, kill_words: bool = False, end: str = "..
 
     result = s[: length - len(end)].rsplit(maxsplit=1)[0]
     return result + end
+
+
+def summarize(msg: Iterable[Any], length: int = 100, end: str = "...") -> str:
+    """
+    和truncate(msg)结果一样，但只会转换前面的消息段，不会把整条消息转成字符串
+    """
+    parts = []
+    size = 0
+    for seg in msg:
+        part = str(seg)
+        parts.append(part)
+        size += len(part)
+        if size > length:
+            break
+    return truncate("".join(parts), length, end=end)
+
+
+def log_enabled(level: str) -> bool:
+    """
+    按nonebot的日志等级(log_level)判断该等级的日志是否会输出，判断不了时返回True
+    """
+    try:
+        no = logger.level(level).no
+        core = logger._core  # type: ignore
+        if no < core.min_level:
+            return False
+        log_level = core.extra.get("nonebot_log_level")
+        if log_level is None:
+            return True
+        return no >= (logger.level(log_level).no if isinstance(log_level, str) else log_level)
+    except Exception:
+        return True
@@ -0,0 +1,146 @@
+import json
+from types import SimpleNamespace
+import random
+import asyncio
+
+import pytest
+
+from benchmarks import samples
+from nonebot_adapter_club255.bot import Bot
+from nonebot_adapter_club255.bean import BasePost, PostDetails
+from nonebot_adapter_club255.backfill import Backfill, JsonlSink, Checkpoint, SqliteSink
+
+TOTAL = 45
+PAGE_SIZE = 10
+
+
+class Client:
+    def __init__(self):
+        rng = random.Random(0)
+        self.posts = [BasePost.model_validate(samples.post(pid, rng)) for pid in range(TOTAL, 0, -1)]
+        self.pages: list[int] = []
+
+    async def get_post_list_brief(self, *, page: int, page_size: int) -> list[BasePost]:
+        self.pages.append(page)
+        return self.posts[(page - 1) * page_size : page * page_size]
+
+    get_post_list = get_post_list_brief
+
+
+class FlakyClient(Client):
+    """
+    前len(errors)次请求依次抛出errors中的异常
+    """
+
+    def __init__(self, *errors: Exception):
+        super().__init__()
+        self.errors = list(errors)
+
+    async def get_post_list_brief(self, *, page: int, page_size: int) -> list[BasePost]:
+        self.pages.append(page)
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.posts[(page - 1) * page_size : page * page_size]
+
+
+class DetailsBot(Bot):
+    """
+    只实现Backfill用到的部分，pid在fail中的详情一直失败
+    """
+
+    def __init__(self, fail: set[int]):
+        self.client = Client()
+        self.fail = fail
+
+    async def get_post_details(self, pid) -> PostDetails:
+        if pid in self.fail:
+            raise RuntimeError(f"post {pid}")
+        return PostDetails.model_validate(samples.post_details(pid))
+
+
+def _backfill(bot, sink, checkpoint, **kwargs) -> Backfill:
+    return Backfill(bot, sink, checkpoint=checkpoint, page_size=PAGE_SIZE, workers=2, rate=0, **kwargs)
+
+
+def _read_jsonl(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_checkpoint_complete_out_of_order(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+    checkpoint.complete(2)
+    assert (checkpoint.next_page, checkpoint.done) == (1, {2})
+    checkpoint.complete(1)
+    assert (checkpoint.next_page, checkpoint.done) == (3, set())
+    loaded = Checkpoint(tmp_path / "checkpoint.json")
+    assert (loaded.next_page, loaded.done, loaded.finished) == (3, set(), False)
+
+
+def test_resume(tmp_path):
+    bot = SimpleNamespace(client=Client())
+    output = tmp_path / "posts.jsonl"
+    checkpoint = tmp_path / "checkpoint.json"
+
+    sink = JsonlSink(output)
+    assert asyncio.run(_backfill(bot, sink, checkpoint, max_pages=2).run()) == 20
+    sink.close()
+    assert Checkpoint(checkpoint).next_page == 3
+
+    # 从第3页继续，已经完成的页不会再请求
+    bot.client.pages.clear()
+    sink = JsonlSink(output)
+    assert asyncio.run(_backfill(bot, sink, checkpoint).run()) == TOTAL - 20
+    sink.close()
+    assert min(bot.client.pages) == 3
+    assert Checkpoint(checkpoint).finished
+
+    posts = [i["post"]["postId"] for i in _read_jsonl(output)]
+    assert sorted(posts) == list(range(1, TOTAL + 1))
+
+    # 已经完成时不再抓取
+    bot.client.pages.clear()
+    sink = JsonlSink(output)
+    assert asyncio.run(_backfill(bot, sink, checkpoint).run()) == 0
+    sink.close()
+    assert bot.client.pages == []
+
+
+def test_failed_details_recorded(tmp_path):
+    bot = DetailsBot(fail={TOTAL, TOTAL - 3})
+    checkpoint = tmp_path / "checkpoint.json"
+    sink = SqliteSink(tmp_path / "posts.db")
+    assert asyncio.run(_backfill(bot, sink, checkpoint, details=True, retries=0, max_pages=1).run()) == PAGE_SIZE
+    rows = dict(sink.db.execute("SELECT postId, details FROM posts").fetchall())
+    sink.close()
+
+    assert len(rows) == PAGE_SIZE
+    assert {pid for pid, details in rows.items() if details is None} == {TOTAL, TOTAL - 3}
+    # 页仍然算完成，失败的postId记录在进度文件里
+    loaded = Checkpoint(checkpoint)
+    assert loaded.next_page == 2
+    assert loaded.failed == {TOTAL, TOTAL - 3}
+
+
+def test_uid_requires_login(tmp_path):
+    bot = SimpleNamespace(client=Client())
+    sink = JsonlSink(tmp_path / "posts.jsonl")
+    with pytest.raises(ValueError, match="未登录"):
+        Backfill(bot, sink, uid=1)
+    sink.close()
+
+
+def test_retry_network_error(tmp_path):
+    bot = SimpleNamespace(client=FlakyClient(ConnectionResetError()))
+    sink = JsonlSink(tmp_path / "posts.jsonl")
+    assert asyncio.run(_backfill(bot, sink, None, max_pages=1, retries=1).run()) == PAGE_SIZE
+    sink.close()
+    assert bot.client.pages == [1, 1]
+
+
+def test_no_retry_other_error(tmp_path):
+    bot = SimpleNamespace(client=FlakyClient(TypeError("bad argument")))
+    sink = JsonlSink(tmp_path / "posts.jsonl")
+    with pytest.raises(TypeError):
+        asyncio.run(_backfill(bot, sink, None, max_pages=1).run())
+    sink.close()
+    assert bot.client.pages == [1]
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime
+
+from nonebot_adapter_club255.bean import BaseUser, ChatList, ChatMessage
+from nonebot_adapter_club255.event import ChatMessageEvent
+from nonebot_adapter_club255.factory import _EventFactory
+
+SELF_UID = 1
+UID = 7
+
+
+class ChatBot:
+    self_id = str(SELF_UID)
+
+    def __init__(self):
+        self.messages: list[ChatMessage] = []
+        self.unread = 0
+
+    def receive(self, *contents: str, uid: int = UID) -> None:
+        for content in contents:
+            self.messages.append(ChatMessage(id=len(self.messages) + 1, content=content, uid=uid))
+            if uid != SELF_UID:
+                self.unread += 1
+
+    def get_self_id(self) -> int:
+        return SELF_UID
+
+    async def get_chat_list(self) -> list[ChatList]:
+        user = BaseUser(
+            uid=UID, nickname="毛怪", avatar="https://2550505.com/avatar/1.jpg", exp=0, auth=0, authentication=""
+        )
+        return [ChatList(isTop=False, lastMessage="", time=datetime.now(), unread=self.unread, user=user)]
+
+    async def get_chat_messages(self, uid, mid=0) -> list[ChatMessage]:
+        self.unread = 0
+        return [i for i in self.messages if i.id > mid]
+
+
+def _contents(factory: _EventFactory, bot: ChatBot) -> list[str]:
+    events = asyncio.run(factory._build_chat_events(bot))
+    assert all(isinstance(i, ChatMessageEvent) for i in events)
+    return [i.message.extract_plain_text() for i in events]
+
+
+def _factory() -> _EventFactory:
+    factory = _EventFactory()
+    factory.data = {}
+    return factory
+
+
+def test_first_message_from_new_contact():
+    factory, bot = _factory(), ChatBot()
+    bot.receive("你好")
+    assert _contents(factory, bot) == ["你好"]
+    assert factory.data["chat"] == {UID: 1}
+
+
+def test_only_unread_on_first_sight():
+    factory, bot = _factory(), ChatBot()
+    bot.receive("很久以前", "已读")
+    bot.unread = 0
+    # 自己发的不算
+    bot.receive("我的回复", uid=SELF_UID)
+    bot.receive("新消息1", "新消息2")
+    assert _contents(factory, bot) == ["新消息1", "新消息2"]
+
+
+def test_continue_from_cursor():
+    factory, bot = _factory(), ChatBot()
+    bot.receive("1")
+    assert _contents(factory, bot) == ["1"]
+    # 没有未读时不请求
+    assert _contents(factory, bot) == []
+    bot.receive("2", "3")
+    assert _contents(factory, bot) == ["2", "3"]
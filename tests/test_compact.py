@@ -0,0 +1,34 @@
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from benchmarks import samples
+from nonebot_adapter_club255.bean import BaseLike, BaseUser, PostUser, BaseReply
+
+
+def test_same_user_shared():
+    raw = samples.like(0, random.Random(0))
+    like = BaseLike.model_validate(raw)
+    other = BaseLike.model_validate({**raw, "user": {**raw["user"]}})
+    assert like.user is other.user
+    with pytest.raises(ValidationError):
+        like.user.nickname = "毛怪"
+
+
+def test_compact_uses_shared_user():
+    rng = random.Random(0)
+    raw = samples.like(0, rng)
+    like = BaseLike.model_validate(raw)
+    reply = BaseReply.model_validate({**samples.reply(0, rng), "user": {**raw["user"]}})
+    assert like.to_compact().user is reply.to_compact().user is like.user
+
+
+def test_post_user_mutable():
+    data = {**samples.user(1), "focusHe": False, "role": 0, "status": 0}
+    user = PostUser.model_validate(data)
+    user.nickname = "毛怪"
+    assert user.nickname == "毛怪"
+    shared = user.shared()
+    assert type(shared) is BaseUser
+    assert shared is BaseUser.model_validate(shared.model_dump())
@@ -0,0 +1,83 @@
+from nonebot_adapter_club255.message import Message, HtmlMessageParser
+
+PARAGRAPHS = [
+    "<p>今天也是元气满满的一天<strong><em>冲冲冲</em></strong></p>",
+    '<p><img src="https://2550505.com/emotion/1/哈.png" alt="哈" class="emoticon-img" data-emotion-name="哈">'
+    '<img class="ProseMirror-separator" alt=""><br class="ProseMirror-trailingBreak"></p>',
+    '<p><a class="editor-hash-tag" href="/tag/1" data-id="1" data-label="hanser">#hanser</a>&nbsp;好听</p>',
+    '<p><img src="https://pic.example.com/a.jpg" class="upload-img"></p>',
+    '<p><img src="https://i0.hdslb.com/cover.jpg" class="upload-img" data-bv="BV1xx411c7mD"></p>'
+    '<p><a class="editor-link" href="https://www.bilibili.com/video/BV1xx411c7mD/">视频标题</a></p>',
+]
+
+
+def _segments(html: str) -> list[tuple[str, dict]]:
+    return [(i.type, i.data) for i in Message.from_html(html)]
+
+
+def test_styled_text():
+    assert _segments(PARAGRAPHS[0]) == [
+        ("text", {"text": "今天也是元气满满的一天", "strong": False, "em": False}),
+        ("text", {"text": "冲冲冲", "strong": True, "em": True}),
+    ]
+
+
+def test_face_skips_separator_and_trailing_break():
+    segments = _segments(PARAGRAPHS[1])
+    assert len(segments) == 1
+    assert segments[0][0] == "face"
+    assert segments[0][1]["name"] == "哈"
+
+
+def test_tag_and_nbsp():
+    assert _segments(PARAGRAPHS[2]) == [
+        ("tag", {"name": "hanser", "id": 1}),
+        ("text", {"text": " 好听", "strong": False, "em": False}),
+    ]
+
+
+def test_image():
+    ((type_, data),) = _segments(PARAGRAPHS[3])
+    assert type_ == "image"
+    assert data["url"] == "https://pic.example.com/a.jpg"
+
+
+def test_video_takes_following_link_as_title():
+    ((type_, data),) = _segments(PARAGRAPHS[4])
+    assert type_ == "video"
+    assert data["bv"] == "BV1xx411c7mD"
+    assert data["title"] == "视频标题"
+    assert data["url"] == "https://www.bilibili.com/video/BV1xx411c7mD/"
+    assert data["cover"] == "https://i0.hdslb.com/cover.jpg"
+
+
+def test_paragraphs_become_new_lines():
+    message = Message.from_html("<p>a</p><p>b<br>c</p>")
+    assert message.extract_plain_text() == "a\nb\nc"
+
+
+def test_empty_html():
+    assert _segments("") == [("text", {"text": "", "strong": False, "em": False})]
+
+
+def test_incremental_feed_matches_from_html():
+    html = "".join(PARAGRAPHS * 5)
+    parser = HtmlMessageParser()
+    for i in range(0, len(html), 7):
+        parser.feed(html[i : i + 7])
+    assert parser.get_message() == Message.from_html(html)
+
+
+def test_relative_src_is_resolved_as_url():
+    ((type_, data),) = _segments('<p><img src="/upload/2024/a.png" class="upload-img"></p>')
+    assert type_ == "image"
+    assert data["url"] == "https://ihan.club/upload/2024/a.png"
+    assert data["path"] is None
+    assert data["file"] is None
+    message = Message.from_html('<p><img src="upload/a.png" class="upload-img"></p>', base="https://example.com/p/")
+    assert message[0].url == "https://example.com/p/upload/a.png"
+
+
+def test_non_http_src_is_skipped():
+    for src in ("data:image/png;base64,AAAA", "file:///etc/passwd"):
+        assert _segments(f'<p><img src="{src}" class="upload-img"></p>') == _segments("")
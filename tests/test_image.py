@@ -0,0 +1,37 @@
+from io import BytesIO
+
+from PIL import Image
+
+from nonebot_adapter_club255.image import process_image
+from nonebot_adapter_club255.message import ImageMsg
+
+# EXIF方向: 顺时针旋转90度显示
+ORIENTATION = 0x0112
+ROTATE_90 = 6
+
+
+def _photo(path, size=(400, 200)) -> ImageMsg:
+    img = Image.new("RGB", size, "red")
+    exif = img.getexif()
+    exif[ORIENTATION] = ROTATE_90
+    img.save(path, format="JPEG", exif=exif)
+    return ImageMsg(path)
+
+
+def _size(data: bytes) -> tuple[int, int]:
+    return Image.open(BytesIO(data)).size
+
+
+def test_exif_rotation_applied_before_resize(tmp_path):
+    data, fmt = process_image(_photo(tmp_path / "photo.jpg"), max_size=100)
+    assert fmt == "jpeg"
+    assert _size(data) == (50, 100)
+
+
+def test_exif_rotation_applied_with_watermark(tmp_path):
+    data, _ = process_image(_photo(tmp_path / "photo.jpg"), watermark="hanser")
+    assert _size(data) == (200, 400)
+
+
+def test_untouched_image_is_not_reencoded(tmp_path):
+    assert process_image(_photo(tmp_path / "photo.jpg")) is None
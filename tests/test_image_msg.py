@@ -0,0 +1,42 @@
+from io import BytesIO
+import random
+import hashlib
+
+from PIL import Image
+import httpx
+
+from nonebot_adapter_club255.message import ImageMsg
+
+
+def _png(path, size: int) -> bytes:
+    # 随机像素几乎不能压缩，文件大小接近size
+    Image.frombytes("L", (size // 100, 100), random.Random(size).randbytes(size // 100 * 100)).save(path)
+    return path.read_bytes()
+
+
+def test_small_file(tmp_path):
+    raw = _png(tmp_path / "small.png", 10_000)
+    msg = ImageMsg(tmp_path / "small.png")
+    assert msg.type_ == "png"
+    assert msg.digest() == hashlib.sha256(raw).hexdigest()
+    with msg.open_file() as file:
+        assert file == raw
+
+
+def test_large_file_keeps_content_length(tmp_path):
+    raw = _png(tmp_path / "large.png", 2 * ImageMsg.MMAP_THRESHOLD)
+    assert len(raw) >= ImageMsg.MMAP_THRESHOLD
+    msg = ImageMsg(tmp_path / "large.png")
+    assert msg.digest() == hashlib.sha256(raw).hexdigest()
+    with msg.open_file() as file:
+        request = httpx.Request("POST", "https://example.com/upload", files={"file": ("large.png", file)})
+        assert int(request.headers["Content-Length"]) > len(raw)
+        assert "Transfer-Encoding" not in request.headers
+
+
+def test_bytes(tmp_path):
+    raw = _png(tmp_path / "bytes.png", 10_000)
+    msg = ImageMsg(BytesIO(raw))
+    assert msg.digest() == hashlib.sha256(raw).hexdigest()
+    with msg.open_file() as file:
+        assert file == raw
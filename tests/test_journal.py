@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from nonebot.drivers import Response
+
+from nonebot_adapter_club255.replay import Journal
+from nonebot_adapter_club255.journal import REDACTED, Recorder
+from nonebot_adapter_club255.exception import JournalExhausted
+
+
+def _record(path, calls: list[tuple[str, dict, Response]]) -> Journal:
+    recorder = Recorder(path)
+    for api, data, resp in calls:
+        recorder.write("114514", api, data, resp)
+    recorder.close()
+    return Journal.load(path)
+
+
+def test_round_trip(tmp_path):
+    journal = _record(
+        tmp_path / "journal.jsonl.gz",
+        [
+            ("post/list", {"page": 1, "raw": True}, Response(200, content=b'{"code":0,"list":[1]}')),
+            ("post/list", {"page": 2}, Response(200, content=b'{"code":0,"list":[2]}')),
+            ("image", {}, Response(200, content=b"\xff\xd8\xff")),
+        ],
+    )
+    assert journal.bot_id == "114514"
+    assert journal.remaining() == 3
+    # 参数完全一样的优先，控制参数raw不参与匹配
+    assert json.loads(journal.response("post/list", {"page": 2}).content)["list"] == [2]
+    assert json.loads(journal.response("post/list", {"page": 1}).content)["list"] == [1]
+    # 二进制的返回用base64保存
+    assert journal.response("image", {}).content == b"\xff\xd8\xff"
+    assert journal.remaining() == 0
+    with pytest.raises(JournalExhausted):
+        journal.response("post/list", {"page": 3})
+
+
+def test_endpoint_fallback(tmp_path):
+    journal = _record(
+        tmp_path / "journal.jsonl.gz",
+        [("post/details/1", {}, Response(200, content=b'{"code":0}'))],
+    )
+    # 找不到同样的请求时用同一个接口的下一条
+    assert journal.response("post/details/2", {}).status_code == 200
+
+
+def test_auth_is_redacted(tmp_path):
+    journal = _record(
+        tmp_path / "journal.jsonl.gz",
+        [
+            (
+                "auth/login",
+                {"method": "POST", "account": "secret-account", "password": "secret-password"},
+                Response(200, content=b'{"code":0,"data":{"token":"secret-token","uid":1}}'),
+            ),
+            ("post/list", {"Cookie": "token=secret-token;", "page": 1}, Response(200, content=b'{"code":0}')),
+        ],
+    )
+    login, post_list = journal.records
+    assert login["params"] == {"account": REDACTED, "password": REDACTED}
+    assert json.loads(login["body"]) == {"code": 0, "data": {"token": REDACTED, "uid": 1}}
+    assert post_list["params"] == {"Cookie": REDACTED, "page": 1}
+    assert "secret" not in json.dumps(journal.records)
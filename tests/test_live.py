@@ -0,0 +1,56 @@
+from nonebot_adapter_club255.bean import LiveInfo
+from nonebot_adapter_club255.live import LiveWatcher
+from nonebot_adapter_club255.event import OnLiveNoticeEvent, OffLiveNoticeEvent, LiveUpdateNoticeEvent
+
+ON = 1
+OFF = 2
+
+
+def _info(status: int, keyframe: str = "keyframe0", cover: str = "cover") -> LiveInfo:
+    return LiveInfo(live_status=status, keyframe=keyframe, user_cover=cover)
+
+
+def test_first_update():
+    assert LiveWatcher().update(_info(ON), allow_first=False) == []
+    assert LiveWatcher().update(_info(ON), allow_first=True) == [(OnLiveNoticeEvent, [])]
+    assert LiveWatcher().update(_info(OFF), allow_first=True) == []
+
+
+def test_debounce_on_and_off():
+    watcher = LiveWatcher(debounce=2)
+    watcher.update(_info(OFF), allow_first=True)
+    assert watcher.update(_info(ON), allow_first=True) == []
+    assert watcher.update(_info(ON), allow_first=True) == [(OnLiveNoticeEvent, [])]
+    assert watcher.update(_info(ON), allow_first=True) == []
+    assert watcher.update(_info(OFF), allow_first=True) == []
+    assert watcher.update(_info(OFF), allow_first=True) == [(OffLiveNoticeEvent, [])]
+
+
+def test_flapping_status_is_ignored():
+    watcher = LiveWatcher(debounce=2)
+    watcher.update(_info(ON), allow_first=False)
+    # 偶尔返回一次错的状态不会触发下播
+    for _ in range(3):
+        assert watcher.update(_info(OFF), allow_first=True) == []
+        assert watcher.update(_info(ON), allow_first=True) == []
+    assert watcher.live_info.live_status == ON
+
+
+def test_debounce_at_least_one():
+    watcher = LiveWatcher()
+    watcher.setup(interval=1, debounce=0)
+    watcher.update(_info(OFF), allow_first=True)
+    assert watcher.update(_info(ON), allow_first=True) == [(OnLiveNoticeEvent, [])]
+
+
+def test_live_update_fields():
+    watcher = LiveWatcher()
+    watcher.update(_info(ON), allow_first=False)
+    assert watcher.update(_info(ON, keyframe="keyframe1"), allow_first=True) == [(LiveUpdateNoticeEvent, ["keyframe"])]
+    assert watcher.update(_info(ON, keyframe="keyframe1", cover="new"), allow_first=True) == [
+        (LiveUpdateNoticeEvent, ["user_cover"])
+    ]
+    # 没开播时的变化不触发
+    watcher.reset()
+    watcher.update(_info(OFF), allow_first=False)
+    assert watcher.update(_info(OFF, keyframe="keyframe2"), allow_first=True) == []
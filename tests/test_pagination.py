@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from nonebot_adapter_club255.pagination import iter_pages, until_time, until_post_id
+
+
+class Pages:
+    def __init__(self, total: int, page_size: int = 10, fail: int | None = None):
+        self.total = total
+        self.page_size = page_size
+        self.fail = fail
+        self.calls: list[int] = []
+        self.cancelled: list[int] = []
+
+    async def fetch(self, page: int) -> list[int]:
+        self.calls.append(page)
+        try:
+            await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        if page == self.fail:
+            raise RuntimeError(f"page {page}")
+        start = (page - 1) * self.page_size
+        return list(range(start, min(start + self.page_size, self.total)))
+
+
+async def _collect(pages: Pages, **kwargs) -> list[int]:
+    return [i async for i in iter_pages(pages.fetch, page_size=pages.page_size, **kwargs)]
+
+
+def test_all_pages():
+    pages = Pages(25)
+    assert asyncio.run(_collect(pages)) == list(range(25))
+    assert pages.calls == [1, 2, 3]
+
+
+def test_full_last_page_requests_one_more():
+    pages = Pages(20)
+    assert asyncio.run(_collect(pages)) == list(range(20))
+    assert pages.calls == [1, 2, 3]
+
+
+def test_max_pages():
+    pages = Pages(100)
+    assert asyncio.run(_collect(pages, max_pages=2)) == list(range(20))
+    assert pages.calls == [1, 2]
+
+
+def test_until_stops_and_cancels_prefetch():
+    pages = Pages(100)
+
+    async def main() -> list[int]:
+        result = await _collect(pages, until=lambda i: i >= 5)
+        # 预取的第2页被取消，没有留下还在运行的任务
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        return result
+
+    assert asyncio.run(main()) == list(range(5))
+    assert pages.calls in ([1], [1, 2])
+    assert pages.cancelled == pages.calls[1:]
+
+
+def test_consumer_break_reaps_failed_prefetch():
+    pages = Pages(100, fail=2)
+
+    async def main() -> list[int]:
+        result = []
+        iterator = iter_pages(pages.fetch, page_size=pages.page_size)
+        async for i in iterator:
+            result.append(i)
+            if i == 9:
+                # 等预取的第2页失败后再停止
+                await asyncio.sleep(0.05)
+                break
+        await iterator.aclose()
+        return result
+
+    loop = asyncio.new_event_loop()
+    errors = []
+    loop.set_exception_handler(lambda _, context: errors.append(context))
+    try:
+        assert loop.run_until_complete(main()) == list(range(10))
+    finally:
+        loop.close()
+    assert errors == []
+
+
+def test_error_propagates():
+    pages = Pages(100, fail=2)
+    with pytest.raises(RuntimeError):
+        asyncio.run(_collect(pages))
+
+
+def test_without_prefetch():
+    pages = Pages(100)
+    assert asyncio.run(_collect(pages, until=lambda i: i >= 5, prefetch=False)) == list(range(5))
+    assert pages.calls == [1]
+
+
+def test_until_post_id():
+    stop = until_post_id(10)
+    assert stop(SimpleNamespace(postId=10))
+    assert not stop(SimpleNamespace(postId=11))
+
+
+def test_until_time_mixed_time_zones():
+    now = datetime.now()
+    hour = timedelta(hours=1)
+    # 没有时区的一方当作本地时间
+    stop = until_time(now)
+    assert stop(SimpleNamespace(post_time=datetime.now(timezone.utc) - hour))
+    assert not stop(SimpleNamespace(post_time=datetime.now(timezone.utc) + hour))
+    stop = until_time(datetime.now(timezone.utc))
+    assert stop(SimpleNamespace(post_time=now - hour))
+    assert not stop(SimpleNamespace(post_time=now + hour))
+    # 没有post_time时用time
+    assert stop(SimpleNamespace(post_time=None, time=now - hour))
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from nonebot_adapter_club255.prefetch import DetailsHandle, prefetcher
+
+
+class DetailsBot:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_post_details(self, pid):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return f"details:{pid}"
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    prefetcher.setup(False, 16, 4)
+    yield
+    prefetcher.setup(False, 16, 4)
+
+
+def test_awaiters_share_one_request():
+    bot = DetailsBot()
+
+    async def main():
+        handle = DetailsHandle(bot, 1)
+        return await asyncio.gather(handle, handle, DetailsHandle(bot, 1))
+
+    assert asyncio.run(main()) == ["details:1"] * 3
+    assert bot.calls == 1
+
+
+def test_cancelled_awaiter_does_not_cancel_others():
+    bot = DetailsBot()
+
+    async def main():
+        handle = DetailsHandle(bot, 1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(handle, 0.01)
+        return await handle
+
+    assert asyncio.run(main()) == "details:1"
+    assert bot.calls == 1
+
+
+def test_prefetch_only_when_enabled():
+    bot = DetailsBot()
+
+    async def main():
+        prefetcher.prefetch(bot, [1, 2])
+        assert len(prefetcher.cache) == 0
+        prefetcher.setup(True, 16, 4)
+        prefetcher.prefetch(bot, [1, 2])
+        assert prefetcher.in_flight == 2
+        return await asyncio.gather(DetailsHandle(bot, 1), DetailsHandle(bot, 2))
+
+    assert asyncio.run(main()) == ["details:1", "details:2"]
+    assert bot.calls == 2
@@ -0,0 +1,130 @@
+import time
+import asyncio
+
+import pytest
+from nonebot import logger
+
+from nonebot_adapter_club255.sender import SendQueue
+
+
+class FakeBot:
+    self_id = "114514"
+
+    def __init__(self, resolve: float = 0.0):
+        self.resolve = resolve
+        self.resolved: list[str] = []
+
+    async def dispose_msg(self, *, message):
+        await asyncio.sleep(self.resolve)
+        self.resolved.append(message)
+        return message
+
+
+class Sent:
+    def __init__(self):
+        self.messages: list[str] = []
+        self.times: list[float] = []
+
+    async def __call__(self, message):
+        self.messages.append(message)
+        self.times.append(time.monotonic())
+        return f"sent:{message}"
+
+
+def test_priority_then_submit_order():
+    async def main() -> list[str]:
+        queue = SendQueue(FakeBot(), interval=0)
+        sent = Sent()
+        futures = [
+            queue.submit("a", sent, priority=1),
+            queue.submit("b", sent, priority=0),
+            queue.submit("c", sent, priority=1),
+            queue.submit("d", sent, priority=-1),
+        ]
+        assert await asyncio.gather(*futures) == ["sent:a", "sent:b", "sent:c", "sent:d"]
+        await queue.close()
+        return sent.messages
+
+    assert asyncio.run(main()) == ["d", "b", "a", "c"]
+
+
+def test_pacing():
+    interval = 0.05
+
+    async def main() -> list[float]:
+        queue = SendQueue(FakeBot(), interval=interval)
+        sent = Sent()
+        await asyncio.gather(*[queue.submit(str(i), sent) for i in range(3)])
+        await queue.close()
+        return sent.times
+
+    times = asyncio.run(main())
+    assert all(b - a >= interval * 0.9 for a, b in zip(times, times[1:]))
+
+
+def test_media_resolved_while_queued():
+    async def main() -> float:
+        bot = FakeBot(resolve=0.05)
+        queue = SendQueue(bot, interval=0, concurrency=4)
+        sent = Sent()
+        start = time.monotonic()
+        await asyncio.gather(*[queue.submit(str(i), sent) for i in range(4)])
+        await queue.close()
+        assert sorted(bot.resolved) == ["0", "1", "2", "3"]
+        return time.monotonic() - start
+
+    # 4条消息的媒体同时处理，不是依次处理
+    assert asyncio.run(main()) < 0.15
+
+
+def test_failure_reaches_caller():
+    async def fail(message):
+        raise RuntimeError(message)
+
+    async def main():
+        queue = SendQueue(FakeBot(), interval=0)
+        sent = Sent()
+        with pytest.raises(RuntimeError):
+            await queue.submit("fail", fail)
+        # 失败不影响后面的消息
+        assert await queue.submit("ok", sent) == "sent:ok"
+        await queue.close()
+
+    asyncio.run(main())
+
+
+def test_close_cancels_pending():
+    async def main():
+        queue = SendQueue(FakeBot(), interval=10)
+        sent = Sent()
+        first = queue.submit("first", sent)
+        second = queue.submit("second", sent)
+        await first
+        await queue.close()
+        assert second.cancelled()
+        assert len(queue) == 0
+        assert sent.messages == ["first"]
+
+    asyncio.run(main())
+
+
+def test_only_unawaited_failures_are_logged():
+    async def fail(message):
+        raise RuntimeError(message)
+
+    async def main():
+        queue = SendQueue(FakeBot(), interval=0)
+        with pytest.raises(RuntimeError):
+            await queue.submit("awaited", fail)
+        future = queue.submit("detached", fail, wait=False)
+        await asyncio.gather(future, return_exceptions=True)
+        await queue.close()
+
+    logs: list[str] = []
+    handler = logger.add(logs.append, level="ERROR", format="{message}")
+    try:
+        asyncio.run(main())
+    finally:
+        logger.remove(handler)
+    assert len(logs) == 1
+    assert "detached" in logs[0]
@@ -0,0 +1,102 @@
+import random
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from nonebot.utils import run_sync
+
+from benchmarks import samples
+from nonebot_adapter_club255.bean import BasePost, PostInfo, PostDetails
+from nonebot_adapter_club255.store import PostStore
+
+START = datetime(2024, 1, 1)
+
+
+def _post(pid: int, *, uid: int = 1, title: str | None = None, tag: str = "hanser", **extra) -> dict:
+    data = samples.post(pid, random.Random(pid))
+    data["author"] = {**data["author"], "uid": uid}
+    data["tags"] = [{"tagId": 1, "tagName": tag}]
+    data["type"] = 0
+    if title is not None:
+        data["title"] = title
+    data.update(extra)
+    return data
+
+
+def _details(pid: int, **kwargs) -> PostDetails:
+    data = samples.post_details(pid, random.Random(pid))
+    data.update({k: v for k, v in _post(pid, **kwargs).items() if k != "content"})
+    data["author"] = {**samples.post_details(pid)["author"], "uid": kwargs.get("uid", 1)}
+    return PostDetails.model_validate(data)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PostStore(tmp_path / "posts.db", retention=0)
+    yield store
+    store.close()
+
+
+def test_rank_upsert(store):
+    store.add_posts([BasePost.model_validate(_post(1, title="简略"))])
+    assert type(store.get(1)) is BasePost
+
+    store.add_details(_details(1, title="详情"))
+    post = store.get(1)
+    assert type(post) is PostDetails
+    assert post.title == "详情"
+    assert store.get_details(1) is not None
+
+    # 信息更少的不会覆盖详情
+    store.add_posts([PostInfo.model_validate(_post(1, title="列表"))])
+    assert type(store.get(1)) is PostDetails
+    assert store.get(1).title == "详情"
+    assert len(store) == 1
+
+
+def test_upsert_replaces_tags(store):
+    store.add_posts([PostInfo.model_validate(_post(1, tag="old"))])
+    store.add_posts([PostInfo.model_validate(_post(1, tag="new"))])
+    assert store.query(tag="old") == []
+    assert [i.postId for i in store.query(tag="new")] == [1]
+
+
+def test_query(store):
+    store.add_posts(
+        [
+            PostInfo.model_validate(_post(1, uid=7, title="今天也是元气满满的一天")),
+            PostInfo.model_validate(_post(2, uid=7, title="演唱会", tag="live")),
+            PostInfo.model_validate(_post(3, uid=8, title="新人报到_请多指教")),
+        ]
+    )
+    # 按发布时间从新到旧
+    assert [i.postId for i in store.query()] == [3, 2, 1]
+    assert [i.postId for i in store.query(uid=7)] == [2, 1]
+    assert [i.postId for i in store.query(tag="live")] == [2]
+    assert [i.postId for i in store.query(label="日常", limit=1, offset=1)] == [2]
+    assert [i.postId for i in store.query(keyword="元气满满")] == [1]
+    # 短关键词用LIKE，_不是通配符
+    assert [i.postId for i in store.query(keyword="演唱")] == [2]
+    assert [i.postId for i in store.query(keyword="到_")] == [3]
+    assert store.query(keyword="会_") == []
+    assert [i.postId for i in store.query(since=START + timedelta(minutes=2))] == [3, 2]
+    assert [i.postId for i in store.query(until=START + timedelta(minutes=2))] == [1]
+
+
+def test_prune_max_posts(tmp_path):
+    store = PostStore(tmp_path / "posts.db", max_posts=3, retention=0)
+    store.add_posts([PostInfo.model_validate(_post(i)) for i in range(1, 6)])
+    assert store.prune() == 2
+    assert [i.postId for i in store.query()] == [5, 4, 3]
+    assert store.query(tag="hanser", limit=10)[-1].postId == 3
+    store.close()
+
+
+def test_add_posts_from_threads(store):
+    posts = [PostInfo.model_validate(_post(i)) for i in range(1, 201)]
+
+    async def main():
+        await asyncio.gather(*[run_sync(store.add_posts)(posts[i : i + 20]) for i in range(0, 200, 20)])
+
+    asyncio.run(main())
+    assert len(store) == 200